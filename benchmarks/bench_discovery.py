@@ -0,0 +1,243 @@
+"""Discovery benchmark suite over synthetic monorepos.
+
+Generates repositories of Python files with a configurable density of `@codegen.function` /
+`@codegen.webhook` decorators, nested ignored directories and large generated files, then times:
+
+- `CodemodManager.get_decorated` with a cold index and with a warm index loaded from disk
+- `CodemodManager.get(name)` for the first function in path order and for a missing name
+- `find_codegen_functions` over every file that contains a decorator
+
+Each scenario runs in a fresh interpreter, so peak RSS (including pool workers) and bytes read are
+per scenario. Results are written as JSON and can be compared against a previous run:
+
+    python benchmarks/bench_discovery.py --sizes 1000 10000 --json after.json --compare before.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pygit2
+
+SCENARIOS = ["get_decorated_cold", "get_decorated_warm", "get_first", "get_missing", "find_codegen_functions"]
+FILES_PER_PACKAGE = 100
+IGNORED_DIRS = ["build", "generated"]
+SKIPPED_DIRS = ["node_modules", ".venv"]
+
+
+def _plain_module(rng: random.Random) -> str:
+    return "".join(f"def helper_{i}(x):\n    return x + {i}\n\n\n" for i in range(rng.randint(5, 40)))
+
+
+def _decorated_module(rng: random.Random, index: int, webhook_ratio: float) -> str:
+    functions = []
+    for i in range(rng.randint(1, 3)):
+        if rng.random() < webhook_ratio:
+            decorator = f'@codegen.webhook("webhook-{index}-{i}", users=["@someone"])'
+        else:
+            decorator = f'@codegen.function("function-{index}-{i}")'
+        functions.append(f"{decorator}\ndef run_{i}(codebase):\n    for file in codebase.files:\n        print(file.path, {i})\n")
+    return "import codegen\n\n\n" + _plain_module(rng) + "\n\n".join(functions)
+
+
+def generate_repo(root: Path, files: int, density: float, webhook_ratio: float, large_every: int, large_size: int, git: bool, seed: int = 0) -> dict:
+    """Write a synthetic repository and return a summary of what it contains."""
+    rng = random.Random(seed)
+    large = "# generated\n" + "x = 1\n" * (large_size // 6)
+    decorated_files = []
+
+    for i in range(files):
+        package = root / f"pkg_{i // (FILES_PER_PACKAGE * 10)}" / f"sub_{i // FILES_PER_PACKAGE}"
+        package.mkdir(parents=True, exist_ok=True)
+        path = package / f"module_{i}.py"
+        if large_every and i % large_every == large_every - 1:
+            path.write_text(large)
+        elif rng.random() < density:
+            path.write_text(_decorated_module(rng, i, webhook_ratio))
+            decorated_files.append(str(path))
+        else:
+            path.write_text(_plain_module(rng))
+
+        # Every package also carries ignored build output that discovery must not descend into
+        if i % FILES_PER_PACKAGE == 0:
+            for name in IGNORED_DIRS:
+                ignored = package / name / "nested"
+                ignored.mkdir(parents=True, exist_ok=True)
+                (ignored / f"module_{i}.py").write_text(_decorated_module(rng, i, webhook_ratio))
+
+    for name in SKIPPED_DIRS:
+        skipped = root / name / "lib"
+        skipped.mkdir(parents=True, exist_ok=True)
+        (skipped / "vendored.py").write_text(_decorated_module(rng, -1, webhook_ratio))
+
+    if git:
+        (root / ".gitignore").write_text("".join(f"{name}/\n" for name in IGNORED_DIRS + SKIPPED_DIRS))
+        repo = pygit2.init_repository(root)
+        repo.index.add_all()
+        repo.index.write()
+
+    return {"files": files, "decorated_files": decorated_files}
+
+
+def first_function(decorated_files: list[str]) -> str:
+    """Name of the first function in path order (the order discovery scans in), not generation order."""
+    if not decorated_files:
+        return ""
+    source = min(map(Path, decorated_files)).read_text()
+    return source.split('("', 1)[1].split('"', 1)[0]
+
+
+def _read_bytes() -> int | None:
+    """Bytes read through read() syscalls by this process and its reaped children (Linux only)."""
+    try:
+        for line in Path("/proc/self/io").read_text().splitlines():
+            if line.startswith("rchar:"):
+                return int(line.split()[1])
+    except OSError:
+        return None
+    return None
+
+
+def _peak_rss_bytes() -> int:
+    # ru_maxrss is in KiB on Linux and in bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, children) * scale
+
+
+def run_scenario(scenario: str, root: Path, work_dir: Path, jobs: int | None) -> dict:
+    """Run a single scenario in this process and return its measurements."""
+    from codegen.cli.utils.codemod_manager import CodemodManager
+    from codegen.cli.utils.discovery_index import DiscoveryIndex
+    from codegen.cli.utils.function_finder import find_codegen_functions
+    from codegen.cli.utils.path_matcher import PathMatcher
+
+    # No codegen folder here, so `get` uses an in-memory index and the default config
+    os.chdir(root)
+    summary = json.loads((work_dir / "summary.json").read_text())
+    index_path = work_dir / "index.json"
+
+    rchar_before = _read_bytes()
+    start = time.perf_counter()
+    match scenario:
+        case "get_decorated_cold":
+            index = DiscoveryIndex(index_path)
+            result = len(CodemodManager.get_decorated(root, index=index, jobs=jobs, matcher=PathMatcher()))
+        case "get_decorated_warm":
+            index = DiscoveryIndex.load(index_path)
+            result = len(CodemodManager.get_decorated(root, index=index, jobs=jobs, matcher=PathMatcher()))
+        case "get_first":
+            result = CodemodManager.get(first_function(summary["decorated_files"]), root, jobs=jobs) is not None
+        case "get_missing":
+            result = CodemodManager.get("function-that-does-not-exist", root, jobs=jobs) is not None
+        case "find_codegen_functions":
+            result = sum(len(find_codegen_functions(Path(path))) for path in summary["decorated_files"])
+        case _:
+            raise ValueError(f"Unknown scenario {scenario}")
+    seconds = time.perf_counter() - start
+    rchar_after = _read_bytes()
+
+    files = len(summary["decorated_files"]) if scenario == "find_codegen_functions" else summary["files"]
+    return {
+        "scenario": scenario,
+        "files": files,
+        "result": result,
+        "seconds": seconds,
+        "files_per_second": files / seconds if seconds else None,
+        "peak_rss_bytes": _peak_rss_bytes(),
+        "bytes_read": rchar_after - rchar_before if rchar_before is not None else None,
+    }
+
+
+def _git_commit() -> str | None:
+    try:
+        repo = pygit2.Repository(pygit2.discover_repository(str(Path(__file__).parent)))
+        return str(repo.head.target)
+    except (pygit2.GitError, TypeError, KeyError):
+        return None
+
+
+def _compare(results: list[dict], baseline_path: Path) -> None:
+    baseline = {(r["size"], r["scenario"]): r for r in json.loads(baseline_path.read_text())["results"]}
+    print(f"\nCompared to {baseline_path}:")
+    for result in results:
+        before = baseline.get((result["size"], result["scenario"]))
+        if not before:
+            continue
+        changes = []
+        for key in ("seconds", "peak_rss_bytes", "bytes_read"):
+            if before.get(key) and result.get(key) is not None:
+                changes.append(f"{key} {(result[key] - before[key]) / before[key] * 100:+7.1f}%")
+        print(f"  {result['size']:>7} {result['scenario']:24} {'  '.join(changes)}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000], help="Repository sizes (number of Python files)")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--density", type=float, default=0.02, help="Fraction of files containing decorated functions")
+    parser.add_argument("--webhook-ratio", type=float, default=0.2, help="Fraction of decorated functions that are webhooks")
+    parser.add_argument("--large-every", type=int, default=1_000, help="Make every Nth file a large generated file (0 to disable)")
+    parser.add_argument("--large-size-kib", type=int, default=1_024)
+    parser.add_argument("--no-git", action="store_true", help="Don't initialize a git repository (discovery walks the file system)")
+    parser.add_argument("-j", "--jobs", type=int, help="Worker processes for discovery (defaults to CodemodManager's choice)")
+    parser.add_argument("--work-dir", type=Path, help="Keep generated repositories here and reuse them across runs")
+    parser.add_argument("--json", type=Path, help="Write results as JSON to this path")
+    parser.add_argument("--compare", type=Path, help="Print changes relative to a previous JSON result")
+    parser.add_argument("--run-scenario", nargs=2, metavar=("SCENARIO", "WORK_DIR"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_scenario:
+        scenario, work_dir = args.run_scenario
+        print(json.dumps(run_scenario(scenario, Path(work_dir) / "repo", Path(work_dir), args.jobs)))
+        return 0
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        base_dir = args.work_dir or Path(tmp)
+        for size in args.sizes:
+            work_dir = base_dir / f"repo-{size}-{args.density}-{'plain' if args.no_git else 'git'}"
+            summary_path = work_dir / "summary.json"
+            if not summary_path.exists():
+                print(f"Generating {size} files in {work_dir}...", file=sys.stderr)
+                summary = generate_repo(work_dir / "repo", size, args.density, args.webhook_ratio, args.large_every, args.large_size_kib * 1024, git=not args.no_git)
+                summary_path.write_text(json.dumps(summary))
+            (work_dir / "index.json").unlink(missing_ok=True)
+
+            for scenario in args.scenarios:
+                command = [sys.executable, __file__, "--run-scenario", scenario, str(work_dir)]
+                if args.jobs:
+                    command += ["--jobs", str(args.jobs)]
+                output = subprocess.run(command, capture_output=True, text=True, check=True).stdout
+                result = {"size": size, **json.loads(output.strip().splitlines()[-1])}
+                results.append(result)
+                bytes_read = f"{result['bytes_read'] / 2**20:9.1f} MiB" if result["bytes_read"] is not None else "      n/a"
+                print(
+                    f"{size:>7} {scenario:24} {result['seconds']:8.3f}s {result['files_per_second'] or 0:>10.0f} files/s" f"  peak RSS {result['peak_rss_bytes'] / 2**20:7.1f} MiB  read {bytes_read}"
+                )
+
+    if args.json:
+        metadata = {
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "created_at": time.time(),
+            "parameters": {key: str(value) if isinstance(value, Path) else value for key, value in vars(args).items() if key not in ("json", "compare", "run_scenario")},
+        }
+        args.json.write_text(json.dumps({"metadata": metadata, "results": results}, indent=2))
+    if args.compare:
+        _compare(results, args.compare)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,149 @@
+"""Micro-benchmark for the per-file discovery path in codemod_manager / function_finder.
+
+Compares the single-read (mmap for large files) scan against the previous approach, which read each
+file once for the `@codegen` probe, re-read it as text to parse it, re-split the whole source once
+per decorated function and kept every body and parameter list on the discovered records.
+
+Usage:
+    python benchmarks/bench_function_finder.py [--files 200] [--json results.json]
+"""
+
+import argparse
+import ast
+import json
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from codegen.cli.utils.codemod_manager import _scan_file
+from codegen.cli.utils.function_finder import CodegenFunctionVisitor
+
+FUNCTIONS_PER_FILE = 10
+LARGE_FILE_SIZE = 2 * 1024 * 1024
+
+
+class LegacyVisitor(CodegenFunctionVisitor):
+    """The visitor as it worked before: splits the source per function and keeps bodies on the records."""
+
+    def __init__(self, text: str):
+        super().__init__(text.encode())
+        self.text = text
+
+    def visit_FunctionDef(self, node: ast.FunctionDef) -> None:
+        count = len(self.functions)
+        super().visit_FunctionDef(node)
+        for func in self.functions[count:]:
+            start_line = node.body[0].lineno - 1
+            end_line = node.body[-1].end_lineno
+            source_lines = self.text.splitlines()[start_line:end_line]
+            indents = [len(line) - len(line.lstrip()) for line in source_lines if line.strip()]
+            min_indent = min(indents, default=0)
+            func._source = "\n".join(line[min_indent:] if line.strip() else "" for line in source_lines)
+            func._parameters = self.get_function_parameters(node)
+
+
+def legacy_scan(path: Path) -> list:
+    with open(path, "rb") as f:
+        if b"@codegen" not in f.read():
+            return []
+    with open(path) as f:
+        text = f.read()
+    visitor = LegacyVisitor(text)
+    visitor.visit(ast.parse(text))
+    return visitor.functions
+
+
+def single_read_scan(path: Path) -> list:
+    result = _scan_file(path)
+    return result[2] if result else []
+
+
+def generate_files(root: Path, count: int) -> list[Path]:
+    """A mix of small plain files, files with decorated functions and large generated files."""
+    filler = "".join(f"def helper_{i}(x):\n    return x + {i}\n\n\n" for i in range(50))
+    decorated = "import codegen\n\n\n" + "".join(
+        f'@codegen.function("function-{i}")\ndef run_{i}(codebase):\n    for f in codebase.functions:\n        print(f.name, {i})\n\n\n' for i in range(FUNCTIONS_PER_FILE)
+    )
+    large = ("# generated\n" + filler) * (LARGE_FILE_SIZE // len(filler))
+
+    paths = []
+    for i in range(count):
+        path = root / f"module_{i}.py"
+        match i % 10:
+            case 0:
+                path.write_text(large)
+            case 1 | 2:
+                path.write_text(filler + decorated)
+            case _:
+                path.write_text(filler)
+        paths.append(path)
+    return paths
+
+
+def read_bytes_counter() -> int | None:
+    """Bytes read through read() syscalls by this process (Linux only)."""
+    try:
+        for line in Path("/proc/self/io").read_text().splitlines():
+            if line.startswith("rchar:"):
+                return int(line.split()[1])
+    except OSError:
+        return None
+    return None
+
+
+def measure(scan, paths: list[Path]) -> dict:
+    rchar_before = read_bytes_counter()
+    start = time.perf_counter()
+    functions = sum(len(scan(path)) for path in paths)
+    elapsed = time.perf_counter() - start
+    rchar_after = read_bytes_counter()
+
+    # Allocations are measured in a separate pass so tracing doesn't skew the timings
+    peak_total = 0
+    retained = []
+    tracemalloc.start()
+    for path in paths:
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        retained.extend(scan(path))
+        peak_total += tracemalloc.get_traced_memory()[1] - before
+    retained_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return {
+        "files": len(paths),
+        "functions": functions,
+        "seconds": elapsed,
+        "bytes_read_per_file": (rchar_after - rchar_before) / len(paths) if rchar_before is not None else None,
+        "peak_alloc_bytes_per_file": peak_total / len(paths),
+        # Memory still held by the discovered records, i.e. what `codegen list` keeps alive
+        "retained_bytes_per_function": retained_bytes / max(1, len(retained)),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=200)
+    parser.add_argument("--json", type=Path, help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = generate_files(Path(tmp), args.files)
+        results = {"legacy": measure(legacy_scan, paths), "single_read": measure(single_read_scan, paths)}
+
+    assert results["legacy"]["functions"] == results["single_read"]["functions"]
+    for name, result in results.items():
+        bytes_read = f"{result['bytes_read_per_file'] / 1024:10.1f} KiB" if result["bytes_read_per_file"] is not None else "       n/a"
+        print(
+            f"{name:12} {result['seconds']:8.3f}s  read/file {bytes_read}  peak alloc/file {result['peak_alloc_bytes_per_file'] / 1024:10.1f} KiB"
+            f"  retained/function {result['retained_bytes_per_function']:8.0f} B"
+        )
+
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+"""Benchmark of API response encodings against a local stand-in server.
+
+Serves a `RunCodemodOutput` with a large diff in `observation` and large `logs`, in every encoding the
+client can read (plain JSON, gzip, and zstd / msgpack when those packages are installed). For each one
+it reports bytes on the wire, the time to fetch and decode the response through `RestAPI`, and the
+peak memory allocated while decoding. Large string fields are decoded lazily, so the peak covers
+fetching and validating the response but not reading `observation` or `logs`.
+
+Usage:
+    python benchmarks/bench_wire.py [--diff-mib 20] [--json results.json]
+"""
+
+import argparse
+import json
+import sys
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from codegen.cli.api import wire
+from codegen.cli.api.client import APIRequest, RestAPI
+from codegen.cli.api.schemas import RunCodemodInput, RunCodemodOutput
+from codegen.cli.api.transport import HTTPTransport
+from codegen.cli.api.wire import WireNegotiator
+
+
+def make_output(diff_bytes: int) -> dict:
+    hunk = "".join(f"-    old_call_{i}(x)\n+    new_call_{i}(x, y)\n" for i in range(20))
+    diff = "".join(f"diff --git a/src/module_{i}.py b/src/module_{i}.py\n@@ -1,20 +1,20 @@\n{hunk}" for i in range(diff_bytes // (len(hunk) + 80) + 1))
+    logs = "".join(f"INFO processing src/module_{i}.py\n" for i in range(diff_bytes // 200))
+    return {"success": True, "web_link": "https://example.com/run/1", "logs": logs, "observation": diff, "error": None}
+
+
+def encodings() -> dict[str, tuple[str, str | None]]:
+    """Encoding name -> (content type, content encoding) for every encoding this client can read."""
+    available = {"json": (wire.JSON_CONTENT_TYPE, None), "json+gzip": (wire.JSON_CONTENT_TYPE, "gzip")}
+    if wire.zstandard:
+        available["json+zstd"] = (wire.JSON_CONTENT_TYPE, "zstd")
+    if wire.msgpack:
+        available["msgpack"] = (wire.MSGPACK_CONTENT_TYPE, None)
+        available["msgpack+gzip"] = (wire.MSGPACK_CONTENT_TYPE, "gzip")
+    return available
+
+
+def start_server(output: dict) -> ThreadingHTTPServer:
+    """Serve `output` in the encoding named by the request path, precomputing every body up front."""
+    bodies = {}
+    for name, (content_type, content_encoding) in encodings().items():
+        body = wire.msgpack.packb(output) if content_type == wire.MSGPACK_CONTENT_TYPE else json.dumps(output).encode()
+        if content_encoding:
+            body = wire.compress(body, content_encoding)
+        bodies[name] = (body, content_type, content_encoding)
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            body, content_type, content_encoding = bodies[self.path.strip("/")]
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            if content_encoding:
+                self.send_header("Content-Encoding", content_encoding)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    httpd.bodies = bodies
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return httpd
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--diff-mib", type=float, default=20)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", type=str, help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    output = make_output(int(args.diff_mib * 2**20))
+    httpd = start_server(output)
+    api = RestAPI("token", transport=HTTPTransport(), wire=WireNegotiator())
+    input_data = RunCodemodInput(input=RunCodemodInput.BaseRunCodemodInput(repo_full_name="org/repo", codemod_source="pass"))
+
+    results = {}
+    for name in encodings():
+        request = APIRequest("POST", f"http://127.0.0.1:{httpd.server_address[1]}/{name}", input_data, RunCodemodOutput)
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            decoded = api._send(request)
+            timings.append(time.perf_counter() - start)
+        assert decoded.observation == output["observation"]
+        del decoded
+
+        # Allocations are measured in a separate pass so tracing doesn't skew the timings
+        tracemalloc.start()
+        api._send(request)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        results[name] = {"wire_bytes": len(httpd.bodies[name][0]), "seconds": min(timings), "peak_alloc_bytes": peak}
+        print(f"{name:14} wire {results[name]['wire_bytes'] / 2**20:8.2f} MiB  fetch+decode {min(timings):7.3f}s  peak alloc {peak / 2**20:8.1f} MiB")
+
+    httpd.shutdown()
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"diff_mib": args.diff_mib, "results": results}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1 @@
+ENV = ""
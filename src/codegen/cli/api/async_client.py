@@ -0,0 +1,138 @@
+import asyncio
+
+import httpx
+
+from codegen.cli.api.async_transport import DEFAULT_MAX_CONCURRENCY, AsyncHTTPTransport
+from codegen.cli.api.client import APIRequest, BaseRestAPI, OutputT
+from codegen.cli.api.response_cache import ResponseCache
+from codegen.cli.api.run_cache import RunCache
+from codegen.cli.api.schemas import (
+    AskExpertResponse,
+    CodemodRunType,
+    CreateResponse,
+    DeployResponse,
+    IdentifyResponse,
+    LookupOutput,
+    PRSchema,
+    RunCodemodOutput,
+    RunOnPRResponse,
+)
+from codegen.cli.api.transport import TransportConfig
+from codegen.cli.api.wire import WireNegotiator
+from codegen.cli.auth.session import CodegenSession
+from codegen.cli.errors import ServerError
+from codegen.cli.utils.codemods import Codemod
+from codegen.cli.utils.function_finder import DecoratedFunction
+
+
+class AsyncRestAPI(BaseRestAPI):
+    """asyncio client for the codegen API, with the same typed methods as RestAPI.
+
+    Connections are reused across calls and at most `max_concurrency` requests are in flight, so batch
+    workflows can simply gather many calls:
+
+        async with AsyncRestAPI(token) as api:
+            outputs = await asyncio.gather(*(api.lookup(name) for name in names))
+    """
+
+    def __init__(
+        self,
+        auth_token: str,
+        transport: AsyncHTTPTransport | None = None,
+        config: TransportConfig | None = None,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        wire: WireNegotiator | None = None,
+        cache: ResponseCache | None = None,
+        session: CodegenSession | None = None,
+        run_cache: RunCache | None = None,
+    ):
+        super().__init__(auth_token, wire, cache, session, run_cache)
+        self.transport = transport or AsyncHTTPTransport(config, max_concurrency=max_concurrency)
+
+    async def __aenter__(self) -> "AsyncRestAPI":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+    async def _send(self, request: APIRequest[OutputT]) -> OutputT:
+        self._log_request(request)
+        # The response cache reads and writes files, so it's kept off the event loop
+        key, cached = await asyncio.to_thread(self._cached_response, request)
+        if cached and self.cache.is_fresh(request.endpoint, cached):
+            return self._parse_response(200, cached.content, request.output_model, cached.content_type)
+        body = self._encode_request(request, cached)
+        try:
+            response = await self.transport.request(request.method, request.endpoint, idempotent=request.idempotent, content=body.content or None, headers={**self._get_headers(), **body.headers})
+            if self.wire.should_fall_back(request.endpoint, body, response.status_code):
+                # The server couldn't read the compressed/binary body, so it wasn't processed: resend it as plain JSON
+                body = self._encode_request(request, cached)
+                response = await self.transport.request(request.method, request.endpoint, idempotent=request.idempotent, content=body.content or None, headers={**self._get_headers(), **body.headers})
+        except httpx.HTTPError as e:
+            raise ServerError(f"Network error: {e!s}")
+        self.wire.record_response(request.endpoint, response.headers)
+        status_code, content, content_type = await asyncio.to_thread(self._update_cache, request, key, cached, response.status_code, response.content, response.headers)
+        return self._parse_response(status_code, content, request.output_model, content_type)
+
+    async def run(
+        self,
+        function: DecoratedFunction | Codemod,
+        include_source: bool = True,
+        run_type: CodemodRunType = CodemodRunType.DIFF,
+        template_context: dict[str, str] | None = None,
+    ) -> RunCodemodOutput:
+        """Run a codemod transformation.
+
+        Args:
+            function: The function or codemod to run
+            include_source: Whether to include the source code in the request.
+                          If False, uses the deployed version.
+            run_type: Type of run (diff or pr)
+            template_context: Context variables to pass to the codemod
+
+        Successful diff runs are cached: running the same source on the same repository state returns the stored
+        result. The cache key (which fingerprints the working tree) and the cache's files are computed and read
+        in a worker thread, so other requests keep going meanwhile.
+
+        """
+        return await self.run_cache.get_or_run_async(
+            lambda: self._run_cache_key(function, include_source, run_type, template_context),
+            lambda: self._send(self._run_request(function, include_source, run_type, template_context)),
+        )
+
+    async def get_docs(self) -> dict:
+        """Search documentation."""
+        return await self._send(self._get_docs_request())
+
+    async def ask_expert(self, query: str) -> AskExpertResponse:
+        """Ask the expert system a question."""
+        return await self._send(self._ask_expert_request(query))
+
+    async def create(self, name: str, query: str) -> CreateResponse:
+        """Get AI-generated starter code for a codemod."""
+        return await self._send(self._create_request(name, query))
+
+    async def identify(self) -> IdentifyResponse | None:
+        """Identify the user's codemod."""
+        return await self._send(self._identify_request())
+
+    async def deploy(
+        self, codemod_name: str, codemod_source: str, lint_mode: bool = False, lint_user_whitelist: list[str] | None = None, message: str | None = None, arguments_schema: dict | None = None
+    ) -> DeployResponse:
+        """Deploy a codemod to the Modal backend."""
+        return await self._send(self._deploy_request(codemod_name, codemod_source, lint_mode, lint_user_whitelist, message, arguments_schema))
+
+    async def lookup(self, codemod_name: str) -> LookupOutput:
+        """Look up a codemod by name."""
+        return await self._send(self._lookup_request(codemod_name))
+
+    async def run_on_pr(self, codemod_name: str, repo_full_name: str, github_pr_number: int, language: str | None = None) -> RunOnPRResponse:
+        """Test a webhook against a specific PR."""
+        return await self._send(self._run_on_pr_request(codemod_name, repo_full_name, github_pr_number, language))
+
+    async def lookup_pr(self, repo_full_name: str, github_pr_number: int) -> PRSchema:
+        """Look up a PR by repository and PR number."""
+        return await self._send(self._lookup_pr_request(repo_full_name, github_pr_number))
@@ -0,0 +1,79 @@
+import asyncio
+
+import httpx
+
+from codegen.cli.api.transport import IDEMPOTENT_METHODS, RetryPolicy, TokenBucket, TransportConfig
+
+# Default number of requests an async client keeps in flight at once
+DEFAULT_MAX_CONCURRENCY = 100
+
+
+def _never_sent(error: httpx.TransportError) -> bool:
+    """Whether the request failed before reaching the server, so it is safe to retry any method."""
+    return isinstance(error, httpx.ConnectError | httpx.ConnectTimeout | httpx.PoolTimeout)
+
+
+class AsyncHTTPTransport(RetryPolicy):
+    """asyncio counterpart of HTTPTransport, built on a pooled `httpx.AsyncClient`.
+
+    Uses the same timeouts, retry and rate limiting rules, and bounds the number of requests in flight to
+    `max_concurrency`. Must be closed with `aclose()` (or used as an async context manager).
+    """
+
+    def __init__(self, config: TransportConfig | None = None, max_concurrency: int = DEFAULT_MAX_CONCURRENCY):
+        self.config = config or TransportConfig()
+        self.max_concurrency = max_concurrency
+        self._client = httpx.AsyncClient(
+            timeout=httpx.Timeout(self.config.read_timeout, connect=self.config.connect_timeout, pool=None),
+            limits=httpx.Limits(max_connections=max_concurrency, max_keepalive_connections=max_concurrency),
+        )
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._limiter = TokenBucket(self.config.rate_limit, self.config.burst) if self.config.rate_limit else None
+
+    async def __aenter__(self) -> "AsyncHTTPTransport":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+    async def request(self, method: str, url: str, idempotent: bool | None = None, **kwargs) -> httpx.Response:
+        """Send a request, retrying transient failures.
+
+        Args:
+            method: HTTP method
+            url: URL to request
+            idempotent: Whether the request can safely be repeated. Defaults to True for idempotent HTTP methods.
+            **kwargs: Passed to `httpx.AsyncClient.request`
+
+        Returns:
+            The last response received, which may still be an error response once retries are exhausted
+
+        Raises:
+            httpx.TransportError: If the request could not be completed
+
+        """
+        if idempotent is None:
+            idempotent = method.upper() in IDEMPOTENT_METHODS
+
+        attempt = 0
+        while True:
+            if self._limiter:
+                while wait := self._limiter.try_acquire():
+                    await asyncio.sleep(wait)
+            try:
+                async with self._semaphore:
+                    response = await self._client.request(method, url, **kwargs)
+            except httpx.TransportError as e:
+                if attempt >= self.config.max_retries or not (idempotent or _never_sent(e)):
+                    raise
+                delay = self._backoff(attempt)
+            else:
+                delay = self._retry_delay(attempt, response.status_code, response.headers.get("Retry-After"), idempotent)
+                if delay is None:
+                    return response
+
+            attempt += 1
+            await asyncio.sleep(delay)
@@ -1,21 +1,16 @@
 import json
-from typing import ClassVar, TypeVar
+from dataclasses import dataclass
+from typing import Generic, TypeVar
 
 import requests
 from pydantic import BaseModel
 from rich import print as rprint
 
-from codegen.cli.api.endpoints import (
-    CREATE_ENDPOINT,
-    DEPLOY_ENDPOINT,
-    DOCS_ENDPOINT,
-    EXPERT_ENDPOINT,
-    IDENTIFY_ENDPOINT,
-    LOOKUP_ENDPOINT,
-    PR_LOOKUP_ENDPOINT,
-    RUN_ENDPOINT,
-    RUN_ON_PR_ENDPOINT,
-)
+# Endpoint URLs are read when a request is built, so importing this module doesn't resolve them
+from codegen.cli.api import endpoints
+from codegen.cli.api.decoding import validate_response
+from codegen.cli.api.response_cache import CachedResponse, ResponseCache, get_default_response_cache
+from codegen.cli.api.run_cache import RunCache, get_default_run_cache
 from codegen.cli.api.schemas import (
     AskExpertInput,
     AskExpertResponse,
@@ -37,10 +32,14 @@ from codegen.cli.api.schemas import (
     RunOnPRInput,
     RunOnPRResponse,
 )
+from codegen.cli.api.transport import HTTPTransport, get_default_transport, read_body
+from codegen.cli.api.wire import EncodedBody, WireNegotiator, decode, default_negotiator
 from codegen.cli.auth.session import CodegenSession
+from codegen.cli.auth.token_manager import TokenManager
 from codegen.cli.codemod.convert import convert_to_ui
 from codegen.cli.env.global_env import global_env
 from codegen.cli.errors import InvalidTokenError, ServerError
+from codegen.cli.git.repo import get_git_repo
 from codegen.cli.utils.codemods import Codemod
 from codegen.cli.utils.function_finder import DecoratedFunction
 
@@ -48,83 +47,111 @@ InputT = TypeVar("InputT", bound=BaseModel)
 OutputT = TypeVar("OutputT", bound=BaseModel)
 
 
-class RestAPI:
-    """Handles auth + validation with the codegen API."""
+@dataclass
+class APIRequest(Generic[OutputT]):
+    """A typed API call: where to send it, what to send and which model the response is validated into."""
+
+    method: str
+    endpoint: str
+    input_data: BaseModel | None
+    output_model: type[OutputT]
+    # Whether the call can safely be retried. Defaults to the HTTP method's semantics; set it for POST endpoints that only read.
+    idempotent: bool | None = None
+
 
-    _session: ClassVar[requests.Session] = requests.Session()
+class BaseRestAPI:
+    """Builds requests and reads responses for the codegen API. Subclasses decide how requests are sent."""
 
     auth_token: str | None = None
 
-    def __init__(self, auth_token: str):
+    def __init__(
+        self,
+        auth_token: str,
+        wire: WireNegotiator | None = None,
+        cache: ResponseCache | None = None,
+        session: CodegenSession | None = None,
+        run_cache: RunCache | None = None,
+    ):
         self.auth_token = auth_token
+        self.wire = wire or default_negotiator
+        self.cache = cache or get_default_response_cache()
+        self.run_cache = run_cache or get_default_run_cache()
+        self._session = session
+
+    @property
+    def session(self) -> CodegenSession:
+        """Session whose repository requests refer to. Defaults to the process-wide session."""
+        return self._session or CodegenSession.current()
 
     def _get_headers(self) -> dict[str, str]:
         """Get headers with authentication token."""
         return {"Authorization": f"Bearer {self.auth_token}"}
 
-    def _make_request(
-        self,
-        method: str,
-        endpoint: str,
-        input_data: InputT | None,
-        output_model: type[OutputT],
-    ) -> OutputT:
-        """Make an API request with input validation and response handling."""
+    def _log_request(self, request: APIRequest) -> None:
         if global_env.DEBUG:
-            rprint(f"[purple]{method}[/purple] {endpoint}")
-            if input_data:
-                rprint(f"{json.dumps(input_data.model_dump(), indent=4)}")
+            rprint(f"[purple]{request.method}[/purple] {request.endpoint}")
+            if request.input_data:
+                rprint(f"{json.dumps(request.input_data.model_dump(), indent=4)}")
 
-        try:
-            headers = self._get_headers()
+    def _payload(self, request: APIRequest) -> dict | None:
+        return request.input_data.model_dump(mode="json") if request.input_data else None
 
-            json_data = input_data.model_dump() if input_data else None
+    def _encode_request(self, request: APIRequest, cached: CachedResponse | None = None) -> EncodedBody:
+        body = self.wire.encode(request.endpoint, self._payload(request))
+        if cached and cached.etag:
+            body.headers["If-None-Match"] = cached.etag
+        return body
 
-            response = self._session.request(
-                method,
-                endpoint,
-                json=json_data,
-                headers=headers,
-            )
+    def _cached_response(self, request: APIRequest) -> tuple[str | None, CachedResponse | None]:
+        """Cache key of a request and its cached response, if its endpoint is cached."""
+        key = self.cache.key(request.method, request.endpoint, self._payload(request), self.auth_token)
+        return key, self.cache.get(request.endpoint, key) if key else None
 
-            if response.status_code == 200:
-                try:
-                    return output_model.model_validate(response.json())
-                except ValueError as e:
-                    raise ServerError(f"Invalid response format: {e}")
-            elif response.status_code == 401:
-                raise InvalidTokenError("Invalid or expired authentication token")
-            elif response.status_code == 500:
-                raise ServerError("The server encountered an error while processing your request")
-            else:
-                try:
-                    error_json = response.json()
-                    error_msg = error_json.get("detail", error_json)
-                except Exception:
-                    error_msg = response.text
-                raise ServerError(f"Error ({response.status_code}): {error_msg}")
+    def _update_cache(self, request: APIRequest, key: str | None, cached: CachedResponse | None, status_code: int, content: bytes | bytearray, headers) -> tuple[int, bytes | bytearray, str | None]:
+        """Record a response in the cache. Returns the status, body and content type to read, answering a 304 from the cache."""
+        if status_code == 304 and cached:
+            # Still valid: keep it for another TTL
+            self.cache.store(request.endpoint, key, cached.content, cached.content_type, cached.etag)
+            return 200, cached.content, cached.content_type
+        content_type = headers.get("Content-Type")
+        if status_code == 200:
+            if key:
+                self.cache.store(request.endpoint, key, content, content_type, headers.get("ETag"))
+            self.cache.invalidate_after(request.endpoint)
+        return status_code, content, content_type
 
-        except requests.RequestException as e:
-            raise ServerError(f"Network error: {e!s}")
+    def _parse_response(self, status_code: int, content: bytes | bytearray, output_model: type[OutputT], content_type: str | None = None) -> OutputT:
+        """Validate a successful response into `output_model`, or raise the matching error."""
+        if status_code == 200:
+            try:
+                return validate_response(output_model, content, content_type)
+            except ValueError as e:
+                raise ServerError(f"Invalid response format: {e}")
+        elif status_code == 401:
+            # The identity, stored and in memory, was for a token the server no longer accepts
+            TokenManager().clear_identity(self.auth_token)
+            if self._session is not None:
+                self._session.forget_identity()
+            CodegenSession.forget_current_identity(self.auth_token)
+            raise InvalidTokenError("Invalid or expired authentication token")
+        elif status_code == 500:
+            raise ServerError("The server encountered an error while processing your request")
+        else:
+            try:
+                error_json = decode(content, content_type)
+                error_msg = error_json.get("detail", error_json)
+            except Exception:
+                error_msg = content.decode(errors="replace")
+            raise ServerError(f"Error ({status_code}): {error_msg}")
 
-    def run(
+    def _run_request(
         self,
         function: DecoratedFunction | Codemod,
         include_source: bool = True,
         run_type: CodemodRunType = CodemodRunType.DIFF,
         template_context: dict[str, str] | None = None,
-    ) -> RunCodemodOutput:
-        """Run a codemod transformation.
-
-        Args:
-            function: The function or codemod to run
-            include_source: Whether to include the source code in the request.
-                          If False, uses the deployed version.
-            run_type: Type of run (diff or pr)
-            template_context: Context variables to pass to the codemod
-
-        """
-        session = CodegenSession()
+    ) -> APIRequest[RunCodemodOutput]:
+        session = self.session
 
         base_input = {
             "codemod_name": function.name,
@@ -142,104 +169,183 @@ class RestAPI:
             base_input["template_context"] = template_context
 
         input_data = RunCodemodInput(input=RunCodemodInput.BaseRunCodemodInput(**base_input))
-        return self._make_request(
-            "POST",
-            RUN_ENDPOINT,
-            input_data,
-            RunCodemodOutput,
+        return APIRequest("POST", endpoints.RUN_ENDPOINT, input_data, RunCodemodOutput)
+
+    def _run_cache_key(
+        self,
+        function: DecoratedFunction | Codemod,
+        include_source: bool = True,
+        run_type: CodemodRunType = CodemodRunType.DIFF,
+        template_context: dict[str, str] | None = None,
+    ) -> str | None:
+        """Run cache key of a run, or None if its result isn't cached.
+
+        Runs of the deployed version aren't cached, since its source isn't known here, and neither are runs
+        from outside a git repository.
+        """
+        if not include_source or not self.run_cache.enabled:
+            return None
+        repo = get_git_repo()
+        if repo is None:
+            return None
+        source = function.get_current_source() if isinstance(function, Codemod) else function.source
+        return self.run_cache.key(repo, source, self.session.repo_name, run_type, template_context)
+
+    def _get_docs_request(self) -> APIRequest[DocsResponse]:
+        session = self.session
+        return APIRequest("GET", endpoints.DOCS_ENDPOINT, DocsInput(docs_input=DocsInput.BaseDocsInput(repo_full_name=session.repo_name)), DocsResponse)
+
+    def _ask_expert_request(self, query: str) -> APIRequest[AskExpertResponse]:
+        return APIRequest("GET", endpoints.EXPERT_ENDPOINT, AskExpertInput(input=AskExpertInput.BaseAskExpertInput(query=query)), AskExpertResponse)
+
+    def _create_request(self, name: str, query: str) -> APIRequest[CreateResponse]:
+        session = self.session
+        return APIRequest("GET", endpoints.CREATE_ENDPOINT, CreateInput(input=CreateInput.BaseCreateInput(name=name, query=query, repo_full_name=session.repo_name)), CreateResponse)
+
+    def _identify_request(self) -> APIRequest[IdentifyResponse]:
+        return APIRequest("POST", endpoints.IDENTIFY_ENDPOINT, None, IdentifyResponse, idempotent=True)
+
+    def _deploy_request(
+        self, codemod_name: str, codemod_source: str, lint_mode: bool = False, lint_user_whitelist: list[str] | None = None, message: str | None = None, arguments_schema: dict | None = None
+    ) -> APIRequest[DeployResponse]:
+        session = self.session
+        input_data = DeployInput(
+            input=DeployInput.BaseDeployInput(
+                codemod_name=codemod_name,
+                codemod_source=codemod_source,
+                repo_full_name=session.repo_name,
+                lint_mode=lint_mode,
+                lint_user_whitelist=lint_user_whitelist or [],
+                message=message,
+                arguments_schema=arguments_schema,
+            )
+        )
+        return APIRequest("POST", endpoints.DEPLOY_ENDPOINT, input_data, DeployResponse)
+
+    def _lookup_request(self, codemod_name: str) -> APIRequest[LookupOutput]:
+        session = self.session
+        return APIRequest("GET", endpoints.LOOKUP_ENDPOINT, LookupInput(input=LookupInput.BaseLookupInput(codemod_name=codemod_name, repo_full_name=session.repo_name)), LookupOutput)
+
+    def _run_on_pr_request(self, codemod_name: str, repo_full_name: str, github_pr_number: int, language: str | None = None) -> APIRequest[RunOnPRResponse]:
+        input_data = RunOnPRInput(
+            input=RunOnPRInput.BaseRunOnPRInput(
+                codemod_name=codemod_name,
+                repo_full_name=repo_full_name,
+                github_pr_number=github_pr_number,
+                language=language,
+            )
         )
+        return APIRequest("POST", endpoints.RUN_ON_PR_ENDPOINT, input_data, RunOnPRResponse)
+
+    def _lookup_pr_request(self, repo_full_name: str, github_pr_number: int) -> APIRequest[PRLookupResponse]:
+        input_data = PRLookupInput(input=PRLookupInput.BasePRLookupInput(repo_full_name=repo_full_name, github_pr_number=github_pr_number))
+        return APIRequest("GET", endpoints.PR_LOOKUP_ENDPOINT, input_data, PRLookupResponse)
+
+
+class RestAPI(BaseRestAPI):
+    """Handles auth + validation with the codegen API."""
+
+    def __init__(
+        self,
+        auth_token: str,
+        transport: HTTPTransport | None = None,
+        wire: WireNegotiator | None = None,
+        cache: ResponseCache | None = None,
+        session: CodegenSession | None = None,
+        run_cache: RunCache | None = None,
+    ):
+        super().__init__(auth_token, wire, cache, session, run_cache)
+        self.transport = transport or get_default_transport()
+
+    def _make_request(
+        self,
+        method: str,
+        endpoint: str,
+        input_data: InputT | None,
+        output_model: type[OutputT],
+        idempotent: bool | None = None,
+    ) -> OutputT:
+        """Make an API request with input validation and response handling.
+
+        Transient failures are retried by the transport. Set `idempotent` for POST endpoints that only read.
+        """
+        return self._send(APIRequest(method, endpoint, input_data, output_model, idempotent))
+
+    def _send(self, request: APIRequest[OutputT]) -> OutputT:
+        self._log_request(request)
+        key, cached = self._cached_response(request)
+        if cached and self.cache.is_fresh(request.endpoint, cached):
+            return self._parse_response(200, cached.content, request.output_model, cached.content_type)
+        body = self._encode_request(request, cached)
+        try:
+            # Streamed, so the body is read into a single buffer instead of chunks joined at the end
+            response = self.transport.request(request.method, request.endpoint, idempotent=request.idempotent, data=body.content or None, headers={**self._get_headers(), **body.headers}, stream=True)
+            if self.wire.should_fall_back(request.endpoint, body, response.status_code):
+                # The server couldn't read the compressed/binary body, so it wasn't processed: resend it as plain JSON
+                response.close()
+                body = self._encode_request(request, cached)
+                response = self.transport.request(
+                    request.method, request.endpoint, idempotent=request.idempotent, data=body.content or None, headers={**self._get_headers(), **body.headers}, stream=True
+                )
+            content = read_body(response)
+        except requests.RequestException as e:
+            raise ServerError(f"Network error: {e!s}")
+        self.wire.record_response(request.endpoint, response.headers)
+        status_code, content, content_type = self._update_cache(request, key, cached, response.status_code, content, response.headers)
+        return self._parse_response(status_code, content, request.output_model, content_type)
+
+    def run(
+        self,
+        function: DecoratedFunction | Codemod,
+        include_source: bool = True,
+        run_type: CodemodRunType = CodemodRunType.DIFF,
+        template_context: dict[str, str] | None = None,
+    ) -> RunCodemodOutput:
+        """Run a codemod transformation.
+
+        Args:
+            function: The function or codemod to run
+            include_source: Whether to include the source code in the request.
+                          If False, uses the deployed version.
+            run_type: Type of run (diff or pr)
+            template_context: Context variables to pass to the codemod
+
+        Successful diff runs are cached: running the same source on the same repository state returns the stored result.
+
+        """
+        key = self._run_cache_key(function, include_source, run_type, template_context)
+        return self.run_cache.get_or_run(key, lambda: self._send(self._run_request(function, include_source, run_type, template_context)))
 
     def get_docs(self) -> dict:
         """Search documentation."""
-        session = CodegenSession()
-        return self._make_request(
-            "GET",
-            DOCS_ENDPOINT,
-            DocsInput(docs_input=DocsInput.BaseDocsInput(repo_full_name=session.repo_name)),
-            DocsResponse,
-        )
+        return self._send(self._get_docs_request())
 
     def ask_expert(self, query: str) -> AskExpertResponse:
         """Ask the expert system a question."""
-        return self._make_request(
-            "GET",
-            EXPERT_ENDPOINT,
-            AskExpertInput(input=AskExpertInput.BaseAskExpertInput(query=query)),
-            AskExpertResponse,
-        )
+        return self._send(self._ask_expert_request(query))
 
     def create(self, name: str, query: str) -> CreateResponse:
         """Get AI-generated starter code for a codemod."""
-        session = CodegenSession()
-        return self._make_request(
-            "GET",
-            CREATE_ENDPOINT,
-            CreateInput(input=CreateInput.BaseCreateInput(name=name, query=query, repo_full_name=session.repo_name)),
-            CreateResponse,
-        )
+        return self._send(self._create_request(name, query))
 
     def identify(self) -> IdentifyResponse | None:
         """Identify the user's codemod."""
-        return self._make_request(
-            "POST",
-            IDENTIFY_ENDPOINT,
-            None,
-            IdentifyResponse,
-        )
+        return self._send(self._identify_request())
 
     def deploy(
         self, codemod_name: str, codemod_source: str, lint_mode: bool = False, lint_user_whitelist: list[str] | None = None, message: str | None = None, arguments_schema: dict | None = None
     ) -> DeployResponse:
         """Deploy a codemod to the Modal backend."""
-        session = CodegenSession()
-        return self._make_request(
-            "POST",
-            DEPLOY_ENDPOINT,
-            DeployInput(
-                input=DeployInput.BaseDeployInput(
-                    codemod_name=codemod_name,
-                    codemod_source=codemod_source,
-                    repo_full_name=session.repo_name,
-                    lint_mode=lint_mode,
-                    lint_user_whitelist=lint_user_whitelist or [],
-                    message=message,
-                    arguments_schema=arguments_schema,
-                )
-            ),
-            DeployResponse,
-        )
+        return self._send(self._deploy_request(codemod_name, codemod_source, lint_mode, lint_user_whitelist, message, arguments_schema))
 
     def lookup(self, codemod_name: str) -> LookupOutput:
         """Look up a codemod by name."""
-        session = CodegenSession()
-        return self._make_request(
-            "GET",
-            LOOKUP_ENDPOINT,
-            LookupInput(input=LookupInput.BaseLookupInput(codemod_name=codemod_name, repo_full_name=session.repo_name)),
-            LookupOutput,
-        )
+        return self._send(self._lookup_request(codemod_name))
 
     def run_on_pr(self, codemod_name: str, repo_full_name: str, github_pr_number: int, language: str | None = None) -> RunOnPRResponse:
         """Test a webhook against a specific PR."""
-        return self._make_request(
-            "POST",
-            RUN_ON_PR_ENDPOINT,
-            RunOnPRInput(
-                input=RunOnPRInput.BaseRunOnPRInput(
-                    codemod_name=codemod_name,
-                    repo_full_name=repo_full_name,
-                    github_pr_number=github_pr_number,
-                    language=language,
-                )
-            ),
-            RunOnPRResponse,
-        )
+        return self._send(self._run_on_pr_request(codemod_name, repo_full_name, github_pr_number, language))
 
     def lookup_pr(self, repo_full_name: str, github_pr_number: int) -> PRSchema:
         """Look up a PR by repository and PR number."""
-        return self._make_request(
-            "GET",
-            PR_LOOKUP_ENDPOINT,
-            PRLookupInput(input=PRLookupInput.BasePRLookupInput(repo_full_name=repo_full_name, github_pr_number=github_pr_number)),
-            PRLookupResponse,
-        )
+        return self._send(self._lookup_pr_request(repo_full_name, github_pr_number))
@@ -0,0 +1,94 @@
+"""Validation of API responses straight from the response body.
+
+JSON responses are validated from the raw bytes by pydantic's JSON parser, so no intermediate dict of
+the whole payload is built. Top-level string fields listed in a model's `lazy_fields` are cut out of
+the body before parsing and left as slices of it, decoded only when read: a response carrying a large
+diff costs about one copy of the body until the diff is actually used.
+"""
+
+import functools
+from typing import TypeVar
+
+from pydantic import TypeAdapter
+
+from codegen.cli.api.wire import decode, is_msgpack
+from codegen.cli.utils.schema import LazyFieldsModel, LazyString
+
+OutputT = TypeVar("OutputT")
+
+BACKSLASH = ord("\\")
+
+
+@functools.cache
+def type_adapter(output_model: type[OutputT]) -> TypeAdapter[OutputT]:
+    """Validators are built once per model and reused for every response."""
+    return TypeAdapter(output_model)
+
+
+def _string_end(content: bytes | bytearray, start: int) -> int:
+    """Index of the quote closing the JSON string whose contents begin at `start`."""
+    pos = start
+    while (pos := content.find(b'"', pos)) != -1:
+        backslashes = 0
+        while content[pos - 1 - backslashes] == BACKSLASH:
+            backslashes += 1
+        if backslashes % 2 == 0:
+            return pos
+        pos += 1
+    raise ValueError("Unterminated string in response")
+
+
+def find_string_value(content: bytes | bytearray, key: str) -> tuple[int, int] | None:
+    """Span of the string literal (quotes included) stored under `key`, or None if it isn't a string.
+
+    Quotes inside JSON strings are always escaped, so `"key":` can only match an actual key.
+    """
+    marker = f'"{key}"'.encode()
+    pos = content.find(marker)
+    if pos == -1:
+        return None
+    pos += len(marker)
+    length = len(content)
+    while pos < length and content[pos] in b" \t\r\n":
+        pos += 1
+    if pos >= length or content[pos] != ord(":"):
+        return None
+    pos += 1
+    while pos < length and content[pos] in b" \t\r\n":
+        pos += 1
+    if pos >= length or content[pos] != ord('"'):
+        return None
+    return pos, _string_end(content, pos + 1) + 1
+
+
+def _validate_lazy(output_model: type[LazyFieldsModel], content: bytes | bytearray) -> LazyFieldsModel:
+    spans = sorted((span, name) for name in output_model.lazy_fields if (span := find_string_value(content, name)))
+    if not spans:
+        return type_adapter(output_model).validate_json(content)
+
+    # Parse the body with the lazy values blanked out; only the small remainder is copied
+    parts, pos = [], 0
+    for (start, end), _ in spans:
+        parts += [content[pos:start], b'""']
+        pos = end
+    parts.append(content[pos:])
+    result = type_adapter(output_model).validate_json(b"".join(parts))
+
+    view = memoryview(content)
+    for (start, end), name in spans:
+        result.__dict__[name] = LazyString(view[start:end])
+    return result
+
+
+def validate_response(output_model: type[OutputT], content: bytes | bytearray, content_type: str | None = None) -> OutputT:
+    """Validate a (decompressed) response body into `output_model`.
+
+    Raises:
+        ValueError: If the body isn't valid for the model
+
+    """
+    if is_msgpack(content_type):
+        return type_adapter(output_model).validate_python(decode(content, content_type))
+    if isinstance(output_model, type) and issubclass(output_model, LazyFieldsModel) and output_model.lazy_fields:
+        return _validate_lazy(output_model, content)
+    return type_adapter(output_model).validate_json(content)
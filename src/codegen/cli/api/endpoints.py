@@ -1,11 +1,31 @@
-from codegen.cli.api.modal import MODAL_PREFIX
-
-RUN_ENDPOINT = f"https://{MODAL_PREFIX}--cli-run.modal.run"
-DOCS_ENDPOINT = f"https://{MODAL_PREFIX}--cli-docs.modal.run"
-EXPERT_ENDPOINT = f"https://{MODAL_PREFIX}--cli-ask-expert.modal.run"
-IDENTIFY_ENDPOINT = f"https://{MODAL_PREFIX}--cli-identify.modal.run"
-CREATE_ENDPOINT = f"https://{MODAL_PREFIX}--cli-create.modal.run"
-DEPLOY_ENDPOINT = f"https://{MODAL_PREFIX}--cli-deploy.modal.run"
-LOOKUP_ENDPOINT = f"https://{MODAL_PREFIX}--cli-lookup.modal.run"
-RUN_ON_PR_ENDPOINT = f"https://{MODAL_PREFIX}--cli-run-on-pull-request.modal.run"
-PR_LOOKUP_ENDPOINT = f"https://{MODAL_PREFIX}--cli-pr-lookup.modal.run"
+from codegen.cli.api import modal
+
+# Modal function behind each endpoint. The URLs depend on the environment, so they are built on first use.
+_FUNCTIONS = {
+    "RUN_ENDPOINT": "cli-run",
+    "DOCS_ENDPOINT": "cli-docs",
+    "EXPERT_ENDPOINT": "cli-ask-expert",
+    "IDENTIFY_ENDPOINT": "cli-identify",
+    "CREATE_ENDPOINT": "cli-create",
+    "DEPLOY_ENDPOINT": "cli-deploy",
+    "LOOKUP_ENDPOINT": "cli-lookup",
+    "RUN_ON_PR_ENDPOINT": "cli-run-on-pull-request",
+    "PR_LOOKUP_ENDPOINT": "cli-pr-lookup",
+}
+
+RUN_ENDPOINT: str
+DOCS_ENDPOINT: str
+EXPERT_ENDPOINT: str
+IDENTIFY_ENDPOINT: str
+CREATE_ENDPOINT: str
+DEPLOY_ENDPOINT: str
+LOOKUP_ENDPOINT: str
+RUN_ON_PR_ENDPOINT: str
+PR_LOOKUP_ENDPOINT: str
+
+
+def __getattr__(name: str) -> str:
+    if name in _FUNCTIONS:
+        globals()[name] = f"https://{modal.MODAL_PREFIX}--{_FUNCTIONS[name]}.modal.run"
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -21,4 +21,9 @@ def get_modal_prefix():
     return workspace
 
 
-MODAL_PREFIX = get_modal_prefix()
+def __getattr__(name: str) -> str:
+    # MODAL_PREFIX is resolved on first use rather than at import, so importing the API modules doesn't read the environment
+    if name == "MODAL_PREFIX":
+        globals()[name] = get_modal_prefix()
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
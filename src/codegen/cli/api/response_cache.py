@@ -0,0 +1,148 @@
+"""Local cache for responses of the read-only API endpoints.
+
+Responses are cached per endpoint, request body and token, so users never see each other's entries.
+A fresh entry (younger than its endpoint's TTL) is returned without a request; a stale one is
+revalidated with If-None-Match when the server gave it an ETag, so an unchanged response costs a 304
+instead of the full body. Calls that change what a cached endpoint returns (e.g. deploying a function
+changes its lookup) drop that endpoint's entries.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from codegen.cli.api import endpoints
+from codegen.cli.auth.constants import RESPONSE_CACHE_DIR
+from codegen.cli.env.global_env import global_env
+
+# Seconds a cached response is used without asking the server, by endpoint name in `endpoints`. Endpoints
+# not listed here are never cached. /identify isn't listed: the session stores its response next to the token.
+# Names rather than URLs, so importing this module doesn't resolve the endpoint URLs.
+DEFAULT_TTLS: dict[str, float] = {
+    "LOOKUP_ENDPOINT": 5 * 60,
+    "PR_LOOKUP_ENDPOINT": 60,
+    "DOCS_ENDPOINT": 24 * 60 * 60,
+}
+
+# Successful calls to these endpoints change what the listed cached endpoints return (by name too)
+INVALIDATES: dict[str, tuple[str, ...]] = {
+    "DEPLOY_ENDPOINT": ("LOOKUP_ENDPOINT",),
+}
+
+
+def _resolve(names: dict) -> dict:
+    return {getattr(endpoints, name): value for name, value in names.items()}
+
+
+def _digest(*parts: str) -> str:
+    return hashlib.sha256("\0".join(parts).encode()).hexdigest()
+
+
+@dataclass
+class CachedResponse:
+    content: bytes
+    content_type: str | None
+    etag: str | None
+    stored_at: float
+
+    def age(self) -> float:
+        return time.time() - self.stored_at
+
+
+class ResponseCache:
+    """Response cache on disk, one file per entry. Safe to share between threads and processes."""
+
+    def __init__(self, directory: Path, ttls: dict[str, float] | None = None, enabled: bool = True):
+        self.directory = directory
+        # By endpoint URL. Defaults to DEFAULT_TTLS, resolved on first use.
+        self._ttls = ttls
+        self.enabled = enabled
+
+    @property
+    def ttls(self) -> dict[str, float]:
+        if self._ttls is None:
+            self._ttls = _resolve(DEFAULT_TTLS)
+        return self._ttls
+
+    def ttl(self, endpoint: str) -> float | None:
+        """How long responses of `endpoint` stay fresh, or None if they aren't cached."""
+        return self.ttls.get(endpoint)
+
+    def key(self, method: str, endpoint: str, payload: dict | None, auth_token: str | None) -> str | None:
+        """Cache key for a request, or None if its responses aren't cached."""
+        if not self.enabled or self.ttl(endpoint) is None:
+            return None
+        # The token is hashed into the key, never stored
+        return _digest(method.upper(), endpoint, json.dumps(payload, sort_keys=True), _digest(auth_token or ""))
+
+    def _path(self, endpoint: str, key: str) -> Path:
+        # One directory per endpoint, so an endpoint's entries can be dropped together
+        return self.directory / _digest(endpoint)[:16] / key
+
+    def get(self, endpoint: str, key: str) -> CachedResponse | None:
+        try:
+            with open(self._path(endpoint, key), "rb") as f:
+                metadata = json.loads(f.readline())
+                return CachedResponse(f.read(), metadata["content_type"], metadata["etag"], metadata["stored_at"])
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def is_fresh(self, endpoint: str, entry: CachedResponse) -> bool:
+        ttl = self.ttl(endpoint)
+        return ttl is not None and 0 <= entry.age() < ttl
+
+    def store(self, endpoint: str, key: str, content: bytes | bytearray, content_type: str | None, etag: str | None) -> None:
+        """Write an entry, replacing any previous one atomically. Failures to write are ignored."""
+        path = self._path(endpoint, key)
+        metadata = {"content_type": content_type, "etag": etag, "stored_at": time.time()}
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                f.write(json.dumps(metadata).encode() + b"\n")
+                f.write(content)
+            os.replace(tmp_path, path)
+        except OSError:
+            tmp_path.unlink(missing_ok=True)
+
+    def invalidate(self, endpoint: str) -> None:
+        """Drop every cached response of `endpoint`."""
+        shutil.rmtree(self.directory / _digest(endpoint)[:16], ignore_errors=True)
+
+    def invalidate_after(self, endpoint: str) -> None:
+        """Drop the entries a successful call to `endpoint` may have made stale."""
+        for stale in _resolve(INVALIDATES).get(endpoint, ()):
+            self.invalidate(getattr(endpoints, stale))
+
+    def clear(self) -> None:
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+_default_cache: ResponseCache | None = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_response_cache() -> ResponseCache:
+    """The cache shared by API clients that aren't given one. Disabled by setting CODEGEN_NO_CACHE."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ResponseCache(RESPONSE_CACHE_DIR, enabled=not global_env.CODEGEN_NO_CACHE)
+        return _default_cache
+
+
+def disable_response_cache() -> None:
+    """Bypass the shared cache for the rest of the process (the `--no-cache` flag)."""
+    get_default_response_cache().enabled = False
+
+
+def reset_default_response_cache() -> None:
+    """Forget the shared cache, so the next use re-reads its settings (e.g. between commands run by the daemon)."""
+    global _default_cache
+    with _default_cache_lock:
+        _default_cache = None
@@ -0,0 +1,197 @@
+"""Local cache of codemod run results.
+
+A diff run's result depends only on the codemod's source and the repository it runs on, so results
+are cached under a key made of a hash of the source, `repo_full_name`, the HEAD commit, a fingerprint
+of the working tree, the run type and the template context (plus, for local runs, the language and
+arguments). Re-running an unchanged codemod on an unchanged repository returns the stored
+`RunCodemodOutput` without running it again. Only successful diff runs are cached: PR runs open a pull
+request, so they always run. Each entry is one file; reading it marks it as used, and the least
+recently used entries are evicted once the cache grows past its size cap.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from codegen.cli.auth.constants import CACHE_DIR, RUN_CACHE_DIR
+from codegen.cli.env.global_env import global_env
+from codegen.cli.utils.cache_dir import cache_size_cap
+
+# pygit2 and pydantic are imported when the cache is first used, so commands that only clear it (logout) stay fast to import
+if TYPE_CHECKING:
+    from pygit2.repository import Repository
+
+    from codegen.cli.api.schemas import CodemodRunType, RunCodemodOutput
+
+DEFAULT_MAX_BYTES = 256 * 2**20
+
+# Run types whose results are cached (values of CodemodRunType)
+CACHED_RUN_TYPES = {"diff"}
+
+
+class RunCache:
+    """Run results on disk, one file per entry. Safe to share between threads and processes."""
+
+    def __init__(self, directory: Path, max_bytes: int = DEFAULT_MAX_BYTES, enabled: bool = True):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+
+    def key(
+        self,
+        repo: "Repository | None",
+        source: str,
+        repo_full_name: str | None,
+        run_type: "CodemodRunType | str" = "diff",
+        template_context: dict[str, str] | None = None,
+        **extra,
+    ) -> str | None:
+        """Cache key of a run on the current state of `repo`, or None if the run's result isn't cached.
+
+        Args:
+            repo: Repository the run refers to
+            source: Source of the codemod
+            repo_full_name: Name of the repository on the server
+            run_type: Type of run (diff or pr)
+            template_context: Context variables passed to the codemod
+            **extra: Anything else the result depends on (e.g. local runs' language and arguments)
+
+        """
+        if not self.enabled or repo is None or run_type not in CACHED_RUN_TYPES:
+            return None
+        from codegen.cli.git.files import head_commit, working_tree_state
+
+        fingerprint, _ = working_tree_state(repo, exclude=CACHE_DIR.as_posix())
+        parts = {
+            "source": hashlib.sha256(source.encode()).hexdigest(),
+            "repo_full_name": repo_full_name,
+            "head": head_commit(repo),
+            "working_tree": fingerprint,
+            "run_type": getattr(run_type, "value", run_type),
+            "template_context": template_context or {},
+            **extra,
+        }
+        return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / key
+
+    def get(self, key: str) -> "RunCodemodOutput | None":
+        from codegen.cli.api.schemas import RunCodemodOutput
+
+        path = self._path(key)
+        try:
+            output = RunCodemodOutput.model_validate_json(path.read_bytes())
+            # Mark it as recently used
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return output
+
+    def store(self, key: str, output: "RunCodemodOutput") -> None:
+        """Write an entry, replacing any previous one atomically, then evict entries past the size cap. Failures to write are ignored."""
+        path = self._path(key)
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path.write_text(output.model_dump_json())
+            os.replace(tmp_path, path)
+        except OSError:
+            tmp_path.unlink(missing_ok=True)
+            return
+        self.evict()
+
+    def _lookup(self, key: str | None) -> "RunCodemodOutput | None":
+        return self.get(key) if key is not None else None
+
+    def _record(self, key: str | None, output: "RunCodemodOutput") -> None:
+        if key is not None and output.success:
+            self.store(key, output)
+
+    def get_or_run(self, key: str | None, run: Callable[[], "RunCodemodOutput"]) -> "RunCodemodOutput":
+        """The cached result for `key`, or the result of calling `run`, cached if it succeeded."""
+        if (cached := self._lookup(key)) is not None:
+            return cached
+        output = run()
+        self._record(key, output)
+        return output
+
+    async def get_or_run_async(self, key: Callable[[], str | None], run: Callable[[], Awaitable["RunCodemodOutput"]]) -> "RunCodemodOutput":
+        """get_or_run for coroutines. The key is computed, and the cache read and written, in a worker thread rather than on the event loop."""
+        import asyncio
+
+        def lookup() -> tuple[str | None, "RunCodemodOutput | None"]:
+            resolved = key()
+            return resolved, self._lookup(resolved)
+
+        resolved, cached = await asyncio.to_thread(lookup)
+        if cached is not None:
+            return cached
+        output = await run()
+        await asyncio.to_thread(self._record, resolved, output)
+        return output
+
+    def _entries(self) -> list[tuple[Path, os.stat_result]]:
+        entries = []
+        for path in self.directory.glob("*/*"):
+            if path.suffix != ".tmp":
+                try:
+                    entries.append((path, path.stat()))
+                except OSError:
+                    pass
+        return entries
+
+    def stats(self) -> tuple[int, int]:
+        """Number of entries and their total size in bytes."""
+        entries = self._entries()
+        return len(entries), sum(stat.st_size for _, stat in entries)
+
+    def evict(self) -> int:
+        """Remove least recently used entries until the cache fits in `max_bytes`. Returns how many were removed."""
+        entries = sorted(self._entries(), key=lambda entry: entry[1].st_mtime)
+        total = sum(stat.st_size for _, stat in entries)
+        removed = 0
+        for path, stat in entries:
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= stat.st_size
+            removed += 1
+        return removed
+
+    def clear(self) -> None:
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+_default_cache: RunCache | None = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_run_cache() -> RunCache:
+    """The run cache shared by API clients and local runs. Disabled by setting CODEGEN_NO_CACHE.
+
+    The size cap defaults to 256 MiB and can be set in MiB with CODEGEN_RUN_CACHE_MAX_MB.
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            max_bytes = cache_size_cap(global_env.CODEGEN_RUN_CACHE_MAX_MB, DEFAULT_MAX_BYTES)
+            _default_cache = RunCache(RUN_CACHE_DIR, max_bytes, enabled=not global_env.CODEGEN_NO_CACHE)
+        return _default_cache
+
+
+def disable_run_cache() -> None:
+    """Bypass the shared run cache for the rest of the process (the `--no-cache` flags)."""
+    get_default_run_cache().enabled = False
+
+
+def reset_default_run_cache() -> None:
+    """Forget the shared run cache, so the next use re-reads its settings (e.g. between commands run by the daemon)."""
+    global _default_cache
+    with _default_cache_lock:
+        _default_cache = None
@@ -4,7 +4,7 @@ from typing import TypeVar
 from pydantic import BaseModel, Field
 
 from codegen.cli.utils.constants import ProgrammingLanguage
-from codegen.cli.utils.schema import SafeBaseModel
+from codegen.cli.utils.schema import LazyFieldsModel, SafeBaseModel
 
 T = TypeVar("T")
 
@@ -33,7 +33,10 @@ class RunCodemodInput(SafeBaseModel):
     input: BaseRunCodemodInput
 
 
-class RunCodemodOutput(SafeBaseModel):
+class RunCodemodOutput(LazyFieldsModel):
+    # Diffs and logs can be tens of megabytes, so they're only decoded when read
+    lazy_fields = ("logs", "observation")
+
     success: bool = False
     web_link: str | None = None
     logs: str | None = None
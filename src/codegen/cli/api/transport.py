@@ -0,0 +1,197 @@
+import email.utils
+import random
+import threading
+import time
+from dataclasses import dataclass
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+# Methods that can be repeated without changing the result on the server
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+# Chunk size for reading streamed response bodies. urllib3 decompresses a whole read at once, so larger chunks
+# of a compressed body can briefly buffer most of it a second time.
+READ_CHUNK_SIZE = 64 * 1024
+
+# Statuses worth retrying: rate limiting, and gateway errors (e.g. a Modal endpoint cold start)
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+@dataclass
+class TransportConfig:
+    """Timeouts, pooling, retry and rate limiting settings for API requests."""
+
+    connect_timeout: float = 10.0
+    # Time allowed between bytes from the server. Runs can be slow to respond, so this is generous.
+    read_timeout: float = 300.0
+    pool_connections: int = 10
+    pool_maxsize: int = 32
+    max_retries: int = 3
+    backoff_base: float = 0.5
+    backoff_max: float = 30.0
+    # Longest Retry-After the client will wait for. Longer waits fail the request instead.
+    max_retry_after: float = 120.0
+    # Client-side rate limit in requests per second (None disables it), with bursts up to `burst` requests
+    rate_limit: float | None = None
+    burst: int = 10
+
+
+class TokenBucket:
+    """Thread-safe token bucket: allows `rate` requests per second on average, in bursts of up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> float:
+        """Take a token if one is available. Returns 0 on success, otherwise how long to wait before trying again."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self) -> None:
+        """Take a token, blocking until one is available."""
+        while wait := self.try_acquire():
+            time.sleep(wait)
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Parse a Retry-After header, given either in seconds or as an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _never_sent(error: requests.RequestException) -> bool:
+    """Whether the request failed before reaching the server, so it is safe to retry any method."""
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], "reason", None) if error.args else None
+    return isinstance(reason, NewConnectionError)
+
+
+def read_body(response: requests.Response) -> bytearray:
+    """Read a streamed response body (decompressed) into one growing buffer.
+
+    `response.content` joins a list of chunks, briefly holding the body twice; this holds it once.
+    """
+    body = bytearray()
+    for chunk in response.iter_content(READ_CHUNK_SIZE):
+        body += chunk
+    return body
+
+
+class RetryPolicy:
+    """Retry decisions shared by the sync and async transports."""
+
+    config: TransportConfig
+
+    def _backoff(self, attempt: int) -> float:
+        # Full jitter, so concurrent clients don't retry in lockstep
+        return random.uniform(0, min(self.config.backoff_max, self.config.backoff_base * 2**attempt))
+
+    def _retry_delay(self, attempt: int, status_code: int, retry_after: str | None, idempotent: bool) -> float | None:
+        """How long to wait before retrying a response, or None if it should be returned as is."""
+        if attempt >= self.config.max_retries or status_code not in RETRY_STATUSES:
+            return None
+        if not idempotent and status_code != 429:
+            return None
+        delay = parse_retry_after(retry_after)
+        if delay is None:
+            return self._backoff(attempt)
+        return delay if delay <= self.config.max_retry_after else None
+
+
+class HTTPTransport(RetryPolicy):
+    """Pooled HTTP transport with timeouts, jittered exponential retries and client-side rate limiting.
+
+    Idempotent requests are retried on connection errors, timeouts and retryable statuses. Other requests
+    are only retried when they can't have been processed: the connection failed, or the server answered
+    429. Instances are safe to share between threads; the connection pool is shared, but each thread
+    gets its own session.
+    """
+
+    def __init__(self, config: TransportConfig | None = None):
+        self.config = config or TransportConfig()
+        self._adapter = HTTPAdapter(pool_connections=self.config.pool_connections, pool_maxsize=self.config.pool_maxsize, max_retries=0)
+        self._limiter = TokenBucket(self.config.rate_limit, self.config.burst) if self.config.rate_limit else None
+        self._local = threading.local()
+
+    @property
+    def session(self) -> requests.Session:
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.mount("https://", self._adapter)
+            session.mount("http://", self._adapter)
+            self._local.session = session
+        return session
+
+    def request(self, method: str, url: str, idempotent: bool | None = None, **kwargs) -> requests.Response:
+        """Send a request, retrying transient failures.
+
+        Args:
+            method: HTTP method
+            url: URL to request
+            idempotent: Whether the request can safely be repeated. Defaults to True for idempotent HTTP methods.
+            **kwargs: Passed to `requests.Session.request`
+
+        Returns:
+            The last response received, which may still be an error response once retries are exhausted
+
+        Raises:
+            requests.RequestException: If the request could not be completed
+
+        """
+        if idempotent is None:
+            idempotent = method.upper() in IDEMPOTENT_METHODS
+        kwargs.setdefault("timeout", (self.config.connect_timeout, self.config.read_timeout))
+
+        attempt = 0
+        while True:
+            if self._limiter:
+                self._limiter.acquire()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt >= self.config.max_retries or not (idempotent or _never_sent(e)):
+                    raise
+                delay = self._backoff(attempt)
+            else:
+                delay = self._retry_delay(attempt, response.status_code, response.headers.get("Retry-After"), idempotent)
+                if delay is None:
+                    return response
+                response.close()
+
+            attempt += 1
+            time.sleep(delay)
+
+
+_default_transport: HTTPTransport | None = None
+_default_transport_lock = threading.Lock()
+
+
+def get_default_transport() -> HTTPTransport:
+    """The transport shared by API clients that aren't given one, so they reuse connections."""
+    global _default_transport
+    with _default_transport_lock:
+        if _default_transport is None:
+            _default_transport = HTTPTransport()
+        return _default_transport
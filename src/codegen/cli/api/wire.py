@@ -0,0 +1,139 @@
+"""Content negotiation for API request and response bodies.
+
+Responses are requested compressed (zstd when the `zstandard` package is installed, gzip otherwise) and
+in msgpack when the `msgpack` package is installed; the HTTP libraries decompress them and `decode`
+reads whichever format the server picked. Request bodies are only sent in something other than plain
+JSON once the server has said it reads it: large bodies are compressed once a response from the
+endpoint lists the encoding in its `Accept-Encoding` header (RFC 7694), and sent in msgpack once the
+endpoint has answered in msgpack. A server that still rejects a compressed or binary request body as an
+unsupported media type (415) is sent plain JSON from then on. Other client errors, such as a 400 or 422
+validation error, are about the request's content and are never resent.
+"""
+
+import gzip
+import json
+import threading
+from collections.abc import Mapping
+from dataclasses import dataclass
+from typing import Any
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+JSON_CONTENT_TYPE = "application/json"
+MSGPACK_CONTENT_TYPE = "application/msgpack"
+
+# Request bodies smaller than this aren't worth compressing
+COMPRESS_MIN_SIZE = 1024
+
+# Status a server answers with when it can't read a compressed or binary request body (RFC 7694)
+UNSUPPORTED_BODY_STATUSES = {415}
+
+
+def accept_encoding() -> str:
+    return "zstd, gzip" if zstandard else "gzip"
+
+
+def accept() -> str:
+    return f"{MSGPACK_CONTENT_TYPE}, {JSON_CONTENT_TYPE};q=0.9" if msgpack else JSON_CONTENT_TYPE
+
+
+def request_encoding(accepted: str) -> str | None:
+    """The best request body encoding this client can produce out of a server's `Accept-Encoding` header value."""
+    tokens = {token.split(";")[0].strip().lower() for token in accepted.split(",")}
+    if zstandard and "zstd" in tokens:
+        return "zstd"
+    return "gzip" if "gzip" in tokens else None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor().compress(body)
+    return gzip.compress(body, compresslevel=6)
+
+
+def is_msgpack(content_type: str | None) -> bool:
+    return bool(msgpack and content_type and content_type.split(";")[0].strip() == MSGPACK_CONTENT_TYPE)
+
+
+def decode(content: bytes, content_type: str | None) -> Any:
+    """Decode a (decompressed) response body according to its content type."""
+    if is_msgpack(content_type):
+        return msgpack.unpackb(content)
+    return json.loads(content)
+
+
+@dataclass
+class EncodedBody:
+    content: bytes
+    headers: dict[str, str]
+    # Whether the body uses anything beyond plain JSON, so it can be resent as plain JSON if the server rejects it
+    negotiated: bool
+
+
+class WireNegotiator:
+    """Remembers, per endpoint, which request encodings the server accepts. Safe to share between threads."""
+
+    def __init__(self, compress_min_size: int = COMPRESS_MIN_SIZE):
+        self.compress_min_size = compress_min_size
+        self._plain: set[str] = set()
+        self._msgpack: set[str] = set()
+        self._encodings: dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def encode(self, endpoint: str, payload: Any) -> EncodedBody:
+        """Encode a request payload in the best format known to work for `endpoint`."""
+        headers = {"Accept": accept(), "Accept-Encoding": accept_encoding()}
+        if payload is None:
+            return EncodedBody(b"", headers, negotiated=False)
+
+        with self._lock:
+            plain = endpoint in self._plain
+            use_msgpack = not plain and endpoint in self._msgpack
+            encoding = None if plain else self._encodings.get(endpoint)
+        if use_msgpack:
+            content, headers["Content-Type"] = msgpack.packb(payload), MSGPACK_CONTENT_TYPE
+        else:
+            content, headers["Content-Type"] = json.dumps(payload).encode(), JSON_CONTENT_TYPE
+
+        negotiated = use_msgpack
+        if encoding and len(content) >= self.compress_min_size:
+            content, headers["Content-Encoding"] = compress(content, encoding), encoding
+            negotiated = True
+        return EncodedBody(content, headers, negotiated)
+
+    def should_fall_back(self, endpoint: str, body: EncodedBody, status_code: int) -> bool:
+        """Record a rejected negotiated body. Returns True if the request should be resent as plain JSON."""
+        if not body.negotiated or status_code not in UNSUPPORTED_BODY_STATUSES:
+            return False
+        with self._lock:
+            self._plain.add(endpoint)
+        return True
+
+    def record_response(self, endpoint: str, headers: Mapping[str, str]) -> None:
+        """Learn which request encodings the server reads from a response's headers.
+
+        A msgpack response means the server speaks msgpack, and an `Accept-Encoding` header lists the
+        encodings it decompresses, so later requests to it can use them too.
+        """
+        with self._lock:
+            if is_msgpack(headers.get("Content-Type")):
+                self._msgpack.add(endpoint)
+            accepted = headers.get("Accept-Encoding")
+            if accepted is None:
+                return
+            if encoding := request_encoding(accepted):
+                self._encodings[endpoint] = encoding
+            else:
+                self._encodings.pop(endpoint, None)
+
+
+# Shared by API clients that aren't given a negotiator, so what's learned about a server is reused
+default_negotiator = WireNegotiator()
@@ -8,6 +8,19 @@ PROMPTS_DIR = CODEGEN_DIR / "prompts"
 # Subdirectories
 DOCS_DIR = CODEGEN_DIR / "docs"
 EXAMPLES_DIR = CODEGEN_DIR / "examples"
+CACHE_DIR = CODEGEN_DIR / "cache"
+SCHEMA_CACHE_DIR = CACHE_DIR / "schemas"
+CODEBASE_CACHE_DIR = CACHE_DIR / "codebases"
 
 # Files
 AUTH_FILE = CONFIG_DIR / "auth.json"
+INDEX_FILE = CACHE_DIR / "discovery-index.json"
+DEPLOY_MANIFEST_FILE = CACHE_DIR / "deploy-manifest.json"
+UNTRACKED_FILES_CACHE_FILE = CACHE_DIR / "untracked-files.json"
+
+# User-level cache, shared by every repository
+USER_CACHE_DIR = Path("~/.cache/codegen-sh").expanduser()
+RESPONSE_CACHE_DIR = USER_CACHE_DIR / "responses"
+RUN_CACHE_DIR = USER_CACHE_DIR / "runs"
+DAEMON_SOCKET = USER_CACHE_DIR / "daemon.sock"
+DAEMON_LOG_FILE = USER_CACHE_DIR / "daemon.log"
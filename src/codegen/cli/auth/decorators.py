@@ -9,12 +9,23 @@ from codegen.cli.auth.session import CodegenSession
 from codegen.cli.errors import AuthError, InvalidTokenError, NoTokenError
 
 
-def requires_auth(f: Callable) -> Callable:
-    """Decorator that ensures a user is authenticated and injects a CodegenSession."""
+def requires_auth(f: Callable | None = None, *, unless: str | None = None) -> Callable:
+    """Decorator that ensures a user is authenticated and injects a CodegenSession.
+
+    Args:
+        f: The command to wrap
+        unless: Name of a flag of the command that skips authentication when set, for modes that never
+            talk to the API (e.g. `run --local`). The current session is injected as is.
+
+    """
+    if f is None:
+        return functools.partial(requires_auth, unless=unless)
 
     @functools.wraps(f)
     def wrapper(*args, **kwargs):
-        session = CodegenSession()
+        session = CodegenSession.current()
+        if unless is not None and kwargs.get(unless):
+            return f(*args, session=session, **kwargs)
 
         try:
             if not session.is_authenticated():
@@ -6,6 +6,7 @@ import rich_click as click
 from codegen.cli.api.webapp_routes import USER_SECRETS_ROUTE
 from codegen.cli.auth.session import CodegenSession
 from codegen.cli.auth.token_manager import TokenManager
+from codegen.cli.daemon import protocol
 from codegen.cli.env.global_env import global_env
 from codegen.cli.errors import AuthError
 
@@ -27,6 +28,10 @@ def login_routine(token: str | None = None) -> CodegenSession:
 
     _token = token or global_env.CODEGEN_USER_ACCESS_TOKEN
 
+    if not _token and protocol.IN_DAEMON:
+        # Commands run by the daemon have nobody to paste a token. A token piped to `codegen login` is still read.
+        raise click.ClickException("Not authenticated. Run 'codegen login' or set the CODEGEN_USER_ACCESS_TOKEN environment variable.")
+
     # If no token provided, guide user through browser flow
     if not _token:
         rich.print(f"Opening {USER_SECRETS_ROUTE} to get your authentication token...")
@@ -43,6 +48,7 @@ def login_routine(token: str | None = None) -> CodegenSession:
     try:
         session.assert_authenticated()
         token_manager.save_token(_token)
+        CodegenSession.set_current(session)
         rich.print(f"[green]✓ Stored token to:[/green] {token_manager.token_file}")
         return session
     except AuthError as e:
@@ -1,13 +1,102 @@
+import atexit
+import threading
+import time
 from dataclasses import dataclass
+from datetime import UTC, datetime
 from pathlib import Path
 
 from pygit2.repository import Repository
 
 from codegen.cli.auth.constants import CODEGEN_DIR
-from codegen.cli.auth.token_manager import get_current_token
+from codegen.cli.auth.token_manager import TokenManager, get_current_token
+from codegen.cli.env.global_env import global_env
 from codegen.cli.errors import AuthError, NoTokenError
 from codegen.cli.git.repo import get_git_repo
-from codegen.cli.utils.config import Config, get_config, write_config
+from codegen.cli.utils.config import CONFIG_PATH, Config, get_config, write_config
+from codegen.cli.utils.stamp import file_stamp
+
+# Seconds a stored identity is trusted without asking /identify again (overridden by CODEGEN_IDENTITY_TTL).
+# Past half of it, the identity is refreshed in the background.
+DEFAULT_IDENTITY_TTL = 15 * 60
+# Seconds a process waits at exit for a background refresh to finish, so short commands usually don't cut
+# it off. Kept short so a slow API never holds up exit; an unfinished refresh is retried by the next command.
+REFRESH_JOIN_TIMEOUT = 0.3
+
+_refresh_threads: list[threading.Thread] = []
+
+
+def _identity_ttl() -> float:
+    try:
+        return float(global_env.CODEGEN_IDENTITY_TTL)
+    except ValueError:
+        return DEFAULT_IDENTITY_TTL
+
+
+def _has_expired(expires_at: str) -> bool:
+    try:
+        expiry = datetime.fromisoformat(expires_at)
+    except (TypeError, ValueError):
+        return False
+    if expiry.tzinfo is None:
+        expiry = expiry.replace(tzinfo=UTC)
+    return expiry <= datetime.now(UTC)
+
+
+def _fetch_identity(token: str):
+    """Call /identify and store the response next to the token."""
+    from codegen.cli.api.client import RestAPI
+
+    identity = RestAPI(token).identify()
+    if identity:
+        TokenManager().save_identity(token, identity.model_dump(mode="json"))
+    return identity
+
+
+def _refresh_identity(token: str) -> None:
+    try:
+        _fetch_identity(token)
+    except Exception:
+        # The stored identity is still valid; the next command tries again
+        pass
+
+
+def _start_refresh(token: str) -> None:
+    """Refresh the stored identity in the background. The thread is a daemon; the process only briefly waits for it at exit."""
+    if not _refresh_threads:
+        atexit.register(_join_refreshes)
+    _refresh_threads[:] = [thread for thread in _refresh_threads if thread.is_alive()]
+    thread = threading.Thread(target=_refresh_identity, args=(token,), daemon=True)
+    thread.start()
+    _refresh_threads.append(thread)
+
+
+def _join_refreshes() -> None:
+    deadline = time.monotonic() + REFRESH_JOIN_TIMEOUT
+    for thread in _refresh_threads:
+        thread.join(max(0.0, deadline - time.monotonic()))
+
+
+def load_identity(token: str):
+    """The /identify response for `token`, reusing the stored one until its TTL or the token's expiry.
+
+    Returns:
+        The IdentifyResponse, or None if it couldn't be read
+
+    """
+    from codegen.cli.api.schemas import IdentifyResponse
+
+    stored = TokenManager().get_identity(token)
+    if stored is None:
+        return _fetch_identity(token)
+
+    data, fetched_at = stored
+    identity = IdentifyResponse.model_validate(data)
+    age, ttl = time.time() - fetched_at, _identity_ttl()
+    if identity is None or not 0 <= age < ttl or _has_expired(identity.auth_context.expires_at):
+        return _fetch_identity(token)
+    if age >= ttl / 2:
+        _start_refresh(token)
+    return identity
 
 
 @dataclass
@@ -35,25 +124,53 @@ class UserProfile:
 
 
 class CodegenSession:
-    """Represents an authenticated codegen session with user and repository context"""
+    """Represents an authenticated codegen session with user and repository context
+
+    Use `CodegenSession.current()` rather than constructing sessions: it is shared by everything in the
+    process, so the token is read, the config parsed and the repository opened once.
+    """
 
     # =====[ Instance attributes ]=====
     token: str | None = None
 
     # =====[ Lazy instance attributes ]=====
     _config: Config | None = None
+    _config_stamp: tuple[int, int] | None = None
+    _git_repo: Repository | None = None
     _identity: Identity | None = None
     _profile: UserProfile | None = None
 
+    # =====[ Process-wide session ]=====
+    _current: "CodegenSession | None" = None
+    _current_cwd: Path | None = None
+    _current_lock = threading.Lock()
+
     def __init__(self, token: str | None = None):
         self.token = token or get_current_token()
 
+    @classmethod
+    def current(cls) -> "CodegenSession":
+        """The session shared by this process, for the stored token and the current directory."""
+        cwd = Path.cwd()
+        with cls._current_lock:
+            if CodegenSession._current is None or CodegenSession._current_cwd != cwd:
+                CodegenSession._current, CodegenSession._current_cwd = cls(), cwd
+            return CodegenSession._current
+
+    @classmethod
+    def set_current(cls, session: "CodegenSession | None") -> None:
+        """Make `session` the process-wide session (e.g. after logging in), or drop it so the next one is created fresh."""
+        with cls._current_lock:
+            CodegenSession._current, CodegenSession._current_cwd = session, Path.cwd() if session else None
+
     @property
     def config(self) -> Config:
-        """Get the config for the current session"""
-        if self._config:
+        """Get the config for the current session, re-reading it only when config.toml changes on disk"""
+        stamp = file_stamp(self.codegen_dir / CONFIG_PATH)
+        if self._config is not None and stamp == self._config_stamp:
             return self._config
         self._config = get_config(self.codegen_dir)
+        self._config_stamp = stamp
         return self._config
 
     @property
@@ -64,9 +181,7 @@ class CodegenSession:
         if not self.token:
             raise NoTokenError("No authentication token found")
 
-        from codegen.cli.api.client import RestAPI
-
-        identity = RestAPI(self.token).identify()
+        identity = load_identity(self.token)
         if not identity:
             return None
 
@@ -99,10 +214,11 @@ class CodegenSession:
 
     @property
     def git_repo(self) -> Repository:
-        git_repo = get_git_repo(Path.cwd())
-        if not git_repo:
+        if self._git_repo is None:
+            self._git_repo = get_git_repo(Path.cwd())
+        if not self._git_repo:
             raise ValueError("No git repository found")
-        return git_repo
+        return self._git_repo
 
     @property
     def repo_name(self) -> str:
@@ -117,6 +233,19 @@ class CodegenSession:
     def __str__(self) -> str:
         return f"CodegenSession(user={self.profile.name}, repo={self.repo_name})"
 
+    def forget_identity(self) -> None:
+        """Drop the identity held in memory, so the next use re-reads the stored one (and checks its TTL)"""
+        self._identity = None
+        self._profile = None
+
+    @classmethod
+    def forget_current_identity(cls, token: str) -> None:
+        """Drop the identity the process-wide session holds in memory for `token`, e.g. after the server rejected the token"""
+        with cls._current_lock:
+            session = CodegenSession._current
+        if session is not None and session.token == token:
+            session.forget_identity()
+
     def is_authenticated(self) -> bool:
         """Check if the session is fully authenticated, including token expiration"""
         return bool(self.identity and self.identity.status == "active")
@@ -131,3 +260,4 @@ class CodegenSession:
     def write_config(self) -> None:
         """Write the config to the codegen-sh/config.toml file"""
         write_config(self.config, self.codegen_dir)
+        self._config_stamp = file_stamp(self.codegen_dir / CONFIG_PATH)
@@ -1,5 +1,7 @@
 import json
 import os
+import threading
+import time
 from pathlib import Path
 
 from codegen.cli.auth.constants import AUTH_FILE, CONFIG_DIR
@@ -19,14 +21,25 @@ class TokenManager:
         if not os.path.exists(self.config_dir):
             Path(self.config_dir).mkdir(parents=True, exist_ok=True)
 
+    def _write(self, data: dict) -> None:
+        # Written to a temporary file first, so a background identity refresh never leaves a partial file
+        tmp_file = Path(f"{self.token_file}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_file, "w") as f:
+            # Secure the file permissions (read/write for owner only)
+            os.chmod(tmp_file, 0o600)
+            json.dump(data, f)
+        os.replace(tmp_file, self.token_file)
+
+    def _read(self) -> dict | None:
+        if not os.access(self.config_dir, os.R_OK) or not os.path.exists(self.token_file):
+            return None
+        with open(self.token_file) as f:
+            return json.load(f)
+
     def save_token(self, token: str) -> None:
         """Save api token to disk."""
         try:
-            with open(self.token_file, "w") as f:
-                json.dump({"token": token}, f)
-
-            # Secure the file permissions (read/write for owner only)
-            os.chmod(self.token_file, 0o600)
+            self._write({"token": token})
         except Exception as e:
             print(f"Error saving token: {e!s}")
             raise
@@ -34,24 +47,48 @@ class TokenManager:
     def get_token(self) -> str | None:
         """Retrieve token from disk if it exists and is valid."""
         try:
-            if not os.access(self.config_dir, os.R_OK):
+            data = self._read()
+            if not data:
                 return None
-
-            if not os.path.exists(self.token_file):
+            token = data.get("token")
+            if not token:
                 return None
 
-            with open(self.token_file) as f:
-                data = json.load(f)
-                token = data.get("token")
-                if not token:
-                    return None
-
-                return token
+            return token
 
         except (KeyError, OSError) as e:
             print(e)
             return None
 
+    def save_identity(self, token: str, identity: dict) -> None:
+        """Store the /identify response for `token` next to it. Ignored unless `token` is the stored token."""
+        try:
+            data = self._read()
+            if not data or data.get("token") != token:
+                return
+            self._write({"token": token, "identity": identity, "identity_fetched_at": time.time()})
+        except (OSError, ValueError):
+            pass
+
+    def get_identity(self, token: str) -> tuple[dict, float] | None:
+        """The stored /identify response for `token` and when it was fetched, if there is one."""
+        try:
+            data = self._read()
+        except (OSError, ValueError):
+            return None
+        if not data or data.get("token") != token or "identity" not in data:
+            return None
+        return data["identity"], data.get("identity_fetched_at", 0.0)
+
+    def clear_identity(self, token: str | None = None) -> None:
+        """Forget the stored identity (only if it belongs to `token`, when given), keeping the token."""
+        try:
+            data = self._read()
+            if data and "identity" in data and (token is None or data.get("token") == token):
+                self._write({"token": data.get("token")})
+        except (OSError, ValueError):
+            pass
+
     def clear_token(self) -> None:
         """Remove stored token."""
         if os.path.exists(self.token_file):
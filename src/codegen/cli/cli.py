@@ -1,42 +1,55 @@
+import sys
+
 import rich_click as click
-from rich.traceback import install
-
-from codegen.cli.commands.create.main import create_command
-from codegen.cli.commands.deploy.main import deploy_command
-from codegen.cli.commands.docs_search.main import docs_search_command
-from codegen.cli.commands.expert.main import expert_command
-from codegen.cli.commands.init.main import init_command
-from codegen.cli.commands.list.main import list_command
-from codegen.cli.commands.login.main import login_command
-from codegen.cli.commands.logout.main import logout_command
-from codegen.cli.commands.profile.main import profile_command
-from codegen.cli.commands.run.main import run_command
-from codegen.cli.commands.run_on_pr.main import run_on_pr_command
-from codegen.cli.commands.style_debug.main import style_debug_command
+
+from codegen.cli.utils.lazy_group import LazyGroup
 
 click.rich_click.USE_RICH_MARKUP = True
-install(show_locals=True)
 
+# Command modules are only imported when their command runs, so e.g. `codegen --version` doesn't load the API client
+COMMANDS = {
+    "init": "codegen.cli.commands.init.main:init_command",
+    "logout": "codegen.cli.commands.logout.main:logout_command",
+    "login": "codegen.cli.commands.login.main:login_command",
+    "run": "codegen.cli.commands.run.main:run_command",
+    "docs-search": "codegen.cli.commands.docs_search.main:docs_search_command",
+    "profile": "codegen.cli.commands.profile.main:profile_command",
+    "create": "codegen.cli.commands.create.main:create_command",
+    "expert": "codegen.cli.commands.expert.main:expert_command",
+    "list": "codegen.cli.commands.list.main:list_command",
+    "deploy": "codegen.cli.commands.deploy.main:deploy_command",
+    "style-debug": "codegen.cli.commands.style_debug.main:style_debug_command",
+    "run-on-pr": "codegen.cli.commands.run_on_pr.main:run_on_pr_command",
+    "index": "codegen.cli.commands.index.main:index_command",
+    "daemon": "codegen.cli.commands.daemon.main:daemon_command",
+    "cache": "codegen.cli.commands.cache.main:cache_command",
+}
 
-@click.group()
-@click.version_option(prog_name="codegen", message="%(version)s")
-def main():
-    """Codegen CLI - Transform your code with AI."""
 
+def _rich_excepthook(*exc_info) -> None:
+    # rich.traceback is slow to import, so it's only installed once there is a traceback to show
+    from rich.traceback import install
+
+    install(show_locals=True)
+    sys.excepthook(*exc_info)
 
-# Wrap commands with error handler
-main.add_command(init_command)
-main.add_command(logout_command)
-main.add_command(login_command)
-main.add_command(run_command)
-main.add_command(docs_search_command)
-main.add_command(profile_command)
-main.add_command(create_command)
-main.add_command(expert_command)
-main.add_command(list_command)
-main.add_command(deploy_command)
-main.add_command(style_debug_command)
-main.add_command(run_on_pr_command)
+
+sys.excepthook = _rich_excepthook
+
+
+@click.group(cls=LazyGroup, lazy_commands=COMMANDS)
+@click.version_option(prog_name="codegen", message="%(version)s")
+@click.option("--no-cache", is_flag=True, help="Don't use or store cached API responses, run results and codebase snapshots (also set by CODEGEN_NO_CACHE)")
+def main(no_cache: bool):
+    """Codegen CLI - Transform your code with AI."""
+    if no_cache:
+        from codegen.cli.api.response_cache import disable_response_cache
+        from codegen.cli.api.run_cache import disable_run_cache
+        from codegen.cli.codemod.codebase_cache import disable_codebase_cache
+
+        disable_response_cache()
+        disable_run_cache()
+        disable_codebase_cache()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,313 @@
+"""Persistent cache of the working-tree snapshots that local runs parse, under `.codegen/cache/codebases`.
+
+A snapshot is a scratch git repository holding a copy of the files git knows about, committed as the
+base the codemod's diff is taken against. Snapshots are keyed by HEAD commit plus a fingerprint of
+the working tree (the status and content of every modified or untracked file). A run on an unchanged
+tree reuses its snapshot as is. Otherwise the most recently used snapshot (or a copy of it, when
+the cache has room for one) is brought up to date by copying only the files pygit2 reports as changed: those differing between the two HEAD commits, plus
+the files modified in either working tree. The changed paths are returned so the parsed codebase can
+be re-synced incrementally rather than re-parsed. Least recently used snapshots are evicted once the
+cache grows past its size cap, along with the codebase this process parsed from them.
+"""
+
+import json
+import os
+import shutil
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any
+
+import pygit2
+from pygit2.enums import CheckoutStrategy
+from pygit2.repository import Repository
+
+from codegen.cli.auth.constants import CACHE_DIR, CODEBASE_CACHE_DIR
+from codegen.cli.env.global_env import global_env
+from codegen.cli.git.files import head_commit, iter_repo_files, working_tree_state
+from codegen.cli.utils.cache_dir import cache_size_cap, make_cache_dir
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+DEFAULT_MAX_BYTES = 2 * 2**30
+MANIFEST_FILE = "manifest.json"
+LOCK_FILE = ".lock"
+# Branch the snapshot repositories commit to, matching graph-sitter's LocalRepoOperator default
+SNAPSHOT_BRANCH = "main"
+_SIGNATURE = pygit2.Signature("codegen", "codegen@localhost", 0, 0)
+
+# Codebases parsed from snapshots by this process, by snapshot directory: (language, base commit, codebase).
+# Filled by local runs; removing a snapshot from the cache drops its entry.
+parsed_codebases: dict[Path, tuple[str | None, str | None, Any]] = {}
+
+# Set by the global `--no-cache` flag
+_disabled = False
+
+
+@dataclass
+class SnapshotEntry:
+    """A cached snapshot: its HEAD commit, working-tree fingerprint, and the commit of its base in the snapshot repository."""
+
+    key: str
+    head: str | None
+    fingerprint: str
+    # Paths that were modified or untracked in the working tree when the snapshot was updated
+    dirty: list[str] = field(default_factory=list)
+    base_commit: str | None = None
+    files: int = 0
+    size: int = 0
+    created_at: float = field(default_factory=time.time)
+    used_at: float = field(default_factory=time.time)
+
+    directory: Path = field(default=Path(), repr=False)
+
+    @property
+    def tree(self) -> Path:
+        return self.directory / "tree"
+
+    def save(self) -> None:
+        data = asdict(self)
+        del data["directory"]
+        tmp_path = self.directory / f"{MANIFEST_FILE}.{os.getpid()}.tmp"
+        tmp_path.write_text(json.dumps(data, indent=2))
+        os.replace(tmp_path, self.directory / MANIFEST_FILE)
+
+    @classmethod
+    def load(cls, directory: Path) -> "SnapshotEntry | None":
+        try:
+            return cls(**json.loads((directory / MANIFEST_FILE).read_text()), directory=directory)
+        except (OSError, ValueError, TypeError):
+            return None
+
+
+def _is_cached_path(path: str) -> bool:
+    # The cache lives in the working tree. It's git-ignored, but never copy it into itself.
+    return path.startswith(f"{CACHE_DIR.as_posix()}/")
+
+
+def snapshot_working_tree(repo: Repository, destination: Path) -> list[str]:
+    """Copy the files git knows about into `destination`, keeping their relative paths.
+
+    Returns:
+        The paths copied
+
+    """
+    workdir = Path(repo.workdir)
+    copied = []
+    for path in iter_repo_files(repo):
+        source = workdir / path
+        # Files deleted from the working tree are still in the index; submodules are directories
+        if _is_cached_path(path) or not (source.is_file() or source.is_symlink()):
+            continue
+        target = destination / path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy2(source, target, follow_symlinks=False)
+        copied.append(path)
+    return copied
+
+
+def _changed_between(repo: Repository, old: str, new: str) -> set[str] | None:
+    """Paths that differ between two commits, or None if either is no longer in the repository."""
+    if old == new:
+        return set()
+    try:
+        diff = repo.diff(repo.revparse_single(old), repo.revparse_single(new))
+    except (KeyError, ValueError, pygit2.GitError):
+        return None
+    return {path for delta in diff.deltas for path in (delta.old_file.path, delta.new_file.path)}
+
+
+def commit_snapshot(tree: Path, paths: list[str] | set[str]) -> str:
+    """Stage `paths` (adding, updating or removing each) in a snapshot repository and commit them as the new base."""
+    snapshot = pygit2.Repository(str(tree)) if (tree / ".git").exists() else pygit2.init_repository(str(tree), initial_head=SNAPSHOT_BRANCH)
+    index = snapshot.index
+    for path in paths:
+        if (tree / path).is_file() or (tree / path).is_symlink():
+            index.add(path)
+        elif path in index:
+            index.remove(path)
+    index.write()
+    parents = [] if snapshot.head_is_unborn else [snapshot.head.target]
+    return str(snapshot.create_commit("HEAD", _SIGNATURE, _SIGNATURE, "codegen local run base", index.write_tree(), parents))
+
+
+def snapshot_files(tree: Path) -> list[str]:
+    """Paths of the files committed in a snapshot repository."""
+    paths = []
+    # pygit2's index iterator doesn't support iter(), so it can't be used in a comprehension
+    for entry in pygit2.Repository(str(tree)).index:
+        paths.append(entry.path)
+    return paths
+
+
+def _directory_size(path: Path) -> tuple[int, int]:
+    """Total size and number of files under `path`, not counting the snapshot's git directory."""
+    size = files = 0
+    for root, dirs, names in os.walk(path):
+        if root == str(path) and ".git" in dirs:
+            dirs.remove(".git")
+        for name in names:
+            try:
+                size += os.lstat(os.path.join(root, name)).st_size
+                files += 1
+            except OSError:
+                pass
+    return size, files
+
+
+class CodebaseCache:
+    """Snapshots of one repository's working tree, stored in `directory` (usually `.codegen/cache/codebases`)."""
+
+    def __init__(self, directory: Path, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def entries(self) -> list[SnapshotEntry]:
+        """Every snapshot in the cache, most recently used first."""
+        if not self.directory.is_dir():
+            return []
+        entries = (SnapshotEntry.load(path) for path in self.directory.iterdir() if path.is_dir())
+        return sorted((entry for entry in entries if entry is not None), key=lambda entry: -entry.used_at)
+
+    def total_size(self) -> int:
+        return sum(entry.size for entry in self.entries())
+
+    @contextmanager
+    def lock(self) -> Iterator[None]:
+        """Hold the cache exclusively, e.g. for the duration of a run that edits a snapshot."""
+        make_cache_dir(self.directory)
+        with open(self.directory / LOCK_FILE, "w") as f:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            yield
+
+    def checkout(self, repo: Repository) -> tuple[SnapshotEntry, set[str] | None]:
+        """Get a snapshot matching the working tree of `repo`, creating or updating one as needed. Call with the lock held.
+
+        Returns:
+            The snapshot, and the paths that changed in it since it was last used (None if it was built from scratch)
+
+        """
+        head = head_commit(repo)
+        fingerprint, dirty = working_tree_state(repo, exclude=CACHE_DIR.as_posix())
+        key = (head or "unborn")[:16]
+        entries = self.entries()
+
+        entry = next((entry for entry in entries if entry.key == key), None)
+        if entry is not None and entry.fingerprint == fingerprint and entry.head == head:
+            entry.used_at = time.time()
+            entry.save()
+            return entry, set()
+
+        changed = None
+        if entry is None and entries and entries[0].head is not None and head is not None:
+            # Start from the snapshot used last: usually the same branch a few commits back
+            base = entries[0]
+            entry = SnapshotEntry(key=key, head=base.head, fingerprint=base.fingerprint, dirty=base.dirty, directory=self.directory / key)
+            shutil.rmtree(entry.directory, ignore_errors=True)
+            # Make room for the copy first, so the cache never holds more than its cap
+            self.evict(keep=base.key, reserve=base.size)
+            if self.total_size() + base.size <= self.max_bytes:
+                shutil.copytree(base.directory, entry.directory, symlinks=True)
+            else:
+                # No room for both: take the snapshot over rather than copying it, as it would be evicted anyway
+                parsed_codebases.pop(base.tree, None)
+                os.replace(base.directory, entry.directory)
+        if entry is not None:
+            between = set() if entry.head == head else _changed_between(repo, entry.head, head) if entry.head and head else None
+            if between is not None:
+                changed = between | set(entry.dirty) | set(dirty)
+
+        entry = entry or SnapshotEntry(key=key, head=head, fingerprint=fingerprint, directory=self.directory / key)
+        if changed is None:
+            shutil.rmtree(entry.directory, ignore_errors=True)
+            entry.tree.mkdir(parents=True)
+            entry.base_commit = commit_snapshot(entry.tree, snapshot_working_tree(repo, entry.tree))
+        else:
+            changed = {path for path in changed if not _is_cached_path(path)}
+            self._update(repo, entry, changed)
+
+        entry.head, entry.fingerprint, entry.dirty = head, fingerprint, dirty
+        entry.size, entry.files = _directory_size(entry.tree)
+        entry.used_at = time.time()
+        entry.save()
+        self.evict(keep=entry.key)
+        return entry, changed
+
+    def _update(self, repo: Repository, entry: SnapshotEntry, changed: set[str]) -> None:
+        workdir = Path(repo.workdir)
+        index = repo.index
+        for path in changed:
+            source, target = workdir / path, entry.tree / path
+            known = path in index or not repo.path_is_ignored(path)
+            if known and (source.is_file() or source.is_symlink()):
+                target.parent.mkdir(parents=True, exist_ok=True)
+                target.unlink(missing_ok=True)
+                shutil.copy2(source, target, follow_symlinks=False)
+            else:
+                target.unlink(missing_ok=True)
+        entry.base_commit = commit_snapshot(entry.tree, changed)
+
+    def discard_changes(self, entry: SnapshotEntry) -> None:
+        """Undo a run's edits to a snapshot, restoring its base commit."""
+        snapshot = pygit2.Repository(str(entry.tree))
+        snapshot.checkout_head(strategy=CheckoutStrategy.FORCE | CheckoutStrategy.REMOVE_UNTRACKED)
+
+    def evict(self, keep: str | None = None, reserve: int = 0) -> list[SnapshotEntry]:
+        """Remove least recently used snapshots until the cache, plus `reserve` bytes, fits in `max_bytes`. Returns the removed snapshots."""
+        entries = self.entries()
+        total = sum(entry.size for entry in entries)
+        evicted = []
+        for entry in reversed(entries):
+            if total + reserve <= self.max_bytes:
+                break
+            if entry.key == keep:
+                continue
+            self._remove(entry)
+            total -= entry.size
+            evicted.append(entry)
+        return evicted
+
+    def clear(self) -> None:
+        for entry in self.entries():
+            self._remove(entry)
+
+    def _remove(self, entry: SnapshotEntry) -> None:
+        parsed_codebases.pop(entry.tree, None)
+        shutil.rmtree(entry.directory, ignore_errors=True)
+
+
+def disable_codebase_cache() -> None:
+    """Don't use snapshot caches for the rest of the process (the global `--no-cache` flag)."""
+    global _disabled
+    _disabled = True
+
+
+def reset_codebase_cache_flag() -> None:
+    """Clear the `--no-cache` flag set by `disable_codebase_cache` (e.g. between commands run by the daemon).
+
+    CODEGEN_NO_CACHE needs no reset: it's read from the environment on every `get_codebase_cache` call.
+    """
+    global _disabled
+    _disabled = False
+
+
+def get_codebase_cache(repo: Repository) -> CodebaseCache | None:
+    """The snapshot cache of `repo`, or None if caching is disabled (CODEGEN_NO_CACHE / --no-cache)."""
+    if _disabled or global_env.CODEGEN_NO_CACHE:
+        return None
+    return open_codebase_cache(repo)
+
+
+def open_codebase_cache(repo: Repository) -> CodebaseCache:
+    """The snapshot cache of `repo`, even if caching is disabled (e.g. to inspect or clear it).
+
+    The size cap defaults to 2 GiB and can be set in MiB with CODEGEN_CODEBASE_CACHE_MAX_MB.
+    """
+    max_bytes = cache_size_cap(global_env.CODEGEN_CODEBASE_CACHE_MAX_MB, DEFAULT_MAX_BYTES)
+    return CodebaseCache(Path(repo.workdir) / CODEBASE_CACHE_DIR, max_bytes)
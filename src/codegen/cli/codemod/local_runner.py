@@ -0,0 +1,275 @@
+"""Runs codegen functions in-process, against a graph-sitter codebase built from the working tree.
+
+The files git knows about (tracked files plus untracked files that aren't ignored) are copied into a
+scratch repository, so a codemod never touches the user's checkout. Its changes come back as the
+same unified diff the run endpoint returns in `RunCodemodOutput.observation`, which `codegen run`
+renders and applies exactly as it does a remote run.
+
+Scratch repositories come from the repository's codebase cache (see `codebase_cache`), and parsed
+codebases are kept for as long as their snapshot is cached, so a long-lived process such as the daemon
+only re-parses the files that changed between runs.
+
+Functions marked `shardable` only change files based on their own contents, so their runs are split:
+the snapshot's files are partitioned across a process pool, each worker parses and runs the function
+on its share only, and the per-shard diffs and logs are merged into one result. Each worker copies its
+files to a scratch repository and parses them from scratch, so sharded runs don't benefit from cached
+snapshots or parsed codebases beyond the snapshot they're partitioned from.
+"""
+
+import ast
+import contextlib
+import io
+import multiprocessing
+import os
+import re
+import shutil
+import tempfile
+import traceback
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from pathlib import Path
+from textwrap import indent
+from typing import TYPE_CHECKING, Any
+
+from pygit2.repository import Repository
+
+from codegen.cli.api.schemas import RunCodemodOutput
+from codegen.cli.codemod.codebase_cache import (
+    SNAPSHOT_BRANCH,
+    CodebaseCache,
+    SnapshotEntry,
+    commit_snapshot,
+    get_codebase_cache,
+    parsed_codebases,
+    snapshot_files,
+    snapshot_working_tree,
+)
+from codegen.cli.errors import LocalRunError
+from codegen.cli.utils.constants import ProgrammingLanguage
+from codegen.cli.utils.function_finder import DecoratedFunction
+
+if TYPE_CHECKING:
+    from graph_sitter import Codebase
+
+# Name of the function a codemod's body is wrapped in. Its parameters are the names the body can use.
+RUN_FUNCTION = "run"
+RUN_PARAMETERS = "codebase, pr_options=None, arguments=None"
+
+# Below this many files per shard, a sharded run isn't worth starting processes for
+SHARD_MIN_FILES = 64
+
+# Top-level project configuration, given to every shard rather than split: parsing depends on it
+SHARED_CONFIG_FILES = {".gitignore", "jsconfig.json", "package.json", "pyproject.toml", "setup.cfg", "tox.ini", "tsconfig.json"}
+
+# Shard workers are spawned, not forked: forking a process with other threads running (such as the
+# daemon) can leave locks held in the child
+SHARD_START_METHOD = "spawn"
+
+_DIFF_FILE_HEADER = re.compile(r"^diff --git ", re.MULTILINE)
+
+
+def build_codebase(path: Path, language: str | None) -> "Codebase":
+    """Parse the repository at `path` into a graph-sitter codebase, committing its files as the diff base."""
+    try:
+        from graph_sitter import Codebase
+        from graph_sitter.codebase.config import ProjectConfig
+        from graph_sitter.enums import ProgrammingLanguage as GraphSitterLanguage
+
+        from codegen.git.local_repo_operator import LocalRepoOperator
+        from codegen.git.schemas.config import BaseRepoConfig
+    except ImportError as e:
+        msg = f"Local runs need the graph-sitter runtime, which failed to import: {e}"
+        raise LocalRunError(msg) from e
+
+    language = (language or ProgrammingLanguage.PYTHON).upper()
+    if language not in GraphSitterLanguage.__members__ or language == ProgrammingLanguage.UNSUPPORTED:
+        msg = f"Local runs don't support {language} repositories"
+        raise LocalRunError(msg)
+
+    # LocalRepoOperator changes into the repository it opens
+    cwd = os.getcwd()
+    try:
+        operator = LocalRepoOperator(repo_config=BaseRepoConfig(), repo_path=str(path), default_branch=SNAPSHOT_BRANCH, bot_commit=False)
+        operator.stage_and_commit_all_changes("codegen local run base")
+        return Codebase(projects=[ProjectConfig(repo_operator=operator, programming_language=GraphSitterLanguage[language])])
+    finally:
+        os.chdir(cwd)
+
+
+def compile_function(function: DecoratedFunction) -> Callable[..., Any]:
+    """Wrap a function's body the way the run endpoint wraps `codemod_source`, keeping its file and line numbers for tracebacks."""
+    source = f"def {RUN_FUNCTION}({RUN_PARAMETERS}):\n{indent(function.source or 'pass', '    ')}\n"
+    tree = ast.parse(source)
+    if function.span is not None:
+        # The body starts on line 2 of the wrapper
+        ast.increment_lineno(tree, function.span.start_line - 1)
+    namespace: dict[str, Any] = {}
+    exec(compile(tree, str(function.filepath or f"<{function.name}>"), "exec"), namespace)
+    return namespace[RUN_FUNCTION]
+
+
+def _load_codebase(entry: SnapshotEntry, language: str | None, changed: set[str] | None) -> "Codebase":
+    """The parsed codebase of a cached snapshot, re-synced to its new base if this process parsed it before."""
+    cached = parsed_codebases.get(entry.tree)
+    if cached is not None and changed is not None and cached[0] == language:
+        codebase = cached[2]
+        if cached[1] != entry.base_commit:
+            # graph-sitter re-parses only the files that differ between the two commits
+            codebase.checkout(commit=entry.base_commit)
+    else:
+        codebase = build_codebase(entry.tree, language)
+    parsed_codebases[entry.tree] = (language, entry.base_commit, codebase)
+    return codebase
+
+
+def _execute(run: Callable[..., Any], codebase: "Codebase", arguments: dict | None) -> RunCodemodOutput:
+    logs = io.StringIO()
+    error = None
+    with contextlib.redirect_stdout(logs):
+        try:
+            run(codebase, arguments=arguments)
+            codebase.commit()
+        except Exception:
+            error = traceback.format_exc()
+    observation = codebase.get_diff() if error is None else None
+    return RunCodemodOutput(success=error is None, logs=logs.getvalue() or None, observation=observation or None, error=error)
+
+
+def partition_files(tree: Path, paths: list[str], shards: int) -> tuple[list[str], list[list[str]]]:
+    """Split a snapshot's files into shards of about equal total size.
+
+    Project configuration at the top of the repository (see SHARED_CONFIG_FILES, e.g. pyproject.toml
+    or tsconfig.json) is returned separately, to be given to every shard.
+
+    Returns:
+        The shared files, and the files of each non-empty shard
+
+    """
+    shared = [path for path in paths if _is_shared(path)]
+    sizes = {path: (tree / path).lstat().st_size for path in paths if not _is_shared(path)}
+    loads = [0] * shards
+    partitions: list[list[str]] = [[] for _ in range(shards)]
+    # Largest first, each into the shard with the least data so far
+    for path in sorted(sizes, key=lambda path: (-sizes[path], path)):
+        shard = loads.index(min(loads))
+        partitions[shard].append(path)
+        loads[shard] += sizes[path]
+    return shared, [sorted(partition) for partition in partitions if partition]
+
+
+def merge_diffs(diffs: list[str]) -> str:
+    """Merge unified diffs into one, ordered by file. A file changed in several diffs (e.g. a shared file) is kept once."""
+    files: dict[str, str] = {}
+    for diff in diffs:
+        starts = [match.start() for match in _DIFF_FILE_HEADER.finditer(diff)]
+        for start, end in zip(starts, [*starts[1:], len(diff)]):
+            chunk = diff[start:end]
+            files.setdefault(chunk.split("\n", 1)[0], chunk if chunk.endswith("\n") else f"{chunk}\n")
+    return "".join(files[header] for header in sorted(files))
+
+
+def merge_outputs(outputs: list[RunCodemodOutput]) -> RunCodemodOutput:
+    """Combine the outputs of a sharded run. Any shard failing fails the run, like an error in an unsharded run would."""
+    errors = [f"Shard {i}/{len(outputs)}:\n{output.error}" for i, output in enumerate(outputs, 1) if output.error]
+    logs = "".join(output.logs or "" for output in outputs)
+    observation = None if errors else merge_diffs([output.observation for output in outputs if output.observation])
+    return RunCodemodOutput(success=not errors, logs=logs or None, observation=observation or None, error="\n".join(errors) or None)
+
+
+def _run_shard(snapshot: str, paths: list[str], function: DecoratedFunction, language: str | None, arguments: dict | None) -> RunCodemodOutput:
+    """Worker: run `function` on a scratch repository holding only `paths` from the snapshot."""
+    with tempfile.TemporaryDirectory(prefix="codegen-shard-") as scratch:
+        path = Path(scratch)
+        for relative in paths:
+            target = path / relative
+            target.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(Path(snapshot) / relative, target, follow_symlinks=False)
+        commit_snapshot(path, paths)
+        return _execute(compile_function(function), build_codebase(path, language), arguments)
+
+
+def run_sharded(tree: Path, function: DecoratedFunction, language: str | None, arguments: dict | None, shards: int) -> RunCodemodOutput | None:
+    """Run a shardable function on a snapshot, split across up to `shards` processes. The snapshot itself isn't modified.
+
+    Every worker parses its files in a fresh scratch repository: cached snapshots and parsed codebases aren't reused.
+
+    Returns:
+        The merged output, or None if the files don't split into at least 2 shards (e.g. there are
+        too few of them) and the function should run in a single process instead
+
+    """
+    paths = snapshot_files(tree)
+    shared, partitions = partition_files(tree, paths, _resolve_shards(shards, _count_partitioned(paths)))
+    if len(partitions) < 2:
+        return None
+    with ProcessPoolExecutor(max_workers=len(partitions), mp_context=multiprocessing.get_context(SHARD_START_METHOD)) as executor:
+        outputs = list(executor.map(_run_shard, repeat(str(tree)), [shared + partition for partition in partitions], repeat(function), repeat(language), repeat(arguments)))
+    return merge_outputs(outputs)
+
+
+def _is_shared(path: str) -> bool:
+    return path in SHARED_CONFIG_FILES
+
+
+def _count_partitioned(paths: list[str]) -> int:
+    """Number of files partition_files spreads across shards, i.e. not shared by all of them."""
+    return sum(not _is_shared(path) for path in paths)
+
+
+def _resolve_shards(shards: int | None, file_count: int) -> int:
+    """Number of processes to split a run of `file_count` partitioned files across; 1 for small repositories."""
+    if shards is None:
+        shards = os.process_cpu_count() or 1
+    return max(1, min(shards, file_count // SHARD_MIN_FILES))
+
+
+def run_locally(
+    repo: Repository,
+    function: DecoratedFunction,
+    language: str | None,
+    arguments: dict | None = None,
+    cache: CodebaseCache | None = None,
+    shards: int | None = None,
+) -> RunCodemodOutput:
+    """Run `function` against a snapshot of the working tree.
+
+    Args:
+        repo: Repository whose working tree is the codebase
+        function: The function to run
+        language: Programming language of the repository (from the workspace config)
+        arguments: Parsed `--arguments`, passed as the function's `arguments` parameter
+        cache: Snapshot cache to use. Defaults to the repository's, or a throwaway snapshot when caching is disabled.
+        shards: Processes to split a shardable function's run across (defaults to all cores). Ignored for
+            functions that aren't shardable.
+
+    Returns:
+        The run's output: what it printed as `logs`, its changes as a unified diff in `observation`,
+        and the traceback in `error` if it raised
+
+    Raises:
+        LocalRunError: If the codebase could not be built
+
+    """
+    run = compile_function(function)
+    cache = cache or get_codebase_cache(repo)
+    if cache is None:
+        with tempfile.TemporaryDirectory(prefix="codegen-run-") as scratch:
+            path = Path(scratch)
+            paths = snapshot_working_tree(repo, path)
+            commit_snapshot(path, paths)
+            if function.shardable and (output := run_sharded(path, function, language, arguments, shards)) is not None:
+                return output
+            return _execute(run, build_codebase(path, language), arguments)
+
+    with cache.lock():
+        entry, changed = cache.checkout(repo)
+        if function.shardable and (output := run_sharded(entry.tree, function, language, arguments, shards)) is not None:
+            return output
+        codebase = _load_codebase(entry, language, changed)
+        try:
+            return _execute(run, codebase, arguments)
+        finally:
+            # Leave the snapshot (and the parsed codebase) at its base for the next run
+            codebase.reset()
+            cache.discard_changes(entry)
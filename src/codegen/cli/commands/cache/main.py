@@ -0,0 +1,73 @@
+from datetime import datetime
+
+import rich
+import rich_click as click
+from rich.table import Table
+
+from codegen.cli.api.run_cache import get_default_run_cache
+from codegen.cli.codemod.codebase_cache import CodebaseCache, open_codebase_cache
+from codegen.cli.git.repo import get_git_repo
+from codegen.cli.rich.codeblocks import format_command
+
+
+def _get_cache() -> CodebaseCache | None:
+    """The snapshot cache of the current repository, or None outside a git repository. Shown and cleared even when caching is disabled."""
+    repo = get_git_repo()
+    return open_codebase_cache(repo) if repo is not None else None
+
+
+@click.group(name="cache")
+def cache_command():
+    """Inspect and manage the cache of codebases parsed by local runs, and of run results."""
+
+
+@cache_command.command(name="stats")
+def stats_command():
+    """Show the cached codebase snapshots of this repository, and the cached run results."""
+    run_cache = get_default_run_cache()
+    runs, runs_size = run_cache.stats()
+    rich.print(f"   [dim]Run results:[/dim] {runs} ({runs_size / 2**20:.1f} MiB of {run_cache.max_bytes / 2**20:.0f} MiB) in {run_cache.directory}\n")
+    cache = _get_cache()
+    if cache is None:
+        rich.print("[yellow]Not in a git repository, so there are no codebase snapshots to show.[/yellow]")
+        return
+    entries = cache.entries()
+    if not entries:
+        rich.print("[yellow]No cached codebases for this repository.[/yellow]")
+        rich.print("\nSnapshots are cached by local runs:")
+        rich.print(format_command("codegen run <label> --local"))
+        return
+
+    table = Table(title="Codebase Cache", border_style="blue")
+    table.add_column("HEAD", style="cyan")
+    table.add_column("Files", justify="right")
+    table.add_column("Size", justify="right")
+    table.add_column("Modified files", justify="right")
+    table.add_column("Last used", style="dim")
+    for entry in entries:
+        used_at = datetime.fromtimestamp(entry.used_at).isoformat(timespec="seconds")
+        table.add_row(entry.head[:12] if entry.head else "<no commits>", str(entry.files), f"{entry.size / 2**20:.1f} MiB", str(len(entry.dirty)), used_at)
+    rich.print(table)
+
+    total = sum(entry.size for entry in entries)
+    rich.print(f"   [dim]Total:[/dim] {total / 2**20:.1f} MiB of {cache.max_bytes / 2**20:.0f} MiB")
+    rich.print(f"   [dim]Path:[/dim]  {cache.directory}")
+
+
+@cache_command.command(name="clear")
+@click.option("--runs", is_flag=True, help="Also remove the cached run results, which are shared by every repository")
+def clear_command(runs: bool = False):
+    """Remove every cached codebase snapshot of this repository."""
+    cache = _get_cache()
+    if cache is not None:
+        with cache.lock():
+            count = len(cache.entries())
+            cache.clear()
+        rich.print(f"✓ Removed {count} cached codebase{'s' if count != 1 else ''}")
+    elif not runs:
+        raise click.ClickException("This command must be run from within a git repository (or pass --runs to only remove the cached run results).")
+    if runs:
+        run_cache = get_default_run_cache()
+        count, _ = run_cache.stats()
+        run_cache.clear()
+        rich.print(f"✓ Removed {count} cached run result{'s' if count != 1 else ''}")
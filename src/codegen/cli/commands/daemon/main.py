@@ -0,0 +1,71 @@
+import subprocess
+import sys
+import time
+
+import rich
+import rich_click as click
+
+from codegen.cli.auth.constants import DAEMON_LOG_FILE, DAEMON_SOCKET
+from codegen.cli.daemon.protocol import control
+
+# How long `codegen daemon start` waits for a new daemon to accept connections
+START_TIMEOUT = 30.0
+DEFAULT_IDLE_TIMEOUT_MINUTES = 30
+
+
+@click.group(name="daemon")
+def daemon_command():
+    """Run commands through a background process that keeps imports, auth, config and discovery warm."""
+
+
+@daemon_command.command(name="start")
+@click.option("--foreground", is_flag=True, help="Run the daemon in this terminal instead of in the background")
+@click.option("--idle-timeout", type=click.FloatRange(min=0, min_open=True), default=DEFAULT_IDLE_TIMEOUT_MINUTES, show_default=True, help="Minutes without a command after which the daemon exits")
+def start_command(foreground: bool, idle_timeout: float):
+    """Start the daemon. Later `codegen` commands are forwarded to it while it runs."""
+    if status := control(DAEMON_SOCKET, "ping"):
+        raise click.ClickException(f"The daemon is already running (pid {status['pid']})")
+
+    if foreground:
+        from codegen.cli.daemon.server import serve
+
+        serve(DAEMON_SOCKET, idle_timeout * 60)
+        return
+
+    DAEMON_LOG_FILE.parent.mkdir(parents=True, exist_ok=True)
+    with open(DAEMON_LOG_FILE, "ab") as log:
+        process = subprocess.Popen(
+            [sys.executable, "-m", "codegen.cli.daemon.server", str(DAEMON_SOCKET), str(idle_timeout * 60)],
+            stdin=subprocess.DEVNULL,
+            stdout=log,
+            stderr=log,
+            start_new_session=True,
+        )
+
+    deadline = time.monotonic() + START_TIMEOUT
+    while (status := control(DAEMON_SOCKET, "ping")) is None:
+        if process.poll() is not None or time.monotonic() > deadline:
+            raise click.ClickException(f"The daemon failed to start. See {DAEMON_LOG_FILE}")
+        time.sleep(0.05)
+    rich.print(f"[green]✓ Daemon started[/green] (pid {status['pid']}) on {DAEMON_SOCKET}")
+
+
+@daemon_command.command(name="stop")
+def stop_command():
+    """Stop the daemon."""
+    if control(DAEMON_SOCKET, "stop") is None:
+        rich.print("[yellow]The daemon is not running.[/yellow]")
+        return
+    rich.print("✓ Daemon stopped")
+
+
+@daemon_command.command(name="status")
+def status_command():
+    """Show whether the daemon is running."""
+    status = control(DAEMON_SOCKET, "ping")
+    if status is None:
+        rich.print("[yellow]The daemon is not running.[/yellow] Start it with [cyan]codegen daemon start[/cyan]")
+        return
+    rich.print(f"Daemon running (pid {status['pid']}) on {DAEMON_SOCKET}")
+    rich.print(f"   [dim]Uptime:[/dim]   {status['uptime']:.0f}s")
+    rich.print(f"   [dim]Commands:[/dim] {status['requests']}")
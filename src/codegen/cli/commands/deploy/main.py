@@ -1,39 +1,160 @@
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
 from pathlib import Path
 
 import rich
 import rich_click as click
+from rich.progress import BarColumn, MofNCompleteColumn, Progress, SpinnerColumn, TaskID, TextColumn, TimeElapsedColumn
+from rich.table import Table
 
+from codegen.cli.api import endpoints
 from codegen.cli.api.client import RestAPI
+from codegen.cli.api.schemas import DeployResponse
 from codegen.cli.auth.decorators import requires_auth
 from codegen.cli.auth.session import CodegenSession
 from codegen.cli.rich.codeblocks import format_command
 from codegen.cli.rich.spinners import create_spinner
 from codegen.cli.utils.codemod_manager import CodemodManager
+from codegen.cli.utils.deploy_manifest import DeployManifest, ManifestEntry, fingerprint, get_deploy_manifest
 from codegen.cli.utils.function_finder import DecoratedFunction
 
+DEFAULT_DEPLOY_CONCURRENCY = 8
 
-def deploy_functions(session: CodegenSession, functions: list[DecoratedFunction], message: str | None = None) -> None:
-    """Deploy a list of functions."""
+
+@dataclass
+class DeployResult:
+    """Outcome of deploying a single function."""
+
+    function: DecoratedFunction
+    seconds: float
+    response: DeployResponse | None = None
+    error: str | None = None
+    entry: ManifestEntry | None = None
+    # Unchanged since the last deploy recorded in the manifest
+    skipped: bool = False
+
+    @property
+    def success(self) -> bool:
+        return self.error is None
+
+
+def _deploy_one(api_client: RestAPI, func: DecoratedFunction, message: str | None, manifest: DeployManifest | None = None, force: bool = False) -> DeployResult:
+    start_time = time.time()
+    try:
+        entry = fingerprint(func)
+        if manifest and not force and manifest.is_current(func.name, entry):
+            return DeployResult(func, time.time() - start_time, entry=entry, skipped=True)
+        response = api_client.deploy(
+            codemod_name=func.name,
+            codemod_source=func.source,
+            lint_mode=func.lint_mode,
+            lint_user_whitelist=func.lint_user_whitelist,
+            message=message,
+        )
+    except Exception as e:
+        return DeployResult(func, time.time() - start_time, error=str(e) or type(e).__name__)
+    return DeployResult(func, time.time() - start_time, response=response, entry=entry)
+
+
+def _record(manifest: DeployManifest | None, results: list[DeployResult]) -> None:
+    if manifest is None:
+        return
+    for result in results:
+        if result.response is not None:
+            manifest.record(result.function.name, result.entry, result.response)
+    manifest.save()
+
+
+def _print_summary(results: list[DeployResult]) -> None:
+    table = Table(title="Deploy Summary", border_style="blue")
+    table.add_column("Name", style="cyan")
+    table.add_column("Type", style="magenta")
+    table.add_column("Status")
+    table.add_column("Latency", justify="right")
+    table.add_column("Details", style="dim")
+
+    for result in results:
+        if result.skipped:
+            continue
+        func_type = "Webhook" if result.function.lint_mode else "Function"
+        status = "[green]✓ deployed[/green]" if result.success else "[red]✗ failed[/red]"
+        details = f"codegen run {result.function.name}" if result.success else result.error
+        table.add_row(result.function.name, func_type, status, f"{result.seconds:.3f}s", details)
+
+    skipped = sum(1 for result in results if result.skipped)
+    failed = sum(1 for result in results if not result.success)
+    if table.row_count:
+        rich.print(table)
+    rich.print(f"\n[green]{len(results) - failed - skipped} deployed[/green], [{'red' if failed else 'dim'}]{failed} failed[/], [dim]{skipped} unchanged[/dim]")
+    if skipped:
+        rich.print("[dim]Unchanged functions were skipped, use --force to redeploy them[/dim]")
+
+
+def deploy_functions(
+    session: CodegenSession,
+    functions: list[DecoratedFunction],
+    message: str | None = None,
+    concurrency: int | None = None,
+    manifest: DeployManifest | None = None,
+    force: bool = False,
+) -> list[DeployResult]:
+    """Deploy a list of functions, up to `concurrency` at a time.
+
+    Functions whose source, arguments schema and lint settings match the last deploy recorded in
+    `manifest` are skipped unless `force` is set. Every function is attempted even if some fail.
+    Raises a ClickException after reporting all results if any deploy failed.
+    """
     if not functions:
         rich.print("\n[yellow]No @codegen.function decorators found.[/yellow]\n")
-        return
+        return []
 
-    # Deploy each function
-    api_client = RestAPI(session.token)
+    api_client = RestAPI(session.token, session=session)
     rich.print()  # Add a blank line before deployments
 
-    for func in functions:
-        with create_spinner(f"Deploying function '{func.name}'...") as status:
-            start_time = time.time()
-            print(func.arguments_type_schema)
-            response = api_client.deploy(codemod_name=func.name, codemod_source=func.source, lint_mode=func.lint_mode, lint_user_whitelist=func.lint_user_whitelist, message=message)
-            deploy_time = time.time() - start_time
+    if len(functions) == 1:
+        func = functions[0]
+        with create_spinner(f"Deploying function '{func.name}'..."):
+            result = _deploy_one(api_client, func, message, manifest, force)
+        _record(manifest, [result])
+        if not result.success:
+            raise click.ClickException(result.error)
+        if result.skipped:
+            rich.print(f"[dim]Function '{func.name}' is unchanged since it was last deployed (version {manifest.get(func.name).version_id}), use --force to redeploy[/dim]")
+            return [result]
 
         func_type = "Webhook" if func.lint_mode else "Function"
-        rich.print(f"✅ {func_type} '{func.name}' deployed in {deploy_time:.3f}s! 🎉")
+        rich.print(f"✅ {func_type} '{func.name}' deployed in {result.seconds:.3f}s! 🎉")
         rich.print("   [dim]View deployment:[/dim]")
         rich.print(format_command(f"codegen run {func.name}"))
+        return [result]
+
+    concurrency = min(concurrency or DEFAULT_DEPLOY_CONCURRENCY, len(functions))
+    results: dict[int, DeployResult] = {}
+    progress = Progress(SpinnerColumn(), TextColumn("{task.description}"), BarColumn(), MofNCompleteColumn(), TimeElapsedColumn(), transient=True)
+    with progress, ThreadPoolExecutor(max_workers=concurrency) as executor:
+        overall = progress.add_task(f"[bold]Deploying {len(functions)} functions", total=len(functions))
+        rows: dict[int, TaskID] = {}
+
+        def deploy(position: int, func: DecoratedFunction) -> DeployResult:
+            rows[position] = progress.add_task(f"  {func.name}", total=None)
+            try:
+                return _deploy_one(api_client, func, message, manifest, force)
+            finally:
+                progress.remove_task(rows.pop(position))
+                progress.advance(overall)
+
+        futures = {executor.submit(deploy, position, func): position for position, func in enumerate(functions)}
+        for future in as_completed(futures):
+            results[futures[future]] = future.result()
+
+    ordered = [results[position] for position in range(len(functions))]
+    _record(manifest, ordered)
+    _print_summary(ordered)
+    failed = sum(1 for result in ordered if not result.success)
+    if failed:
+        raise click.ClickException(f"{failed} of {len(ordered)} functions failed")
+    return ordered
 
 
 @click.command(name="deploy")
@@ -41,19 +162,34 @@ def deploy_functions(session: CodegenSession, functions: list[DecoratedFunction]
 @click.argument("name", required=False)
 @click.option("-d", "--directory", type=click.Path(exists=True, path_type=Path), help="Directory to search for functions")
 @click.option("-m", "--message", help="Optional message to include with the deploy")
-def deploy_command(session: CodegenSession, name: str | None = None, directory: Path | None = None, message: str | None = None):
+@click.option("--ref", help="Deploy the functions at this git commit, branch or tag, read straight from git without checking it out")
+@click.option("-f", "--force", is_flag=True, help="Deploy every function, even if it is unchanged since its last deploy")
+@click.option("-c", "--concurrency", type=click.IntRange(min=1), help=f"Number of functions to deploy concurrently (default {DEFAULT_DEPLOY_CONCURRENCY})")
+@click.option("-j", "--jobs", type=click.IntRange(min=1), help="Number of processes to use when scanning for functions (defaults to all cores for large scans)")
+def deploy_command(
+    session: CodegenSession,
+    name: str | None = None,
+    directory: Path | None = None,
+    message: str | None = None,
+    ref: str | None = None,
+    force: bool = False,
+    concurrency: int | None = None,
+    jobs: int | None = None,
+):
     """Deploy codegen functions.
 
     If NAME is provided, deploys a specific function by that name.
     If no NAME is provided, deploys all functions in the current directory or specified directory.
+    With --ref, functions are read from that commit, branch or tag instead of the working tree.
+    Functions that haven't changed since their last deploy are skipped unless --force is passed.
     """
     try:
         search_path = directory or Path.cwd()
+        manifest = get_deploy_manifest(scope=f"{endpoints.DEPLOY_ENDPOINT}#{session.repo_name}")
 
         if name:
             # Find and deploy specific function by name
-            functions = CodemodManager.get_decorated(search_path)
-            matching = [f for f in functions if f.name == name]
+            matching = CodemodManager.find(name, search_path, jobs=jobs, ref=ref)
             if not matching:
                 raise click.ClickException(f"No function found with name '{name}'")
             if len(matching) > 1:
@@ -62,10 +198,10 @@ def deploy_command(session: CodegenSession, name: str | None = None, directory:
                 for func in matching:
                     rich.print(f"  • {func.filepath}")
                 raise click.ClickException("Please specify the exact directory with --directory")
-            deploy_functions(session, matching, message=message)
+            deploy_functions(session, matching, message=message, concurrency=concurrency, manifest=manifest, force=force)
         else:
             # Deploy all functions in the directory
-            functions = CodemodManager.get_decorated(search_path)
-            deploy_functions(session, functions)
+            functions = CodemodManager.get_decorated(search_path, jobs=jobs, ref=ref)
+            deploy_functions(session, functions, message=message, concurrency=concurrency, manifest=manifest, force=force)
     except Exception as e:
         raise click.ClickException(f"Failed to deploy: {e!s}")
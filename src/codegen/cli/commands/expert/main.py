@@ -19,7 +19,7 @@ def expert_command(session: CodegenSession, query: str):
     status.start()
 
     try:
-        response = RestAPI(session.token).ask_expert(query)
+        response = RestAPI(session.token, session=session).ask_expert(query)
         status.stop()
         rich.print("[bold green]✓ Response received[/bold green]")
         rich.print(response.response)
@@ -0,0 +1,55 @@
+import time
+from datetime import datetime
+from pathlib import Path
+
+import rich
+import rich_click as click
+from rich.table import Table
+
+from codegen.cli.rich.codeblocks import format_command
+from codegen.cli.utils.codemod_manager import CodemodManager
+from codegen.cli.utils.discovery_index import get_discovery_index
+
+
+@click.group(name="index")
+def index_command():
+    """Inspect and manage the local function discovery index."""
+
+
+@index_command.command(name="rebuild")
+@click.option("-d", "--directory", type=click.Path(exists=True, path_type=Path), help="Directory to search for functions")
+def rebuild_command(directory: Path | None = None):
+    """Discard the discovery index and rebuild it from scratch."""
+    index = get_discovery_index(create=True)
+    index.clear()
+
+    start_time = time.time()
+    functions = CodemodManager.get_decorated(directory, index=index)
+    rebuild_time = time.time() - start_time
+
+    stats = index.stats()
+    rich.print(f"✅ Indexed {stats.files} files in {rebuild_time:.3f}s, found {len(functions)} functions")
+    rich.print(f"   [dim]Index:[/dim] {stats.path}")
+
+
+@index_command.command(name="stats")
+def stats_command():
+    """Show statistics about the discovery index."""
+    index = get_discovery_index()
+    stats = index.stats()
+    if stats.path is None or not stats.path.exists():
+        rich.print("[yellow]No discovery index found in current directory.[/yellow]")
+        rich.print("\nBuild one with:")
+        rich.print(format_command("codegen index rebuild"))
+        return
+
+    table = Table(title="Discovery Index", border_style="blue", show_header=False)
+    table.add_column("Stat", style="cyan")
+    table.add_column("Value")
+    table.add_row("Path", str(stats.path))
+    table.add_row("Files", str(stats.files))
+    table.add_row("Files with functions", str(stats.files_with_functions))
+    table.add_row("Functions", str(stats.functions))
+    table.add_row("Size", f"{stats.size_bytes / 1024:.1f} KiB")
+    table.add_row("Updated", datetime.fromtimestamp(stats.updated_at).isoformat(timespec="seconds") if stats.updated_at else "<never>")
+    rich.print(table)
@@ -9,9 +9,10 @@ from codegen.cli.utils.codemod_manager import CodemodManager
 
 
 @click.command(name="list")
-def list_command():
+@click.option("-j", "--jobs", type=click.IntRange(min=1), help="Number of processes to use when scanning for functions (defaults to all cores for large scans)")
+def list_command(jobs: int | None = None):
     """List available codegen functions."""
-    functions = CodemodManager.get_decorated()
+    functions = CodemodManager.get_decorated(jobs=jobs)
     if functions:
         table = Table(title="Codegen Functions", border_style="blue")
         table.add_column("Name", style="cyan")
@@ -1,6 +1,8 @@
 import rich
 import rich_click as click
 
+from codegen.cli.api.response_cache import get_default_response_cache
+from codegen.cli.api.run_cache import get_default_run_cache
 from codegen.cli.auth.token_manager import TokenManager
 
 
@@ -9,4 +11,6 @@ def logout_command():
     """Clear stored authentication token."""
     token_manager = TokenManager()
     token_manager.clear_token()
+    get_default_response_cache().clear()
+    get_default_run_cache().clear()
     rich.print("Successfully logged out")
@@ -6,9 +6,10 @@ import rich_click as click
 from rich.panel import Panel
 
 from codegen.cli.api.client import RestAPI
+from codegen.cli.api.run_cache import disable_run_cache, get_default_run_cache
 from codegen.cli.auth.decorators import requires_auth
 from codegen.cli.auth.session import CodegenSession
-from codegen.cli.errors import ServerError
+from codegen.cli.errors import LocalRunError, ServerError
 from codegen.cli.git.patch import apply_patch
 from codegen.cli.rich.codeblocks import format_command
 from codegen.cli.rich.spinners import create_spinner
@@ -18,13 +19,35 @@ from codegen.cli.utils.url import generate_webapp_url
 from codegen.cli.workspace.decorators import requires_init
 
 
-def run_function(session: CodegenSession, function, web: bool = False, apply_local: bool = False, diff_preview: int | None = None):
-    """Run a function and handle its output."""
-    with create_spinner(f"Running {function.name}...") as status:
+def run_function(
+    session: CodegenSession,
+    function,
+    web: bool = False,
+    apply_local: bool = False,
+    diff_preview: int | None = None,
+    local: bool = False,
+    arguments: dict | None = None,
+    shards: int | None = None,
+):
+    """Run a function and handle its output.
+
+    With `local`, the function runs in this process against the working tree instead of on the server
+    (split across `shards` processes if the function is shardable). Successful diff runs, local or remote,
+    are cached: the same function run on the same repository state returns the stored result.
+    """
+    with create_spinner(f"Running {function.name}{' locally' if local else ''}...") as status:
         try:
-            run_output = RestAPI(session.token).run(
-                function=function,
-            )
+            if local:
+                from codegen.cli.codemod.local_runner import run_locally
+
+                language = session.config.programming_language
+                run_cache = get_default_run_cache()
+                key = run_cache.key(session.git_repo, function.source or "", session.repo_name, executor="local", language=language, arguments=arguments) if run_cache.enabled else None
+                run_output = run_cache.get_or_run(key, lambda: run_locally(session.git_repo, function, language, arguments, shards=shards))
+            else:
+                run_output = RestAPI(session.token, session=session).run(
+                    function=function,
+                )
 
             status.stop()
             rich.print(f"✅ Ran {function.name} successfully")
@@ -71,7 +94,7 @@ def run_function(session: CodegenSession, function, web: bool = False, apply_loc
                 if not apply_local:
                     rich.print("")
                     rich.print("Apply changes locally:")
-                    rich.print(format_command(f"codegen run {function.name} --apply-local"))
+                    rich.print(format_command(f"codegen run {function.name}{' --local' if local else ''} --apply-local"))
                     rich.print("Create a PR:")
                     rich.print(format_command(f"codegen run {function.name} --create-pr"))
             else:
@@ -104,48 +127,67 @@ def run_function(session: CodegenSession, function, web: bool = False, apply_loc
                     rich.print("  3. Run this command again\n")
                     raise click.ClickException("Failed to apply patch to local filesystem")
 
-        except ServerError as e:
+        except (ServerError, LocalRunError) as e:
             status.stop()
             raise click.ClickException(str(e))
 
 
 @click.command(name="run")
-@requires_auth
+@requires_auth(unless="local")
 @requires_init
 @click.argument("label", required=True)
 @click.option("--web", is_flag=True, help="Automatically open the diff in the web app")
+@click.option("--local", is_flag=True, help="Run the function in this process against the working tree, instead of on the server")
 @click.option("--apply-local", is_flag=True, help="Applies the generated diff to the repository")
 @click.option("--diff-preview", type=int, help="Show a preview of the first N lines of the diff")
 @click.option("--arguments", type=str, help="Arguments as a json string to pass as the function's 'arguments' parameter")
-def run_command(session: CodegenSession, label: str, web: bool = False, apply_local: bool = False, diff_preview: int | None = None, arguments: str | None = None):
+@click.option(
+    "-j",
+    "--jobs",
+    type=click.IntRange(min=1),
+    help="Number of processes to use when scanning for functions (defaults to all cores for large repositories)",
+)
+@click.option(
+    "--shards",
+    type=click.IntRange(min=1),
+    help="Number of processes to split local runs of shardable functions across (defaults to all cores for large repositories). Each shard parses its files from scratch.",
+)
+@click.option("--no-cache", is_flag=True, help="Run the function even if the result of an identical run is cached")
+def run_command(
+    session: CodegenSession,
+    label: str,
+    web: bool = False,
+    local: bool = False,
+    apply_local: bool = False,
+    diff_preview: int | None = None,
+    arguments: str | None = None,
+    jobs: int | None = None,
+    shards: int | None = None,
+    no_cache: bool = False,
+):
     """Run a codegen function by its label."""
-    # First try to find it as a stored codemod
-    codemod = CodemodManager.get(label)
-    if codemod:
-        if codemod.arguments_type_schema and not arguments:
-            raise click.ClickException(f"This function requires the --arguments parameter. Expected schema: {codemod.arguments_type_schema}")
-
-        if codemod.arguments_type_schema and arguments:
-            arguments_json = json.loads(arguments)
-            is_valid = validate_json(codemod.arguments_type_schema, arguments_json)
-            print(f"is_valid: {is_valid}")
-
-        run_function(session, codemod, web, apply_local, diff_preview)
-        return
-
-    # If not found as a stored codemod, look for decorated functions
-    functions = CodemodManager.get_decorated()
-    print("found some functions", functions)
-    matching = [f for f in functions if f.name == label]
+    if no_cache:
+        disable_run_cache()
 
+    # Scans the whole tree so functions sharing the label are reported instead of picking one
+    matching = CodemodManager.find(label, jobs=jobs)
     if not matching:
         raise click.ClickException(f"No function found with label '{label}'")
-
     if len(matching) > 1:
         # If multiple matches, show their locations
         rich.print(f"[yellow]Multiple functions found with label '{label}':[/yellow]")
         for func in matching:
             rich.print(f"  • {func.filepath}")
-        raise click.ClickException("Please specify the exact file with codegen run <path>")
+        raise click.ClickException("Please rename one of them so the label is unique")
+    codemod = matching[0]
+
+    if codemod.arguments_type_schema and not arguments:
+        raise click.ClickException(f"This function requires the --arguments parameter. Expected schema: {codemod.arguments_type_schema}")
+
+    arguments_json = None
+    if codemod.arguments_type_schema and arguments:
+        arguments_json = json.loads(arguments)
+        if not validate_json(codemod.arguments_type_schema, arguments_json):
+            raise click.ClickException(f"The --arguments parameter doesn't match the expected schema: {codemod.arguments_type_schema}")
 
-    run_function(session, matching[0], web, apply_local, diff_preview)
+    run_function(session, codemod, web, apply_local, diff_preview, local=local, arguments=arguments_json, shards=shards)
@@ -17,7 +17,7 @@ def run_on_pr(session: CodegenSession, codemod_name: str, pr_number: int) -> Non
 
     with create_spinner(f"Testing webhook '{codemod_name}' on PR #{pr_number}...") as status:
         try:
-            response = RestAPI(session.token).run_on_pr(
+            response = RestAPI(session.token, session=session).run_on_pr(
                 codemod_name=codemod_name,
                 repo_full_name=session.repo_name,
                 github_pr_number=pr_number,
@@ -0,0 +1,68 @@
+"""The `codegen` entry point: forwards the command to a running daemon, or runs it in this process.
+
+Only the standard library is imported until it's clear the daemon can't serve the command, so a
+forwarded command costs little more than interpreter startup.
+"""
+
+import os
+import shutil
+import socket
+import sys
+
+from codegen.cli.auth.constants import DAEMON_SOCKET
+from codegen.cli.daemon.protocol import IN_PROCESS_COMMANDS, build_id, receive, relevant_env, send
+
+
+def _command(argv: list[str]) -> str | None:
+    """The subcommand in `argv`. The top-level options (--no-cache, --version, --help) are all flags, so it's the first non-option."""
+    return next((arg for arg in argv if not arg.startswith("-")), None)
+
+
+def _forward(argv: list[str]) -> int | None:
+    """Run `argv` in the daemon, streaming its output. Returns None if the daemon can't run it."""
+    if os.environ.get("CODEGEN_NO_DAEMON") or not argv or _command(argv) in IN_PROCESS_COMMANDS or not DAEMON_SOCKET.exists():
+        return None
+    try:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(str(DAEMON_SOCKET))
+    except OSError:
+        # Stale socket from a daemon that's no longer running
+        return None
+
+    with sock, sock.makefile("rb") as reader:
+        isatty = sys.stdout.isatty()
+        send(
+            sock,
+            {
+                "argv": argv,
+                "cwd": os.getcwd(),
+                "env": relevant_env(os.environ),
+                "build": build_id(),
+                "isatty": isatty,
+                "columns": shutil.get_terminal_size().columns if isatty else None,
+            },
+        )
+        while (message := receive(reader)) is not None:
+            if "out" in message:
+                sys.stdout.write(message["out"])
+                sys.stdout.flush()
+            elif "err" in message:
+                sys.stderr.write(message["err"])
+                sys.stderr.flush()
+            elif "exit" in message:
+                return message["exit"]
+            elif "fallback" in message:
+                return None
+    # The daemon went away mid-command; its output so far has been shown, so don't run the command twice
+    sys.stderr.write("codegen daemon closed the connection\n")
+    return 1
+
+
+def main() -> None:
+    exit_code = _forward(sys.argv[1:])
+    if exit_code is not None:
+        sys.exit(exit_code)
+
+    from codegen.cli.cli import main as cli_main
+
+    cli_main()
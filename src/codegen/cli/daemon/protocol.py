@@ -0,0 +1,89 @@
+"""Wire protocol between the `codegen` client and the daemon.
+
+Both sides exchange newline-delimited JSON over a Unix socket. The client sends one request:
+
+    {"argv": [...], "cwd": "...", "env": {...}, "build": "...", "isatty": true, "columns": 120}
+
+and the daemon answers with any number of {"out": "..."} / {"err": "..."} messages followed by either
+{"exit": <code>}, or {"fallback": "<reason>"} if the client should run the command itself (the reason is
+"busy" while another command runs). Control requests ({"op": "ping"} / {"op": "stop"}) are answered with
+a single message.
+
+This module is imported by the client on every invocation, so it must stay free of heavy imports.
+"""
+
+import json
+import os
+import socket
+import sys
+from pathlib import Path
+
+# Commands that always run in the client: they manage the daemon itself, or prompt for input
+IN_PROCESS_COMMANDS = {"daemon", "login", "logout"}
+
+# Set by the daemon while it runs a command: there's no terminal to prompt on
+IN_DAEMON = False
+
+# Environment variables that change what a command does. The daemon only serves clients whose values match its own.
+ENV_PREFIXES = ("CODEGEN_", "MODAL_", "ALGOLIA_", "POSTHOG_")
+ENV_NAMES = {"ENV", "DEBUG"}
+
+
+def relevant_env(environ: os._Environ | dict[str, str]) -> dict[str, str]:
+    return {key: value for key, value in environ.items() if key in ENV_NAMES or key.startswith(ENV_PREFIXES)}
+
+
+def _installed_build() -> tuple[str, int]:
+    """Installed version of codegen, from the name of its dist-info directory, and when it was installed.
+
+    The install time is the mtime of the dist-info RECORD, which every install and upgrade rewrites.
+    importlib.metadata takes longer to import than the rest of the client, so it isn't used here.
+    """
+    for entry in sys.path:
+        try:
+            with os.scandir(entry or ".") as entries:
+                for dist in entries:
+                    if dist.name.startswith("codegen-") and dist.name.endswith(".dist-info"):
+                        version = dist.name.removeprefix("codegen-").removesuffix(".dist-info")
+                        try:
+                            return version, os.stat(os.path.join(dist.path, "RECORD")).st_mtime_ns
+                        except OSError:
+                            return version, dist.stat().st_mtime_ns
+        except OSError:
+            continue
+    return "unknown", 0
+
+
+def build_id() -> str:
+    """Identifies the installed code, so a daemon started before an upgrade isn't used by the new client.
+
+    Cheap enough for every client call: a scan of sys.path for the dist-info directory and a couple of
+    stats. Combines the package version and install time with the mtime of the codegen.cli package
+    directory, which changes when a module is added or removed. In an editable install, edits to
+    existing modules aren't seen; run `codegen daemon stop` to pick them up.
+    """
+    version, installed = _installed_build()
+    return f"{version}+{installed}+{os.stat(Path(__file__).parents[1]).st_mtime_ns}"
+
+
+def send(sock: socket.socket, message: dict) -> None:
+    sock.sendall(json.dumps(message).encode() + b"\n")
+
+
+def receive(reader) -> dict | None:
+    """Read the next message from a socket file, or None once the other side has closed it."""
+    line = reader.readline()
+    return json.loads(line) if line else None
+
+
+def control(socket_path: Path, op: str, timeout: float = 5.0) -> dict | None:
+    """Send a control request ("ping" or "stop") to the daemon. Returns None if no daemon is listening."""
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(str(socket_path))
+            send(sock, {"op": op})
+            with sock.makefile("rb") as reader:
+                return receive(reader)
+    except OSError:
+        return None
@@ -0,0 +1,201 @@
+"""Background process that runs `codegen` commands on behalf of the thin client.
+
+Commands run one at a time in the daemon's own interpreter, so everything loaded by previous commands
+stays warm: imported modules, the shared session (token, parsed config and opened repository), the
+discovery index, and the HTTP connection pool. Each request runs in the client's working directory
+with stdout and stderr streamed back to it; stdin is empty, so commands that prompt for input abort.
+"""
+
+import io
+import os
+import socket
+import socketserver
+import sys
+import threading
+import time
+import traceback
+from pathlib import Path
+
+from codegen.cli.auth.constants import AUTH_FILE, DAEMON_SOCKET
+from codegen.cli.daemon import protocol
+from codegen.cli.daemon.protocol import build_id, receive, relevant_env, send
+from codegen.cli.utils.stamp import file_stamp
+
+# Seconds without a request after which the daemon exits
+DEFAULT_IDLE_TIMEOUT = 30 * 60
+
+
+class _StreamWriter(io.TextIOBase):
+    """Text stream that forwards writes to the client as {"out": ...} or {"err": ...} messages."""
+
+    def __init__(self, sock: socket.socket, key: str, isatty: bool):
+        self._sock = sock
+        self._key = key
+        self._isatty = isatty
+
+    @property
+    def encoding(self) -> str:
+        return "utf-8"
+
+    def writable(self) -> bool:
+        return True
+
+    def isatty(self) -> bool:
+        return self._isatty
+
+    def write(self, text: str) -> int:
+        if not isinstance(text, str):
+            # Tells click this is a text stream, not a binary one
+            raise TypeError(f"write() argument must be str, not {type(text).__name__}")
+        if text:
+            send(self._sock, {self._key: text})
+        return len(text)
+
+
+class DaemonServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Runs one command at a time: commands share process-wide state, including the working directory.
+
+    Each connection is handled on its own thread, so a client arriving while a command runs is told the
+    daemon is busy (and runs the command itself) instead of waiting for it. Stopping waits for the
+    running command to finish.
+    """
+
+    def __init__(self, socket_path: Path, idle_timeout: float = DEFAULT_IDLE_TIMEOUT):
+        self.socket_path = socket_path
+        self.idle_timeout = idle_timeout
+        # Computed once; clients send theirs with every request
+        self.build = build_id()
+        self.env = relevant_env(os.environ)
+        self.started_at = time.time()
+        self.last_request_at = self.started_at
+        self.requests_served = 0
+        self.stopping = False
+        self.command_lock = threading.Lock()
+        self._auth_stamp = file_stamp(AUTH_FILE)
+
+        socket_path.parent.mkdir(parents=True, exist_ok=True)
+        socket_path.unlink(missing_ok=True)
+        super().__init__(str(socket_path), _RequestHandler)
+        os.chmod(socket_path, 0o600)
+        # Wake up regularly to check the idle timeout
+        self.timeout = 1.0
+
+    def warm_up(self) -> None:
+        """Import every command up front, so the first forwarded command is as fast as the rest."""
+        from codegen.cli.cli import main
+
+        for name in main.list_commands(None):
+            main.get_command(None, name)
+
+    def serve_until_stopped(self) -> None:
+        try:
+            while not self.stopping and (self.command_lock.locked() or time.time() - self.last_request_at < self.idle_timeout):
+                self.handle_request()
+        finally:
+            self.server_close()
+            self.socket_path.unlink(missing_ok=True)
+
+    def status(self) -> dict:
+        return {"pid": os.getpid(), "uptime": time.time() - self.started_at, "requests": self.requests_served, "build": self.build}
+
+    def fallback_reason(self, request: dict) -> str | None:
+        """Why the client should run a command itself rather than here, if it should."""
+        if request.get("build") != self.build:
+            return "the daemon runs a different version of codegen"
+        if request.get("env") != self.env:
+            return "the client's environment differs from the daemon's"
+        if not os.path.isdir(request.get("cwd", "")):
+            return "the client's working directory isn't visible to the daemon"
+        return None
+
+    def run_command(self, sock: socket.socket, request: dict) -> int:
+        import rich
+
+        from codegen.cli.auth.session import CodegenSession
+        from codegen.cli.cli import main
+
+        os.chdir(request["cwd"])
+        # A login, logout or rejected token since the last command invalidates the shared session
+        auth_stamp = file_stamp(AUTH_FILE)
+        if auth_stamp != self._auth_stamp:
+            self._auth_stamp = auth_stamp
+            CodegenSession.set_current(None)
+        else:
+            CodegenSession.current().forget_identity()
+
+        stdout, stderr = _StreamWriter(sock, "out", request["isatty"]), _StreamWriter(sock, "err", request["isatty"])
+        streams = sys.stdin, sys.stdout, sys.stderr
+        sys.stdin, sys.stdout, sys.stderr = io.StringIO(), stdout, stderr
+        rich.reconfigure(force_terminal=request["isatty"], width=request["columns"])
+        protocol.IN_DAEMON = True
+        try:
+            main.main(args=request["argv"], prog_name="codegen")
+        except SystemExit as e:
+            return e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+        except Exception:
+            traceback.print_exc()
+            return 1
+        finally:
+            sys.stdin, sys.stdout, sys.stderr = streams
+            protocol.IN_DAEMON = False
+            rich.reconfigure()
+            _reset_caches()
+        return 0
+
+
+def _reset_caches() -> None:
+    """Forget the shared caches, so a `--no-cache` flag only applies to the command it was passed to."""
+    if "codegen.cli.api.response_cache" in sys.modules:
+        sys.modules["codegen.cli.api.response_cache"].reset_default_response_cache()
+    if "codegen.cli.api.run_cache" in sys.modules:
+        sys.modules["codegen.cli.api.run_cache"].reset_default_run_cache()
+    if "codegen.cli.codemod.codebase_cache" in sys.modules:
+        sys.modules["codegen.cli.codemod.codebase_cache"].reset_codebase_cache_flag()
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    server: DaemonServer
+
+    def handle(self) -> None:
+        request = receive(self.rfile)
+        if request is None:
+            return
+        self.server.last_request_at = time.time()
+
+        match request.get("op"):
+            case "ping":
+                send(self.request, self.server.status())
+                return
+            case "stop":
+                self.server.stopping = True
+                send(self.request, {"stopping": True})
+                return
+
+        if reason := self.server.fallback_reason(request):
+            send(self.request, {"fallback": reason})
+            return
+        if not self.server.command_lock.acquire(blocking=False):
+            send(self.request, {"fallback": "busy"})
+            return
+        try:
+            exit_code = self.server.run_command(self.request, request)
+        except OSError:
+            # The client disconnected mid-command
+            return
+        finally:
+            self.server.last_request_at = time.time()
+            self.server.command_lock.release()
+        self.server.requests_served += 1
+        send(self.request, {"exit": exit_code})
+
+
+def serve(socket_path: Path = DAEMON_SOCKET, idle_timeout: float = DEFAULT_IDLE_TIMEOUT) -> None:
+    server = DaemonServer(socket_path, idle_timeout)
+    server.warm_up()
+    # Let `codegen daemon start` know the daemon is ready
+    print(f"codegen daemon {os.getpid()} listening on {socket_path}", flush=True)
+    server.serve_until_stopped()
+
+
+if __name__ == "__main__":
+    serve(Path(sys.argv[1]) if len(sys.argv) > 1 else DAEMON_SOCKET, float(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_IDLE_TIMEOUT)
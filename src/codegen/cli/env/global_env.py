@@ -1,21 +1,38 @@
 import os
 
-from dotenv import find_dotenv, load_dotenv
-
 from codegen.cli.env.constants import DEFAULT_ENV
 from codegen.cli.env.enums import Environment
 
 
 class GlobalEnv:
+    """Environment settings. ENV is parsed up front; the .env files are only loaded when another setting is first read."""
+
     def __init__(self) -> None:
         self.ENV = self._parse_env()
+        self._loaded = False
+
+    def __getattr__(self, name: str):
+        # Only called for attributes that aren't set yet, i.e. before the settings are loaded
+        if name.startswith("_") or self._loaded:
+            raise AttributeError(f"{type(self).__name__!r} object has no attribute {name!r}")
+        self._load()
+        return getattr(self, name)
+
+    def _load(self) -> None:
+        self._loaded = True
         self._load_dotenv()
 
         # =====[ DEV ]=====
         self.DEBUG = self._get_env_var("DEBUG")
 
+        # =====[ CACHE ]=====
+        self.CODEGEN_NO_CACHE = self._get_env_var("CODEGEN_NO_CACHE")
+        self.CODEGEN_CODEBASE_CACHE_MAX_MB = self._get_env_var("CODEGEN_CODEBASE_CACHE_MAX_MB")
+        self.CODEGEN_RUN_CACHE_MAX_MB = self._get_env_var("CODEGEN_RUN_CACHE_MAX_MB")
+
         # =====[ AUTH ]=====
         self.CODEGEN_USER_ACCESS_TOKEN = self._get_env_var("CODEGEN_USER_ACCESS_TOKEN")
+        self.CODEGEN_IDENTITY_TTL = self._get_env_var("CODEGEN_IDENTITY_TTL")
 
         # =====[ ALGOLIA ]=====
         self.ALGOLIA_SEARCH_KEY = self._get_env_var("ALGOLIA_SEARCH_KEY")
@@ -35,6 +52,8 @@ class GlobalEnv:
         return Environment(env_envvar)
 
     def _load_dotenv(self) -> None:
+        from dotenv import find_dotenv, load_dotenv
+
         env_file = find_dotenv(filename=f".env.{self.ENV}")
         # if env specific .env file does not exist, try to load .env
         load_dotenv(env_file or None)
@@ -36,6 +36,18 @@ class ServerError(CodegenError):
     pass
 
 
+class StaleSourceError(CodegenError):
+    """Error raised when a function's file changed after the function was discovered."""
+
+    pass
+
+
+class LocalRunError(CodegenError):
+    """Error raised when a codemod cannot be run locally."""
+
+    pass
+
+
 def format_error_message(error):
     """Format error message based on error type."""
     if isinstance(error, AuthError):
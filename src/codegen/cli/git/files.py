@@ -0,0 +1,185 @@
+import hashlib
+import json
+import os
+from collections.abc import Iterator
+from pathlib import Path
+
+from pygit2 import Blob, Tree
+from pygit2.enums import FileMode, FileStatus
+from pygit2.repository import Repository
+
+from codegen.cli.auth.constants import CACHE_DIR, CODEGEN_DIR, UNTRACKED_FILES_CACHE_FILE
+from codegen.cli.utils.cache_dir import make_cache_dir
+from codegen.cli.utils.stamp import file_stamp
+
+UNTRACKED_CACHE_VERSION = 2
+
+# Untracked files of the repositories listed by this process, by git directory
+_untracked_cache: dict[str, dict] = {}
+
+
+def iter_repo_files(repo: Repository, suffix: str = "") -> Iterator[str]:
+    """Iterate the files git knows about: tracked files plus untracked files that are not ignored.
+
+    Paths are posix-style and relative to the repository workdir, each yielded once. Ignored directories
+    are never descended into, since libgit2 prunes them while collecting the status.
+    """
+    index = repo.index
+    # The repository may have been opened earlier in the process; pick up changes to the index since then
+    index.read(False)
+    previous = None
+    for entry in index:
+        # A conflicted file has one entry per stage, next to each other
+        if entry.path != previous and entry.path.endswith(suffix):
+            yield entry.path
+        previous = entry.path
+
+    for path in untracked_files(repo):
+        if path.endswith(suffix):
+            yield path
+
+
+def _global_excludes_file(repo: Repository) -> Path:
+    """The user's global ignore file: core.excludesFile, or git's default under XDG_CONFIG_HOME."""
+    try:
+        return Path(repo.config["core.excludesFile"]).expanduser()
+    except KeyError:
+        return Path(os.environ.get("XDG_CONFIG_HOME") or Path("~/.config").expanduser()) / "git" / "ignore"
+
+
+def _untracked_state(repo: Repository) -> dict:
+    """What the list of untracked files depends on: the index, the ignore files, git's config, and every directory in the working tree.
+
+    Creating, deleting or renaming a file changes its directory's mtime, so while none of these stamps
+    change, neither can the set of untracked files. Every directory is stamped, empty ones included;
+    ignored directories are stamped but not descended into, as git doesn't look inside them either.
+    """
+    workdir = repo.workdir
+    ignore_files = [os.path.join(repo.path, "info", "exclude"), os.path.join(repo.path, "config"), str(_global_excludes_file(repo))]
+    stamps = {}
+    pending = [""]
+    while pending:
+        directory = pending.pop()
+        try:
+            stamps[directory] = os.stat(os.path.join(workdir, directory)).st_mtime_ns
+            with os.scandir(os.path.join(workdir, directory)) as entries:
+                children = [(entry.name, entry.is_dir(follow_symlinks=False)) for entry in entries]
+        except OSError:
+            stamps[directory] = None
+            continue
+        for name, is_dir in children:
+            path = f"{directory}/{name}" if directory else name
+            if not is_dir:
+                if name == ".gitignore":
+                    ignore_files.append(os.path.join(workdir, path))
+            elif path == ".git" or path == CACHE_DIR.as_posix():
+                # Git's own files, and codegen's cache (this file included), which codegen writes to itself
+                continue
+            elif repo.path_is_ignored(f"{path}/") or os.path.exists(os.path.join(workdir, path, ".git")):
+                # Ignored, or a nested repository
+                try:
+                    stamps[path] = os.stat(os.path.join(workdir, path)).st_mtime_ns
+                except OSError:
+                    stamps[path] = None
+            else:
+                pending.append(path)
+    return {
+        "index": file_stamp(Path(repo.path) / "index"),
+        "ignore_files": {path: file_stamp(Path(path)) for path in ignore_files},
+        "directories": stamps,
+    }
+
+
+def _is_current(repo: Repository, cached: dict) -> bool:
+    if cached.get("version") != UNTRACKED_CACHE_VERSION or list(cached["index"] or []) != list(file_stamp(Path(repo.path) / "index") or []):
+        return False
+    for path, stamp in cached["ignore_files"].items():
+        if list(stamp or []) != list(file_stamp(Path(path)) or []):
+            return False
+    workdir = Path(repo.workdir)
+    for directory, mtime_ns in cached["directories"].items():
+        try:
+            if os.stat(workdir / directory).st_mtime_ns != mtime_ns:
+                return False
+        except OSError:
+            if mtime_ns is not None:
+                return False
+    return True
+
+
+def untracked_files(repo: Repository) -> list[str]:
+    """Untracked files that are not ignored.
+
+    Collecting them takes a status pass over the whole working tree, so the result is kept (in memory, and
+    under `.codegen/cache` once the codegen folder exists) and reused while the index, the ignore files
+    and the working tree's directories are unchanged.
+    """
+    cache_path = Path(repo.workdir) / UNTRACKED_FILES_CACHE_FILE
+    cached = _untracked_cache.get(repo.path)
+    if cached is None:
+        try:
+            cached = json.loads(cache_path.read_text())
+        except (OSError, ValueError):
+            cached = None
+    try:
+        if cached is not None and _is_current(repo, cached):
+            _untracked_cache[repo.path] = cached
+            return cached["untracked"]
+    except (KeyError, TypeError, AttributeError):
+        pass
+
+    # Stamped first, so a change made during the status pass invalidates the result
+    state = _untracked_state(repo)
+    untracked = sorted(path for path, flags in repo.status(untracked_files="all", ignored=False).items() if flags & FileStatus.WT_NEW)
+    cached = {"version": UNTRACKED_CACHE_VERSION, **state, "untracked": untracked}
+    _untracked_cache[repo.path] = cached
+    if (Path(repo.workdir) / CODEGEN_DIR).is_dir():
+        try:
+            make_cache_dir(cache_path.parent)
+            tmp_path = cache_path.with_suffix(f".{os.getpid()}.tmp")
+            tmp_path.write_text(json.dumps(cached))
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            pass
+    return untracked
+
+
+def head_commit(repo: Repository) -> str | None:
+    """Id of the commit HEAD points to, or None in a repository without commits."""
+    return None if repo.head_is_unborn else str(repo.head.target)
+
+
+def working_tree_state(repo: Repository, exclude: str | None = None) -> tuple[str, list[str]]:
+    """Fingerprint of the working tree relative to HEAD, and the modified or untracked paths it covers.
+
+    The fingerprint covers the status and content of every file that differs from HEAD (ignored files
+    aside), so two working trees on the same HEAD share it only if they hold the same files. Paths under
+    the `exclude` directory are left out.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    workdir = Path(repo.workdir)
+    dirty = []
+    for path, flags in sorted(repo.status(untracked_files="all", ignored=False).items()):
+        if exclude and path.startswith(f"{exclude}/"):
+            continue
+        dirty.append(path)
+        digest.update(f"{path}\0{flags}\0".encode())
+        try:
+            digest.update((workdir / path).read_bytes())
+        except (IsADirectoryError, FileNotFoundError):
+            digest.update(b"\0missing")
+    return digest.hexdigest(), dirty
+
+
+def iter_tree_blobs(tree: Tree, suffix: str = "", prefix: str = "") -> Iterator[tuple[str, Blob]]:
+    """Recursively iterate the file blobs of a tree, without touching the working tree.
+
+    Paths are posix-style and relative to the tree, prefixed with `prefix`. Symlinks and submodules are skipped.
+    Blob contents are only loaded from the object database when `.data` is accessed.
+    """
+    for entry in tree:
+        path = f"{prefix}{entry.name}"
+        if isinstance(entry, Tree):
+            yield from iter_tree_blobs(entry, suffix, f"{path}/")
+        elif isinstance(entry, Blob) and entry.filemode != FileMode.LINK and path.endswith(suffix):
+            yield path, entry
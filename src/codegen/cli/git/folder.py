@@ -5,9 +5,8 @@ from pathlib import Path
 def get_git_folder(path: os.PathLike | None = None) -> Path | None:
     if path is None:
         path = Path.cwd()
-    path = Path(path)
-    while path != path.root:
-        if (path / ".git").exists():
-            return path
-        path = path.parent
+    path = Path(path).absolute()
+    for candidate in (path, *path.parents):
+        if (candidate / ".git").exists():
+            return candidate
     return None
@@ -1,10 +1,15 @@
 import os
+import threading
 from pathlib import Path
 
 from pygit2.repository import Repository
 
 from codegen.cli.git.folder import get_git_folder
 
+# Repositories opened so far, by git folder. Opening one reads its config and refs, so it's done once per process.
+_repos: dict[Path, Repository] = {}
+_repos_lock = threading.Lock()
+
 
 def get_git_repo(path: os.PathLike | None = None) -> Repository | None:
     if path is None:
@@ -12,4 +17,8 @@ def get_git_repo(path: os.PathLike | None = None) -> Repository | None:
     git_folder = get_git_folder(path)
     if git_folder is None:
         return None
-    return Repository(str(git_folder))
+    with _repos_lock:
+        repo = _repos.get(git_folder)
+        if repo is None:
+            repo = _repos[git_folder] = Repository(str(git_folder))
+        return repo
@@ -18,6 +18,7 @@ class DecoratedFunction:
         webhook_config: dict | None = None,
         lint_mode: bool = False,
         lint_user_whitelist: Sequence[str] | None = None,
+        shardable: bool = False,
     ):
         self.name = name
         self.func: Callable | None = None
@@ -25,6 +26,7 @@ class DecoratedFunction:
         self.webhook_config = webhook_config
         self.lint_mode = lint_mode
         self.lint_user_whitelist = list(lint_user_whitelist) if lint_user_whitelist else []
+        self.shardable = shardable
 
     def __call__(self, func: Callable[P, T]) -> Callable[P, T]:
         # Get the params type from the function signature
@@ -40,11 +42,13 @@ class DecoratedFunction:
         return wrapper
 
 
-def function(name: str) -> DecoratedFunction:
+def function(name: str, *, shardable: bool = False) -> DecoratedFunction:
     """Decorator for codegen functions.
 
     Args:
         name: The name of the function to be used when deployed
+        shardable: Whether the function only changes each file based on that file's own contents. Local runs
+            of shardable functions split the repository's files across processes, each parsing only its share.
 
     Example:
         @codegen.function('my-function')
@@ -52,7 +56,7 @@ def function(name: str) -> DecoratedFunction:
             pass
 
     """
-    return DecoratedFunction(name)
+    return DecoratedFunction(name, shardable=shardable)
 
 
 def webhook(
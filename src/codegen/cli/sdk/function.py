@@ -29,8 +29,8 @@ class Function:
     @classmethod
     def lookup(cls, name: str) -> "Function":
         """Look up a deployed function by name."""
-        session = CodegenSession()
-        api_client = RestAPI(session.token)
+        session = CodegenSession.current()
+        api_client = RestAPI(session.token, session=session)
         response = api_client.lookup(name)
 
         return cls(name=name, codemod_id=response.codemod_id, version_id=response.version_id, _api_client=api_client)
@@ -52,8 +52,8 @@ class Function:
 
         """
         if self._api_client is None:
-            session = CodegenSession()
-            self._api_client = RestAPI(session.token)
+            session = CodegenSession.current()
+            self._api_client = RestAPI(session.token, session=session)
 
         # Create a temporary codemod object to use with the API
         config = CodemodConfig(
@@ -33,8 +33,8 @@ class CodegenPullRequest:
             A CodegenPullRequest instance representing the PR
 
         """
-        session = CodegenSession()
-        api_client = RestAPI(session.token)
+        session = CodegenSession.current()
+        api_client = RestAPI(session.token, session=session)
         response = api_client.lookup_pr(repo_full_name=session.repo_name, github_pr_number=number)
         pr = response.pr
 
@@ -0,0 +1,341 @@
+import ast
+import builtins
+import inspect
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import rich
+from rich.markup import escape
+
+from codegen.cli.auth.constants import CODEGEN_DIR, SCHEMA_CACHE_DIR
+from codegen.cli.utils.cache_dir import make_cache_dir
+from codegen.cli.utils.discovery_index import hash_content
+
+# Modules that are safe (and cheap) to import while rebuilding an arguments class outside of its module
+SAFE_MODULES = {
+    "__future__",
+    "annotated_types",
+    "collections",
+    "datetime",
+    "decimal",
+    "enum",
+    "pathlib",
+    "pydantic",
+    "typing",
+    "typing_extensions",
+    "uuid",
+}
+
+IMPORT_TIMEOUT_SECONDS = 60
+
+# JSON schemas of the annotations understood without running any code, keyed by qualified name
+_SCALAR_SCHEMAS = {
+    "builtins.bool": {"type": "boolean"},
+    "builtins.float": {"type": "number"},
+    "builtins.int": {"type": "integer"},
+    "builtins.str": {"type": "string"},
+    "typing.Any": {},
+    "None": {"type": "null"},
+}
+_LIST_TYPES = {"builtins.list", "typing.List"}
+_DICT_TYPES = {"builtins.dict", "typing.Dict"}
+_UNION_TYPES = {"typing.Optional", "typing.Union"}
+_BASE_MODEL = "pydantic.BaseModel"
+
+_IMPORT_SCRIPT = """
+import importlib.util, json, sys
+spec = importlib.util.spec_from_file_location("module", sys.argv[1])
+module = sys.modules["module"] = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(module)
+print(json.dumps(getattr(module, sys.argv[2]).model_json_schema()))
+"""
+
+
+class _Unresolved(Exception):
+    """Raised when an arguments class references something that can't be rebuilt without importing its module."""
+
+
+def _loaded_names(node: ast.AST) -> set[str]:
+    """Free names read by a node: loaded names that are not also bound inside it (locals, parameters, ...)."""
+    loaded, bound = set(), set()
+    for child in ast.walk(node):
+        if isinstance(child, ast.Name):
+            (loaded if isinstance(child.ctx, ast.Load) else bound).add(child.id)
+        elif isinstance(child, ast.arg):
+            bound.add(child.arg)
+        elif isinstance(child, ast.FunctionDef | ast.AsyncFunctionDef | ast.ClassDef) and child is not node:
+            bound.add(child.name)
+    return loaded - bound
+
+
+def _module_definitions(tree: ast.Module) -> tuple[dict[str, ast.stmt], dict[str, ast.stmt]]:
+    """Map top-level names to the statements defining them, split into local definitions and imports."""
+    definitions, imports = {}, {}
+    for stmt in tree.body:
+        if isinstance(stmt, ast.ClassDef | ast.FunctionDef | ast.AsyncFunctionDef | ast.TypeAlias):
+            name = stmt.name.id if isinstance(stmt, ast.TypeAlias) else stmt.name
+            definitions[name] = stmt
+        elif isinstance(stmt, ast.Assign):
+            for target in stmt.targets:
+                if isinstance(target, ast.Name):
+                    definitions[target.id] = stmt
+        elif isinstance(stmt, ast.AnnAssign) and isinstance(stmt.target, ast.Name) and stmt.value is not None:
+            definitions[stmt.target.id] = stmt
+        elif isinstance(stmt, ast.Import | ast.ImportFrom):
+            for alias in stmt.names:
+                imports[(alias.asname or alias.name).split(".")[0]] = stmt
+    return definitions, imports
+
+
+def _is_safe_import(stmt: ast.stmt) -> bool:
+    if isinstance(stmt, ast.ImportFrom):
+        return stmt.level == 0 and stmt.module is not None and stmt.module.split(".")[0] in SAFE_MODULES
+    return all(alias.name.split(".")[0] in SAFE_MODULES for alias in stmt.names)
+
+
+class _AnnotationResolver:
+    """Translates annotations of a module's AST to JSON schemas, following same-file aliases."""
+
+    def __init__(self, tree: ast.Module):
+        self.definitions, self.imports = _module_definitions(tree)
+        self.resolving: set[str] = set()
+
+    def qualified_name(self, node: ast.expr) -> str:
+        if isinstance(node, ast.Constant) and node.value is None:
+            return "None"
+        if isinstance(node, ast.Name):
+            if node.id in self.imports:
+                stmt = self.imports[node.id]
+                if isinstance(stmt, ast.ImportFrom) and stmt.level == 0 and stmt.module:
+                    alias = next(alias for alias in stmt.names if (alias.asname or alias.name) == node.id)
+                    return f"{stmt.module.removesuffix('_extensions')}.{alias.name}"
+            elif node.id not in self.definitions and hasattr(builtins, node.id):
+                return f"builtins.{node.id}"
+        elif isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name):
+            stmt = self.imports.get(node.value.id)
+            if isinstance(stmt, ast.Import) and any(alias.name == node.value.id and alias.asname in (None, alias.name) for alias in stmt.names):
+                return f"{node.value.id.removesuffix('_extensions')}.{node.attr}"
+        raise _Unresolved(f"{ast.unparse(node)} is not a plain type")
+
+    def schema(self, node: ast.expr) -> dict:
+        if isinstance(node, ast.Constant) and isinstance(node.value, str):
+            try:
+                return self.schema(ast.parse(node.value, mode="eval").body)
+            except SyntaxError:
+                raise _Unresolved(f"{node.value!r} is not a valid annotation") from None
+        if isinstance(node, ast.BinOp) and isinstance(node.op, ast.BitOr):
+            return self._union([node.left, node.right])
+        if isinstance(node, ast.Name) and isinstance(self.definitions.get(node.id), ast.Assign | ast.AnnAssign) and node.id not in self.resolving:
+            self.resolving.add(node.id)
+            try:
+                return self.schema(self.definitions[node.id].value)
+            finally:
+                self.resolving.discard(node.id)
+        if isinstance(node, ast.Subscript):
+            origin = self.qualified_name(node.value)
+            args = list(node.slice.elts) if isinstance(node.slice, ast.Tuple) else [node.slice]
+            if origin in _LIST_TYPES and len(args) == 1:
+                return {"items": self.schema(args[0]), "type": "array"}
+            if origin in _DICT_TYPES and len(args) == 2 and self.qualified_name(args[0]) == "builtins.str":
+                values = self.schema(args[1])
+                return {"additionalProperties": values, "type": "object"} if values else {"type": "object"}
+            if origin == "typing.Optional" and len(args) == 1:
+                return self._union([args[0], ast.Constant(None)])
+            if origin == "typing.Union":
+                return self._union(args)
+            raise _Unresolved(f"{ast.unparse(node)} is not a plain type")
+        name = self.qualified_name(node)
+        if name in _LIST_TYPES:
+            return {"items": {}, "type": "array"}
+        if name in _DICT_TYPES:
+            return {"type": "object"}
+        if name not in _SCALAR_SCHEMAS:
+            raise _Unresolved(f"{ast.unparse(node)} is not a plain type")
+        return dict(_SCALAR_SCHEMAS[name])
+
+    def _union(self, members: list[ast.expr]) -> dict:
+        variants = []
+        for member in members:
+            schema = self.schema(member)
+            for variant in schema.get("anyOf", [schema]):
+                if not variant:
+                    raise _Unresolved("unions with Any are not plain types")
+                if variant not in variants:
+                    variants.append(variant)
+        return {"anyOf": variants} if len(variants) > 1 else variants[0]
+
+
+def _literal_default(node: ast.expr) -> object:
+    try:
+        value = ast.literal_eval(node)
+        if json.loads(json.dumps(value)) == value:
+            return value
+    except (TypeError, ValueError):
+        pass
+    raise _Unresolved(f"{ast.unparse(node)} is not a JSON literal")
+
+
+def _field_schema(resolver: _AnnotationResolver, name: str, value: ast.expr | None) -> tuple[dict, bool]:
+    """The JSON schema of a field, and whether the field is required."""
+    field = {}
+    required = value is None or (isinstance(value, ast.Constant) and value.value is Ellipsis)
+    if isinstance(value, ast.Call) and resolver.qualified_name(value.func) == "pydantic.Field":
+        if len(value.args) > 1 or any(keyword.arg not in ("default", "default_factory", "description", "title") for keyword in value.keywords):
+            raise _Unresolved(f"{ast.unparse(value)} sets more than a default, title or description")
+        keywords = {keyword.arg: keyword.value for keyword in value.keywords}
+        default = value.args[0] if value.args else keywords.get("default")
+        for key in ("description", "title"):
+            if key in keywords:
+                field[key] = _literal_default(keywords[key])
+        if default is not None and not (isinstance(default, ast.Constant) and default.value is Ellipsis):
+            field["default"] = _literal_default(default)
+        required = (default is None and "default_factory" not in keywords) or (isinstance(default, ast.Constant) and default.value is Ellipsis)
+    elif not required:
+        field["default"] = _literal_default(value)
+    field.setdefault("title", name.title().replace("_", " "))
+    return field, required
+
+
+def _ast_schema(tree: ast.Module, class_name: str) -> dict:
+    """Build the JSON schema of a pydantic model straight from its class definition, without running any code.
+
+    Only handles models whose body is a docstring and fields annotated with builtins, typing unions and
+    containers (or same-file aliases of them), with literal or `Field(...)` defaults. Raises `_Unresolved`
+    for anything else.
+    """
+    resolver = _AnnotationResolver(tree)
+    cls = resolver.definitions.get(class_name)
+    if not isinstance(cls, ast.ClassDef):
+        raise _Unresolved(f"{class_name} is not a class defined in this module")
+    if cls.decorator_list or cls.keywords or cls.type_params or [resolver.qualified_name(base) for base in cls.bases] != [_BASE_MODEL]:
+        raise _Unresolved(f"{class_name} is not a plain pydantic model")
+
+    schema = {}
+    body = cls.body
+    if body and isinstance(body[0], ast.Expr) and isinstance(body[0].value, ast.Constant) and isinstance(body[0].value.value, str):
+        schema["description"] = inspect.cleandoc(body[0].value.value)
+        body = body[1:]
+    properties, required = {}, []
+    for stmt in body:
+        if isinstance(stmt, ast.Pass):
+            continue
+        if not isinstance(stmt, ast.AnnAssign) or not isinstance(stmt.target, ast.Name) or stmt.target.id.startswith("_"):
+            raise _Unresolved(f"{class_name} has statements other than fields")
+        field, is_required = _field_schema(resolver, stmt.target.id, stmt.value)
+        properties[stmt.target.id] = resolver.schema(stmt.annotation) | field
+        if is_required:
+            required.append(stmt.target.id)
+    schema["properties"] = properties
+    if required:
+        schema["required"] = required
+    return schema | {"title": class_name, "type": "object"}
+
+
+def _build_standalone_source(tree: ast.Module, class_name: str) -> str:
+    """Rebuild the minimal module needed to define `class_name`: its safe imports and same-file dependencies."""
+    definitions, imports = _module_definitions(tree)
+    if not isinstance(definitions.get(class_name), ast.ClassDef):
+        raise _Unresolved(f"{class_name} is not a class defined in this module")
+
+    needed: set[int] = set()
+    pending = [definitions[class_name]]
+    while pending:
+        stmt = pending.pop()
+        if id(stmt) in needed:
+            continue
+        needed.add(id(stmt))
+        for name in _loaded_names(stmt):
+            if name in definitions:
+                pending.append(definitions[name])
+            elif name in imports:
+                if not _is_safe_import(imports[name]):
+                    raise _Unresolved(f"{name} is imported from another module")
+                needed.add(id(imports[name]))
+            elif not hasattr(builtins, name):
+                raise _Unresolved(f"{name} is not defined in this module")
+
+    future = [stmt for stmt in tree.body if isinstance(stmt, ast.ImportFrom) and stmt.module == "__future__"]
+    body = future + [stmt for stmt in tree.body if id(stmt) in needed and stmt not in future]
+    return ast.unparse(ast.Module(body=body, type_ignores=[]))
+
+
+def _static_schema(content: bytes, filepath: Path, class_name: str) -> dict:
+    """Build the schema from the class definition alone, without executing the rest of the module.
+
+    The rebuilt class still runs code (its body, defaults and same-file dependencies), so it is
+    imported in a separate interpreter too; it just skips the module's other imports and side effects.
+    """
+    source = _build_standalone_source(ast.parse(content), class_name)
+    with tempfile.TemporaryDirectory() as tmp:
+        module_path = Path(tmp) / filepath.name
+        module_path.write_text(source, encoding="utf-8")
+        return _run_import_script(module_path, class_name)
+
+
+def _import_schema(content: bytes, filepath: Path, class_name: str) -> dict:
+    """Import the module in a separate interpreter so its side effects don't leak into the CLI process.
+
+    If the file on disk doesn't hold `content` (e.g. the function was found at another git ref), the
+    content is written to a temporary file with the same name and imported from there.
+    """
+    try:
+        on_disk = filepath.read_bytes() == content
+    except OSError:
+        on_disk = False
+    if on_disk:
+        return _run_import_script(filepath, class_name)
+    with tempfile.TemporaryDirectory() as tmp:
+        module_path = Path(tmp) / filepath.name
+        module_path.write_bytes(content)
+        return _run_import_script(module_path, class_name)
+
+
+def _run_import_script(filepath: Path, class_name: str) -> dict:
+    result = subprocess.run([sys.executable, "-c", _IMPORT_SCRIPT, str(filepath), class_name], capture_output=True, text=True, timeout=IMPORT_TIMEOUT_SECONDS)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else f"exited with code {result.returncode}")
+    return json.loads(result.stdout)
+
+
+def _get_cache_path(content_hash: str, class_name: str) -> Path | None:
+    if not (Path.cwd() / CODEGEN_DIR).exists():
+        return None
+    return Path.cwd() / SCHEMA_CACHE_DIR / f"{content_hash}-{class_name}.json"
+
+
+def get_arguments_type_schema(content: bytes, filepath: Path, class_name: str) -> dict | None:
+    """Get the JSON schema of the pydantic class used to annotate a function's `arguments` parameter.
+
+    Plain models (builtin and typing annotations with literal defaults) are translated straight from
+    the module's AST. Otherwise the class is rebuilt from the AST when it only depends on same-file
+    definitions and pydantic/typing imports, and only that is imported; failing that, the whole module
+    is. Either import happens in a subprocess. Results are cached on disk keyed by the module's content hash.
+    """
+    cache_path = _get_cache_path(hash_content(content), class_name)
+    if cache_path and cache_path.exists():
+        try:
+            return json.loads(cache_path.read_text())
+        except ValueError:
+            pass
+
+    try:
+        try:
+            schema = _ast_schema(ast.parse(content), class_name)
+        except _Unresolved:
+            # Not a plain model (validators, nested models, custom types, ...): fall back to importing it
+            try:
+                schema = _static_schema(content, filepath, class_name)
+            except Exception:
+                # Depends on other modules (or doesn't rebuild cleanly on its own): fall back to a real import
+                schema = _import_schema(content, filepath, class_name)
+    except Exception as e:
+        rich.print(f"[yellow]⚠ Could not introspect the arguments parameter in {escape(str(filepath))}:[/yellow] {escape(str(e))}")
+        return None
+
+    if cache_path:
+        make_cache_dir(cache_path.parent)
+        cache_path.write_text(json.dumps(schema))
+    return schema
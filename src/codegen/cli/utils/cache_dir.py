@@ -0,0 +1,30 @@
+import math
+from pathlib import Path
+
+from codegen.cli.auth.constants import CACHE_DIR
+
+# Written at the top of every .codegen/cache, so workspaces initialized before `cache` was added to
+# .codegen/.gitignore don't show cached files as untracked
+CACHE_GITIGNORE = "*\n"
+
+
+def make_cache_dir(directory: Path) -> None:
+    """Create `directory`, and a .gitignore ignoring everything in the .codegen/cache directory it's in (if any)."""
+    directory.mkdir(parents=True, exist_ok=True)
+    for path in (directory, *directory.parents):
+        if path.parts[-len(CACHE_DIR.parts) :] == CACHE_DIR.parts:
+            gitignore = path / ".gitignore"
+            if not gitignore.exists():
+                gitignore.write_text(CACHE_GITIGNORE)
+            return
+
+
+def cache_size_cap(megabytes: str | None, default: int) -> int:
+    """A cache's size cap in bytes, from a setting in MiB. Anything but a finite, positive size gives `default`."""
+    try:
+        size = float(megabytes) * 2**20
+    except (TypeError, ValueError):
+        return default
+    if not math.isfinite(size) or size <= 0:
+        return default
+    return max(1, int(size))
@@ -1,21 +1,202 @@
 import builtins
+import mmap
+import os
+from collections import deque
+from collections.abc import Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
 from pathlib import Path
 
-from codegen.cli.utils.function_finder import DecoratedFunction, find_codegen_functions
+from pygit2 import Commit, GitError, Tree
 
+from codegen.cli.auth.session import CodegenSession
+from codegen.cli.git.files import iter_repo_files, iter_tree_blobs
+from codegen.cli.git.folder import get_git_folder
+from codegen.cli.git.repo import get_git_repo
+from codegen.cli.utils.discovery_index import MMAP_MIN_SIZE, DiscoveryIndex, get_discovery_index, hash_content
+from codegen.cli.utils.function_finder import BlobSource, DecoratedFunction, find_codegen_functions
+from codegen.cli.utils.path_matcher import PathMatcher
 
-def _might_have_decorators(file_path: Path) -> bool:
+# Directories to skip when walking a directory that is not in a git repository
+SKIP_DIRS = {
+    "__pycache__",
+    "node_modules",
+    ".git",
+    ".hg",
+    ".svn",
+    ".tox",
+    ".venv",
+    "venv",
+    "env",
+    "build",
+    "dist",
+    "site-packages",
+    ".pytest_cache",
+    ".mypy_cache",
+    ".ruff_cache",
+    ".coverage",
+    "htmlcov",
+    ".codegen-sh",
+}
+
+# Below this many files left to check, the cost of starting a process pool outweighs parallel parsing
+PARALLEL_MIN_FILES = 512
+# With `jobs` unset, a scan starts serial and moves to a process pool once it has parsed this many changed files
+PARALLEL_SWITCH_FILES = 64
+# Files a parallel scan checks ahead of the one being yielded, per worker
+LOOKAHEAD_PER_JOB = 4
+
+ScanResult = tuple[os.stat_result, str, list[DecoratedFunction]]
+
+# Marks a stale file in the lookahead window that is parsed in-process when it is reached
+_PARSE_INLINE = object()
+
+
+def _might_have_decorators(content: bytes | mmap.mmap) -> bool:
     """Quick check if a file might contain codegen decorators.
 
     This is a fast pre-filter that checks if '@codegen' appears anywhere in the file.
     Much faster than parsing the AST for files that definitely don't have decorators.
     """
+    # Check the raw bytes for b'@codegen' to handle any encoding
+    return content.find(b"@codegen") != -1
+
+
+def _iter_python_files(start_path: Path, matcher: PathMatcher) -> Iterator[Path]:
+    """Iterate the Python files under a directory, using the git index when inside a repository."""
+    git_folder = get_git_folder(start_path)
+    if git_folder is None:
+        yield from _walk_python_files(start_path, matcher)
+        return
+
+    repo = get_git_repo(git_folder)
+    prefix = start_path.relative_to(git_folder).as_posix()
+    prefix = "" if prefix == "." else f"{prefix}/"
+    for path in iter_repo_files(repo, suffix=".py"):
+        if path.startswith(prefix) and matcher.matches(path):
+            yield git_folder / path
+
+
+def _walk_python_files(root: Path, matcher: PathMatcher) -> Iterator[Path]:
+    """Walk a directory outside of git, pruning skipped and excluded directories before descending into them."""
+    for dirpath, dirnames, filenames in os.walk(root):
+        rel_dir = os.path.relpath(dirpath, root)
+        rel_dir = "" if rel_dir == "." else f"{Path(rel_dir).as_posix()}/"
+        dirnames[:] = [name for name in dirnames if name not in SKIP_DIRS and not matcher.excludes_dir(f"{rel_dir}{name}")]
+        for filename in filenames:
+            if filename.endswith(".py") and matcher.matches(f"{rel_dir}{filename}"):
+                yield Path(dirpath) / filename
+
+
+def _scan_file(path: Path) -> ScanResult | None:
+    """Read, pre-filter and parse a single file, reading it only once.
+
+    Large files are memory-mapped, so they are only copied into memory if they might contain a decorator.
+    Runs in a worker process when discovery is parallel, so it must stay a module-level function.
+    """
     try:
-        # Read in binary mode and check for b'@codegen' to handle any encoding
-        with open(file_path, "rb") as f:
-            return b"@codegen" in f.read()
-    except Exception:
-        return False
+        with open(path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            if stat.st_size < MMAP_MIN_SIZE:
+                content = f.read()
+                if not _might_have_decorators(content):
+                    content = None
+            else:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                    content = buffer[:] if _might_have_decorators(buffer) else None
+    except (OSError, ValueError):
+        return None
+
+    # Files without decorators are cheaper to re-probe than to hash, so only candidates get a content hash
+    content_hash = hash_content(content) if content is not None else ""
+    functions = []
+    if content is not None:
+        try:
+            functions = find_codegen_functions(path, content, stamp=(stat.st_mtime_ns, stat.st_size))
+        except Exception as e:
+            pass  # Skip files we can't parse
+    return stat, content_hash, functions
+
+
+def _is_stale(path: Path, index: DiscoveryIndex) -> bool:
+    try:
+        return not index.is_fresh(path, path.stat())
+    except OSError:
+        return True
+
+
+def _iter_scanned(paths: list[Path], index: DiscoveryIndex, jobs: int | None = None) -> Iterator[tuple[Path, bool, ScanResult | None]]:
+    """Check files against the index and parse the changed ones, yielding (path, stale, scan result) in input order.
+
+    Files are stat-ed and parsed as they are reached. A parallel scan only runs a few files per worker
+    ahead of the one being yielded, so stopping early still skips the rest of the tree. With `jobs` unset,
+    the scan moves to a process pool once enough files turned out to have changed.
+    """
+    workers = jobs if jobs is not None else os.process_cpu_count() or 1
+    executor: ProcessPoolExecutor | None = None
+    # Checked files not yielded yet, with their pending parse: None if fresh, a future, or _PARSE_INLINE
+    window: deque[tuple[Path, Future | object | None]] = deque()
+    position = parsed = 0
+    try:
+        while position < len(paths) or window:
+            if executor is None and jobs is None and workers > 1 and parsed >= PARALLEL_SWITCH_FILES and len(paths) - position >= PARALLEL_MIN_FILES:
+                executor = ProcessPoolExecutor(max_workers=workers)
+            while position < len(paths) and len(window) < (workers * LOOKAHEAD_PER_JOB if executor else 1):
+                path = paths[position]
+                position += 1
+                if not _is_stale(path, index):
+                    window.append((path, None))
+                    continue
+                if executor is None and jobs is not None and jobs > 1:
+                    executor = ProcessPoolExecutor(max_workers=jobs)
+                window.append((path, executor.submit(_scan_file, path) if executor else _PARSE_INLINE))
+
+            path, parse = window.popleft()
+            if parse is None:
+                yield path, False, None
+                continue
+            parsed += 1
+            yield path, True, _scan_file(path) if parse is _PARSE_INLINE else parse.result()
+    finally:
+        if executor is not None:
+            # Cancel whatever hasn't started if the caller stopped consuming results early
+            executor.shutdown(cancel_futures=True)
+
+
+def _iter_decorated_at_ref(ref: str, start_path: Path, matcher: PathMatcher) -> Iterator[DecoratedFunction]:
+    """Find decorated functions in the tree of a git ref, reading blobs straight from the object database."""
+    git_folder = get_git_folder(start_path)
+    if git_folder is None:
+        raise ValueError(f"Searching a git ref requires a git repository, but {start_path} is not in one")
+    repo = get_git_repo(git_folder)
+    try:
+        tree = repo.revparse_single(ref).peel(Commit).tree
+    except (KeyError, ValueError, GitError) as e:
+        raise ValueError(f"Unknown git ref '{ref}'") from e
+
+    prefix = start_path.relative_to(git_folder).as_posix()
+    if prefix == ".":
+        prefix, blobs = "", iter_tree_blobs(tree, ".py")
+    else:
+        try:
+            entry = tree[prefix]
+        except KeyError:
+            return
+        if isinstance(entry, Tree):
+            blobs = iter_tree_blobs(entry, ".py", f"{prefix}/")
+        else:
+            # A single file is searched regardless of the include/exclude globs, like in the working tree
+            blobs, matcher = [(prefix, entry)] if prefix.endswith(".py") else [], PathMatcher()
+
+    for path, blob in sorted(blobs, key=lambda item: item[0]):
+        if not matcher.matches(path):
+            continue
+        content = blob.data
+        if not _might_have_decorators(content):
+            continue
+        try:
+            yield from find_codegen_functions(git_folder / path, content, handle=BlobSource(blob))
+        except Exception:
+            pass  # Skip files we can't parse
 
 
 class CodemodManager:
@@ -26,103 +207,136 @@ class CodemodManager:
         return name.lower().replace(" ", "_").replace("-", "_")
 
     @classmethod
-    def list(cls, start_path: Path | None = None) -> builtins.list[DecoratedFunction]:
+    def list(cls, start_path: Path | None = None, jobs: int | None = None) -> builtins.list[DecoratedFunction]:
         """List all codegen decorated functions in Python files under the given path.
 
         This is an alias for get_decorated for better readability.
         """
-        return cls.get_decorated(start_path)
+        return cls.get_decorated(start_path, jobs=jobs)
 
     @classmethod
-    def get(cls, name: str, start_path: Path | None = None) -> DecoratedFunction | None:
+    def get(cls, name: str, start_path: Path | None = None, jobs: int | None = None, ref: str | None = None) -> DecoratedFunction | None:
         """Get a specific codegen decorated function by name.
 
+        Stops scanning at the first match, in file path order. Use `find` to detect duplicates.
+
         Args:
             name: Name of the function to find (case-insensitive, spaces/hyphens converted to underscores)
             start_path: Directory or file to start searching from. Defaults to current working directory.
+            jobs: Number of processes used to parse changed files.
+            ref: Git ref (commit, branch or tag) to search instead of the working tree.
 
         Returns:
             The DecoratedFunction if found, None otherwise
 
         """
         valid_name = cls.get_valid_name(name)
-        functions = cls.get_decorated(start_path)
+        return next((func for func in cls.iter_decorated(start_path, jobs=jobs, ref=ref) if cls.get_valid_name(func.name) == valid_name), None)
 
-        for func in functions:
-            if cls.get_valid_name(func.name) == valid_name:
-                return func
-        return None
+    @classmethod
+    def find(cls, name: str, start_path: Path | None = None, jobs: int | None = None, ref: str | None = None) -> builtins.list[DecoratedFunction]:
+        """Find every codegen decorated function with the given name, scanning the whole tree.
+
+        Args:
+            name: Name of the functions to find (case-insensitive, spaces/hyphens converted to underscores)
+            start_path: Directory or file to start searching from. Defaults to current working directory.
+            jobs: Number of processes used to parse changed files.
+            ref: Git ref (commit, branch or tag) to search instead of the working tree.
+
+        Returns:
+            All matching DecoratedFunction objects, ordered by file path
+
+        """
+        valid_name = cls.get_valid_name(name)
+        return [func for func in cls.iter_decorated(start_path, jobs=jobs, ref=ref) if cls.get_valid_name(func.name) == valid_name]
 
     @classmethod
-    def exists(cls, name: str, start_path: Path | None = None) -> bool:
+    def exists(cls, name: str, start_path: Path | None = None, jobs: int | None = None) -> bool:
         """Check if a codegen decorated function with the given name exists.
 
         Args:
             name: Name of the function to check (case-insensitive, spaces/hyphens converted to underscores)
             start_path: Directory or file to start searching from. Defaults to current working directory.
+            jobs: Number of processes used to parse changed files.
 
         Returns:
             True if the function exists, False otherwise
 
         """
-        return cls.get(name, start_path) is not None
+        return cls.get(name, start_path, jobs=jobs) is not None
 
     @classmethod
-    def get_decorated(cls, start_path: Path | None = None) -> builtins.list[DecoratedFunction]:
+    def get_decorated(
+        cls, start_path: Path | None = None, index: DiscoveryIndex | None = None, jobs: int | None = None, matcher: PathMatcher | None = None, ref: str | None = None
+    ) -> builtins.list[DecoratedFunction]:
         """Find all codegen decorated functions in Python files under the given path.
 
         Args:
             start_path: Directory or file to start searching from. Defaults to current working directory.
+            index: Discovery index used to skip unchanged files. Defaults to the index in the codegen folder.
+            jobs: Number of processes used to parse changed files. Defaults to all cores for large scans.
+            matcher: Include/exclude globs to apply. Defaults to the `[discovery]` section of the codegen config.
+            ref: Git ref (commit, branch or tag) to search instead of the working tree.
 
         Returns:
-            List of DecoratedFunction objects found in the files
+            List of DecoratedFunction objects found in the files, ordered by file path
+
+        """
+        return builtins.list(cls.iter_decorated(start_path, index=index, jobs=jobs, matcher=matcher, ref=ref))
+
+    @classmethod
+    def iter_decorated(
+        cls, start_path: Path | None = None, index: DiscoveryIndex | None = None, jobs: int | None = None, matcher: PathMatcher | None = None, ref: str | None = None
+    ) -> Iterator[DecoratedFunction]:
+        """Yield codegen decorated functions as files are scanned, in file path order.
+
+        Inside a git repository only tracked files and untracked files that are not ignored are searched.
+        Files are only checked against the index and parsed as the generator is consumed, so stopping early
+        skips the rest of the scan.
+        Whatever was parsed is still recorded in the discovery index.
+
+        Args:
+            start_path: Directory or file to start searching from. Defaults to current working directory.
+            index: Discovery index used to skip unchanged files. Defaults to the index in the codegen folder.
+            jobs: Number of processes used to parse changed files. Defaults to all cores for large scans.
+            matcher: Include/exclude globs to apply. Defaults to the `[discovery]` section of the codegen config.
+            ref: Git ref (commit, branch or tag) to search instead of the working tree. Blobs are read from the
+                object database directly, so nothing is checked out; the discovery index and `jobs` are not used.
 
         """
         if start_path is None:
             start_path = Path.cwd()
+        start_path = start_path.absolute()
+        if matcher is None:
+            discovery_config = CodegenSession.current().config.discovery
+            matcher = PathMatcher(discovery_config.include, discovery_config.exclude)
+        if ref is not None:
+            yield from _iter_decorated_at_ref(ref, start_path, matcher)
+            return
+        if index is None:
+            index = get_discovery_index()
 
-        # Directories to skip
-        SKIP_DIRS = {
-            "__pycache__",
-            "node_modules",
-            ".git",
-            ".hg",
-            ".svn",
-            ".tox",
-            ".venv",
-            "venv",
-            "env",
-            "build",
-            "dist",
-            "site-packages",
-            ".pytest_cache",
-            ".mypy_cache",
-            ".ruff_cache",
-            ".coverage",
-            "htmlcov",
-            ".codegen-sh",
-        }
-
-        all_functions = []
         if start_path.is_file():
             # If it's a file, just check that one
-            if start_path.suffix == ".py" and _might_have_decorators(start_path):
-                try:
-                    functions = find_codegen_functions(start_path)
-                    all_functions.extend(functions)
-                except Exception as e:
-                    pass  # Skip files we can't parse
+            paths = [start_path] if start_path.suffix == ".py" else []
         else:
-            # Walk the directory tree, skipping irrelevant directories
-            for path in start_path.rglob("*.py"):
-                # Skip if any parent directory is in SKIP_DIRS
-                if any(part in SKIP_DIRS for part in path.parts):
+            paths = sorted(_iter_python_files(start_path, matcher))
+
+        # Only files that changed since the last scan are read and parsed
+        scan_results = _iter_scanned(paths, index, jobs)
+        try:
+            for path, stale, result in scan_results:
+                if not stale:
+                    yield from index.get_functions(path)
+                    continue
+                if result is None:
                     continue
+                stat, content_hash, functions = result
+                index.update(path, stat, content_hash, functions)
+                yield from functions
 
-                if _might_have_decorators(path):
-                    try:
-                        functions = find_codegen_functions(path)
-                        all_functions.extend(functions)
-                    except Exception as e:
-                        pass  # Skip files we can't parse
-        return all_functions
+            if not start_path.is_file():
+                index.prune(start_path, {str(path) for path in paths})
+        finally:
+            scan_results.close()
+            index.save()
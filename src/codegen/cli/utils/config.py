@@ -1,13 +1,20 @@
 from pathlib import Path
 
-import toml
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+
+
+class DiscoveryConfig(BaseModel):
+    """Globs (relative to the repository root) limiting where codegen functions are searched for."""
+
+    include: list[str] = Field(default_factory=list)
+    exclude: list[str] = Field(default_factory=list)
 
 
 class Config(BaseModel):
     repo_name: str = ""
     organization_name: str = ""
     programming_language: str | None = None
+    discovery: DiscoveryConfig = Field(default_factory=DiscoveryConfig)
 
     @property
     def repo_full_name(self) -> str:
@@ -20,6 +27,8 @@ CONFIG_PATH = "config.toml"
 def read_model[T: BaseModel](model: type[T], path: Path) -> T:
     if not path.exists():
         return model()
+    import toml
+
     return model.model_validate(toml.load(path))
 
 
@@ -28,12 +37,16 @@ def get_config(codegen_dir: Path) -> Config:
     return read_model(Config, config_path)
 
 
-def write_model(model: BaseModel, path: Path) -> None:
+def write_model(model: BaseModel, path: Path, exclude: set[str] | None = None) -> None:
+    import toml
+
     path.parent.mkdir(parents=True, exist_ok=True)
     with path.open("w") as f:
-        toml.dump(model.model_dump(), f)
+        toml.dump(model.model_dump(exclude=exclude), f)
 
 
 def write_config(config: Config, codegen_dir: Path) -> None:
     config_path = codegen_dir / CONFIG_PATH
-    write_model(config, config_path)
+    # Don't write an empty [discovery] table into every config
+    exclude = {"discovery"} if config.discovery == DiscoveryConfig() else None
+    write_model(config, config_path, exclude=exclude)
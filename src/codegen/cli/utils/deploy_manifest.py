@@ -0,0 +1,118 @@
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from codegen.cli.api.schemas import DeployResponse
+from codegen.cli.auth.constants import CODEGEN_DIR, DEPLOY_MANIFEST_FILE
+from codegen.cli.utils.cache_dir import make_cache_dir
+from codegen.cli.utils.discovery_index import hash_content
+from codegen.cli.utils.function_finder import DecoratedFunction
+
+MANIFEST_VERSION = 1
+
+
+@dataclass
+class ManifestEntry:
+    """What was last deployed for a function, and what the server returned for it."""
+
+    source_hash: str
+    arguments_schema_hash: str
+    lint_mode: bool
+    lint_user_whitelist: list[str] = field(default_factory=list)
+    codemod_id: int | None = None
+    version_id: int | None = None
+    deployed_at: float | None = None
+
+    def matches(self, other: "ManifestEntry") -> bool:
+        return (self.source_hash, self.arguments_schema_hash, self.lint_mode, self.lint_user_whitelist) == (
+            other.source_hash,
+            other.arguments_schema_hash,
+            other.lint_mode,
+            other.lint_user_whitelist,
+        )
+
+
+def fingerprint(func: DecoratedFunction) -> ManifestEntry:
+    """Content-addressed description of what deploying `func` would upload."""
+    schema = func.arguments_type_schema
+    return ManifestEntry(
+        source_hash=hash_content(func.source.encode()),
+        arguments_schema_hash=hash_content(json.dumps(schema, sort_keys=True).encode()) if schema is not None else "",
+        lint_mode=func.lint_mode,
+        lint_user_whitelist=sorted(func.lint_user_whitelist),
+    )
+
+
+class DeployManifest:
+    """Local record of deployed functions, used to skip re-uploading functions that haven't changed.
+
+    Entries are grouped by scope (the deploy endpoint and repository), so deploying the same folder to
+    another environment or repository still uploads everything once.
+    """
+
+    def __init__(self, path: Path | None = None, scope: str = "", scopes: dict[str, dict[str, ManifestEntry]] | None = None):
+        self.path = path
+        self.scope = scope
+        self.scopes: dict[str, dict[str, ManifestEntry]] = scopes or {}
+        self._dirty = False
+
+    @classmethod
+    def load(cls, path: Path, scope: str) -> "DeployManifest":
+        """Load the manifest from disk, returning an empty manifest if it is missing or unreadable."""
+        try:
+            with open(path) as f:
+                data = json.load(f)
+            if data.get("version") != MANIFEST_VERSION:
+                return cls(path, scope)
+            scopes = {key: {name: ManifestEntry(**entry) for name, entry in entries.items()} for key, entries in data["scopes"].items()}
+            return cls(path, scope, scopes)
+        except (OSError, ValueError, KeyError, TypeError):
+            return cls(path, scope)
+
+    @property
+    def entries(self) -> dict[str, ManifestEntry]:
+        return self.scopes.setdefault(self.scope, {})
+
+    def get(self, name: str) -> ManifestEntry | None:
+        return self.entries.get(name)
+
+    def is_current(self, name: str, entry: ManifestEntry) -> bool:
+        """Whether `entry` is what was last deployed under `name`."""
+        deployed = self.get(name)
+        return deployed is not None and deployed.matches(entry)
+
+    def record(self, name: str, entry: ManifestEntry, response: DeployResponse) -> None:
+        """Record a successful deploy."""
+        entry.codemod_id = response.codemod_id
+        entry.version_id = response.version_id
+        entry.deployed_at = time.time()
+        self.entries[name] = entry
+        self._dirty = True
+
+    def save(self) -> None:
+        """Write the manifest to disk if anything changed. In-memory manifests (no path) are never saved."""
+        if self.path is None or not self._dirty:
+            return
+        data = {
+            "version": MANIFEST_VERSION,
+            "scopes": {key: {name: entry.__dict__ for name, entry in entries.items()} for key, entries in self.scopes.items()},
+        }
+        make_cache_dir(self.path.parent)
+        tmp_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+
+
+def get_deploy_manifest(scope: str, base_dir: Path | None = None) -> DeployManifest:
+    """Get the deploy manifest for the codegen folder under `base_dir` (defaults to cwd).
+
+    Outside of an initialized codegen folder the manifest is kept in memory only.
+    """
+    base_dir = base_dir or Path.cwd()
+    if not (base_dir / CODEGEN_DIR).exists():
+        return DeployManifest(scope=scope)
+    return DeployManifest.load(base_dir / DEPLOY_MANIFEST_FILE, scope)
@@ -0,0 +1,217 @@
+import hashlib
+import json
+import mmap
+import os
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from codegen.cli.auth.constants import CODEGEN_DIR, INDEX_FILE
+from codegen.cli.utils.cache_dir import make_cache_dir
+from codegen.cli.utils.function_finder import DecoratedFunction, FileSource, SourceSpan
+from codegen.cli.utils.stamp import file_stamp
+
+INDEX_VERSION = 4
+
+# Files at least this large are memory-mapped instead of read into memory
+MMAP_MIN_SIZE = 256 * 1024
+
+
+def hash_content(content: bytes | mmap.mmap) -> str:
+    """Content hash used as a fallback when a file's mtime/size changed."""
+    return hashlib.blake2b(content, digest_size=16).hexdigest()
+
+
+def hash_file(filepath: Path) -> str:
+    with open(filepath, "rb") as f:
+        if os.fstat(f.fileno()).st_size < MMAP_MIN_SIZE:
+            return hash_content(f.read())
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            return hash_content(buffer)
+
+
+@dataclass
+class IndexEntry:
+    """Cached discovery result for a single Python file."""
+
+    mtime_ns: int
+    size: int
+    # Only set for files that contain '@codegen'; others are re-probed when their stat changes
+    content_hash: str
+    functions: list[dict] = field(default_factory=list)
+
+    def matches_stat(self, stat: os.stat_result) -> bool:
+        return self.mtime_ns == stat.st_mtime_ns and self.size == stat.st_size
+
+
+@dataclass
+class IndexStats:
+    path: Path | None
+    files: int
+    files_with_functions: int
+    functions: int
+    size_bytes: int
+    updated_at: float | None
+
+
+def _serialize_function(func: DecoratedFunction) -> dict:
+    return {
+        "name": func.name,
+        "lint_mode": func.lint_mode,
+        "lint_user_whitelist": func.lint_user_whitelist,
+        "shardable": func.shardable,
+        "span": func.span,
+        "lineno": func.lineno,
+        "encoding": func.encoding,
+    }
+
+
+def _deserialize_function(data: dict, filepath: Path, handle: FileSource) -> DecoratedFunction:
+    return DecoratedFunction(
+        name=data["name"],
+        lint_mode=data["lint_mode"],
+        lint_user_whitelist=data["lint_user_whitelist"],
+        shardable=data["shardable"],
+        filepath=filepath,
+        span=SourceSpan(*data["span"]),
+        lineno=data["lineno"],
+        encoding=data["encoding"],
+        handle=handle,
+    )
+
+
+class DiscoveryIndex:
+    """Persistent cache of decorated functions keyed by file path + mtime + size.
+
+    Files whose stat changed are re-hashed before being re-parsed, so a touch or a
+    checkout that leaves the content identical is still a cache hit.
+    """
+
+    def __init__(self, path: Path | None = None, entries: dict[str, IndexEntry] | None = None, updated_at: float | None = None):
+        self.path = path
+        self.entries: dict[str, IndexEntry] = entries or {}
+        self.updated_at = updated_at
+        self._dirty = False
+        # Stamp of the file this index was loaded from or last saved to
+        self.file_stamp: tuple[int, int] | None = None
+
+    @classmethod
+    def load(cls, path: Path) -> "DiscoveryIndex":
+        """Load the index from disk, returning an empty index if it is missing or unreadable."""
+        stamp = file_stamp(path)
+        try:
+            with open(path) as f:
+                data = json.load(f)
+            if data.get("version") != INDEX_VERSION:
+                return cls(path)
+            entries = {key: IndexEntry(**value) for key, value in data["entries"].items()}
+            index = cls(path, entries, data.get("updated_at"))
+        except (OSError, ValueError, KeyError, TypeError):
+            return cls(path)
+        index.file_stamp = stamp
+        return index
+
+    def is_fresh(self, filepath: Path, stat: os.stat_result) -> bool:
+        """Whether the cached entry for a file is still valid, falling back to its content hash if the stat changed."""
+        entry = self.entries.get(str(filepath))
+        if entry is None:
+            return False
+        if entry.matches_stat(stat):
+            return True
+        if not entry.content_hash:
+            return False
+        try:
+            content_hash = hash_file(filepath)
+        except OSError:
+            return False
+        if content_hash != entry.content_hash:
+            return False
+        # Same content, new stat (e.g. a fresh checkout): refresh the key
+        entry.mtime_ns, entry.size = stat.st_mtime_ns, stat.st_size
+        self._dirty = True
+        return True
+
+    def get_functions(self, filepath: Path) -> list[DecoratedFunction]:
+        entry = self.entries.get(str(filepath))
+        if not entry:
+            return []
+        # The functions' spans are only valid for the version of the file the entry was made from
+        handle = FileSource(filepath, (entry.mtime_ns, entry.size))
+        return [_deserialize_function(f, filepath, handle) for f in entry.functions]
+
+    def lookup(self, filepath: Path, stat: os.stat_result) -> list[DecoratedFunction] | None:
+        """Return the cached functions for a file, or None if it needs to be re-parsed."""
+        if not self.is_fresh(filepath, stat):
+            return None
+        return self.get_functions(filepath)
+
+    def update(self, filepath: Path, stat: os.stat_result, content_hash: str, functions: list[DecoratedFunction]) -> None:
+        """Record the discovery result for a freshly parsed file."""
+        self.entries[str(filepath)] = IndexEntry(
+            mtime_ns=stat.st_mtime_ns,
+            size=stat.st_size,
+            content_hash=content_hash,
+            functions=[_serialize_function(f) for f in functions],
+        )
+        self._dirty = True
+
+    def prune(self, root: Path, seen: set[str]) -> None:
+        """Drop entries under `root` that were not seen during a full scan of it."""
+        prefix = str(root)
+        stale = [key for key in self.entries if key not in seen and (key == prefix or key.startswith(prefix + os.sep))]
+        for key in stale:
+            del self.entries[key]
+        self._dirty = self._dirty or bool(stale)
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self._dirty = True
+
+    def save(self) -> None:
+        """Write the index to disk if anything changed. In-memory indexes (no path) are never saved."""
+        if self.path is None or not self._dirty:
+            return
+        self.updated_at = time.time()
+        data = {
+            "version": INDEX_VERSION,
+            "updated_at": self.updated_at,
+            "entries": {key: entry.__dict__ for key, entry in self.entries.items()},
+        }
+        make_cache_dir(self.path.parent)
+        tmp_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+        self.file_stamp = file_stamp(self.path)
+
+    def stats(self) -> IndexStats:
+        return IndexStats(
+            path=self.path,
+            files=len(self.entries),
+            files_with_functions=sum(1 for entry in self.entries.values() if entry.functions),
+            functions=sum(len(entry.functions) for entry in self.entries.values()),
+            size_bytes=self.path.stat().st_size if self.path and self.path.exists() else 0,
+            updated_at=self.updated_at,
+        )
+
+
+# Indexes loaded by this process, by path. Long-lived processes (the daemon) reuse them while the file is unchanged.
+_loaded_indexes: dict[Path, DiscoveryIndex] = {}
+
+
+def get_discovery_index(base_dir: Path | None = None, create: bool = False) -> DiscoveryIndex:
+    """Get the discovery index for the codegen folder under `base_dir` (defaults to cwd).
+
+    The index is only persisted when the codegen folder already exists (or `create` is set),
+    so running discovery in an uninitialized directory never writes to it. An index already loaded
+    by this process is reused unless its file changed since.
+    """
+    base_dir = base_dir or Path.cwd()
+    if not create and not (base_dir / CODEGEN_DIR).exists():
+        return DiscoveryIndex()
+    path = base_dir / INDEX_FILE
+    index = _loaded_indexes.get(path)
+    if index is None or index._dirty or index.file_stamp is None or index.file_stamp != file_stamp(path):
+        index = _loaded_indexes[path] = DiscoveryIndex.load(path)
+    return index
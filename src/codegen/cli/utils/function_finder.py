@@ -1,30 +1,222 @@
 import ast
-import dataclasses
-import importlib
-import importlib.util
-from dataclasses import dataclass
+import io
+import os
+import re
+import sys
+import tokenize
 from pathlib import Path
+from typing import TYPE_CHECKING, NamedTuple
+
+if TYPE_CHECKING:
+    from pygit2 import Blob
+
+
+class SourceSpan(NamedTuple):
+    """Location of a function body: lines [start_line, end_line) (0-based) and the matching byte range."""
+
+    start_line: int
+    end_line: int
+    start_byte: int
+    end_byte: int
+
+
+class FileSource:
+    """Reads a function's source from its file on disk, only when it is needed.
+
+    `stamp` is the (mtime, size) of the file when the function was found. Reading a file that no longer
+    matches it raises StaleSourceError, since the function's byte range may have moved.
+    """
+
+    __slots__ = ("path", "stamp")
+
+    def __init__(self, path: Path, stamp: tuple[int, int] | None = None):
+        self.path = path
+        self.stamp = stamp
+
+    def read(self, start: int = 0, end: int | None = None) -> bytes:
+        with open(self.path, "rb") as f:
+            if self.stamp is not None:
+                stat = os.fstat(f.fileno())
+                if (stat.st_mtime_ns, stat.st_size) != tuple(self.stamp):
+                    from codegen.cli.errors import StaleSourceError
+
+                    msg = f"{self.path} changed since it was scanned"
+                    raise StaleSourceError(msg)
+            f.seek(start)
+            return f.read() if end is None else f.read(end - start)
+
+
+class BlobSource:
+    """Reads a function's source from a git blob, for functions discovered at a ref rather than in the working tree."""
+
+    __slots__ = ("blob",)
+
+    def __init__(self, blob: "Blob"):
+        self.blob = blob
+
+    def read(self, start: int = 0, end: int | None = None) -> bytes:
+        return self.blob.data[start:end]
+
+
+def unindent(source: str) -> str:
+    """Remove the common indentation of the non-empty lines, blanking lines that only contain whitespace."""
+    source_lines = source.splitlines()
+
+    # Find the minimum indentation of non-empty lines
+    indents = [len(line) - len(line.lstrip()) for line in source_lines if line.strip()]
+    if not indents:
+        return ""
+
+    min_indent = min(indents)
+
+    # Remove the minimum indentation from each line
+    unindented_lines = []
+    for line in source_lines:
+        if line.strip():  # Non-empty line
+            unindented_lines.append(line[min_indent:])
+        else:  # Empty line
+            unindented_lines.append("")
+
+    return "\n".join(unindented_lines)
 
 
-@dataclass
 class DecoratedFunction:
-    """Represents a function decorated with @codegen."""
+    """Represents a function decorated with @codegen.
+
+    Only the name, type, path and location of the function are kept. The body source, parameters and
+    arguments schema are read back from the source handle on first access, so discovering or listing
+    thousands of functions doesn't hold their sources in memory.
+    """
 
-    name: str
-    source: str
-    lint_mode: bool
-    lint_user_whitelist: list[str]
-    filepath: Path | None = None
-    parameters: list[tuple[str, str | None]] = dataclasses.field(default_factory=list)
-    arguments_type_schema: dict | None = None
+    __slots__ = ("_arguments_type_schema", "_parameters", "_source", "encoding", "filepath", "handle", "lineno", "lint_mode", "lint_user_whitelist", "name", "shardable", "span")
+
+    def __init__(
+        self,
+        name: str,
+        lint_mode: bool,
+        lint_user_whitelist: list[str],
+        filepath: Path | None = None,
+        span: SourceSpan | None = None,
+        lineno: int | None = None,
+        encoding: str = "utf-8",
+        handle: FileSource | BlobSource | None = None,
+        source: str | None = None,
+        parameters: list[tuple[str, str | None]] | None = None,
+        shardable: bool = False,
+    ):
+        self.name = name
+        self.lint_mode = lint_mode
+        self.lint_user_whitelist = lint_user_whitelist
+        self.shardable = shardable
+        self.filepath = filepath
+        self.span = span
+        self.lineno = lineno
+        self.encoding = encoding
+        self.handle = handle
+        # Lazy attributes are left unset (rather than set to a sentinel) until they are computed
+        if source is not None:
+            self._source = source
+        if parameters is not None:
+            self._parameters = parameters
+
+    def __repr__(self) -> str:
+        return f"DecoratedFunction(name={self.name!r}, lint_mode={self.lint_mode!r}, filepath={self.filepath!r}, lineno={self.lineno!r})"
+
+    def _read(self, body: bool = False) -> bytes:
+        """Read the function's file, or only its body, finding the function again first if the file changed since it was scanned."""
+        from codegen.cli.errors import StaleSourceError
+
+        handle = self.handle or FileSource(self.filepath)
+        start, end = (self.span.start_byte, self.span.end_byte) if body else (0, None)
+        try:
+            return handle.read(start, end)
+        except StaleSourceError:
+            self._rescan()
+            return self._read(body)
+
+    def _rescan(self) -> None:
+        """Re-parse the function's file and take the location and metadata of the function with the same name.
+
+        Raises:
+            StaleSourceError: If the file no longer defines the function
+
+        """
+        from codegen.cli.errors import StaleSourceError
+
+        with open(self.filepath, "rb") as f:
+            stat = os.fstat(f.fileno())
+            content = f.read()
+        found = next((func for func in find_codegen_functions(self.filepath, content, stamp=(stat.st_mtime_ns, stat.st_size)) if func.name == self.name), None)
+        if found is None:
+            msg = f"{self.filepath} changed since it was scanned and no longer defines the function '{self.name}'"
+            raise StaleSourceError(msg)
+        for attr in ("lint_mode", "lint_user_whitelist", "shardable", "span", "lineno", "encoding", "handle"):
+            setattr(self, attr, getattr(found, attr))
+
+    @property
+    def source(self) -> str:
+        """The unindented function body, read from the source handle on first access."""
+        try:
+            return self._source
+        except AttributeError:
+            self._source = unindent(self._read(body=True).decode(self.encoding)) if self.span else ""
+            return self._source
+
+    @property
+    def parameters(self) -> list[tuple[str, str | None]]:
+        """Parameter names and type annotations, parsed from the source handle on first access."""
+        try:
+            return self._parameters
+        except AttributeError:
+            self._parameters = []
+            if self.lineno is not None:
+                for node in ast.walk(ast.parse(self._read())):
+                    if isinstance(node, ast.FunctionDef | ast.AsyncFunctionDef) and node.lineno == self.lineno:
+                        self._parameters = CodegenFunctionVisitor().get_function_parameters(node)
+                        break
+            return self._parameters
+
+    @property
+    def arguments_type_schema(self) -> dict | None:
+        """JSON schema of the `arguments` parameter's pydantic type, computed on first access."""
+        try:
+            return self._arguments_type_schema
+        except AttributeError:
+            from codegen.cli.utils.arguments_schema import get_arguments_type_schema
+
+            arguments_type = dict(self.parameters).get("arguments")
+            if arguments_type is None or self.filepath is None:
+                self._arguments_type_schema = None
+            else:
+                self._arguments_type_schema = get_arguments_type_schema(self._read(), self.filepath, arguments_type)
+            return self._arguments_type_schema
+
+
+_NEWLINE = re.compile(rb"\r\n?|\n")
 
 
 class CodegenFunctionVisitor(ast.NodeVisitor):
-    def __init__(self):
+    def __init__(self, source: bytes = b""):
         self.functions: list[DecoratedFunction] = []
-
-    def get_function_body(self, node: ast.FunctionDef) -> str:
-        """Extract and unindent the function body."""
+        self.source = source
+        self._line_offsets: list[int] | None = None
+        self._encoding: str | None = None
+
+    @property
+    def line_offsets(self) -> list[int]:
+        """Byte offset of the start of each line, built once per file on first use."""
+        if self._line_offsets is None:
+            self._line_offsets = [0, *(match.end() for match in _NEWLINE.finditer(self.source))]
+        return self._line_offsets
+
+    @property
+    def encoding(self) -> str:
+        if self._encoding is None:
+            self._encoding = sys.intern(tokenize.detect_encoding(io.BytesIO(self.source).readline)[0])
+        return self._encoding
+
+    def get_body_span(self, node: ast.FunctionDef) -> SourceSpan:
+        """Get the line and byte range of the function body."""
         # Get the start and end positions of the function body
         first_stmt = node.body[0]
         last_stmt = node.body[-1]
@@ -33,25 +225,9 @@ class CodegenFunctionVisitor(ast.NodeVisitor):
         start_line = first_stmt.lineno - 1  # Convert to 0-based
         end_line = last_stmt.end_lineno if hasattr(last_stmt, "end_lineno") else last_stmt.lineno
 
-        # Get the raw source lines for the entire body
-        source_lines = self.source.splitlines()[start_line:end_line]
-
-        # Find the minimum indentation of non-empty lines
-        indents = [len(line) - len(line.lstrip()) for line in source_lines if line.strip()]
-        if not indents:
-            return ""
-
-        min_indent = min(indents)
-
-        # Remove the minimum indentation from each line
-        unindented_lines = []
-        for line in source_lines:
-            if line.strip():  # Non-empty line
-                unindented_lines.append(line[min_indent:])
-            else:  # Empty line
-                unindented_lines.append("")
-
-        return "\n".join(unindented_lines)
+        offsets = self.line_offsets
+        end_byte = offsets[end_line] if end_line < len(offsets) else len(self.source)
+        return SourceSpan(start_line, end_line, offsets[start_line], end_byte)
 
     def _get_annotation(self, annotation) -> str:
         """Helper function to retrieve the string representation of an annotation.
@@ -138,10 +314,20 @@ class CodegenFunctionVisitor(ast.NodeVisitor):
                         if keyword.arg == "users" and isinstance(keyword.value, ast.List):
                             lint_user_whitelist = [ast.literal_eval(elt).lstrip("@") for elt in keyword.value.elts]
 
-                # Get just the function body, unindented
-                body_source = self.get_function_body(node)
-                parameters = self.get_function_parameters(node)
-                self.functions.append(DecoratedFunction(name=func_name, source=body_source, lint_mode=lint_mode, lint_user_whitelist=lint_user_whitelist, parameters=parameters))
+                shardable = any(keyword.arg == "shardable" and isinstance(keyword.value, ast.Constant) and keyword.value.value is True for keyword in decorator.keywords)
+
+                # Only record where the body is; the source is read back when it's needed
+                self.functions.append(
+                    DecoratedFunction(
+                        name=func_name,
+                        lint_mode=lint_mode,
+                        lint_user_whitelist=lint_user_whitelist,
+                        span=self.get_body_span(node),
+                        lineno=node.lineno,
+                        encoding=self.encoding,
+                        shardable=shardable,
+                    )
+                )
 
     def _has_codegen_root(self, node):
         """Recursively check if an AST node chain starts with codegen."""
@@ -159,40 +345,15 @@ class CodegenFunctionVisitor(ast.NodeVisitor):
             node = node.value
         return attrs
 
-    def visit_Module(self, node):
-        # Store the full source code for later use
-        self.source = self.file_content
-        self.generic_visit(node)
-
-
-def _extract_arguments_type_schema(func: DecoratedFunction) -> dict | None:
-    """Extracts the arguments type schema from a DecoratedFunction object."""
-    try:
-        spec = importlib.util.spec_from_file_location("module", func.filepath)
-        module = importlib.util.module_from_spec(spec)
-
-        fn_arguments_param_type = None
-        for p in func.parameters:
-            if p[0] == "arguments":
-                fn_arguments_param_type = p[1]
-
-        if fn_arguments_param_type is not None:
-            spec.loader.exec_module(module)
-
-            schema = getattr(module, fn_arguments_param_type).model_json_schema()
-            return schema
-        return None
-    except Exception as e:
-        print(f"Error parsing {func.filepath}, could not introspect for arguments parameter")
-        print(e)
-        return None
-
 
-def find_codegen_functions(filepath: Path) -> list[DecoratedFunction]:
+def find_codegen_functions(filepath: Path, content: bytes | None = None, handle: FileSource | BlobSource | None = None, stamp: tuple[int, int] | None = None) -> list[DecoratedFunction]:
     """Find all codegen functions in a Python file.
 
     Args:
         filepath: Path to the Python file to search
+        content: Raw contents of the file, if already read. The file is read otherwise.
+        handle: Where the functions' sources are read back from later. Defaults to the file at `filepath`.
+        stamp: (mtime, size) of the file when `content` was read, used to detect later changes to it
 
     Returns:
         List of DecoratedFunction objects found in the file
@@ -202,18 +363,22 @@ def find_codegen_functions(filepath: Path) -> list[DecoratedFunction]:
 
     """
     # Read and parse the file
-    with open(filepath) as f:
-        file_content = f.read()
-        tree = ast.parse(file_content)
+    if content is None:
+        with open(filepath, "rb") as f:
+            stat = os.fstat(f.fileno())
+            content = f.read()
+        stamp = stat.st_mtime_ns, stat.st_size
+    if handle is None:
+        handle = FileSource(filepath, stamp)
+    tree = ast.parse(content)
 
     # Find all codegen.function decorators
-    visitor = CodegenFunctionVisitor()
-    visitor.file_content = file_content
+    visitor = CodegenFunctionVisitor(content)
     visitor.visit(tree)
 
     # Add filepath to each function
     for func in visitor.functions:
         func.filepath = filepath
-        func.arguments_type_schema = _extract_arguments_type_schema(func)
+        func.handle = handle
 
     return visitor.functions
@@ -0,0 +1,24 @@
+import importlib
+
+import rich_click as click
+
+
+class LazyGroup(click.RichGroup):
+    """Command group that imports a subcommand's module only when that subcommand is looked up.
+
+    `lazy_commands` maps command names to "module:attribute" import paths. Running one command imports
+    just its module; listing every command (e.g. for `--help`) imports them all.
+    """
+
+    def __init__(self, *args, lazy_commands: dict[str, str] | None = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lazy_commands = lazy_commands or {}
+
+    def list_commands(self, ctx: click.Context) -> list[str]:
+        return sorted({*super().list_commands(ctx), *self.lazy_commands})
+
+    def get_command(self, ctx: click.Context, cmd_name: str) -> click.Command | None:
+        if cmd_name in self.lazy_commands and cmd_name not in self.commands:
+            module_name, attribute = self.lazy_commands[cmd_name].split(":")
+            self.add_command(getattr(importlib.import_module(module_name), attribute), cmd_name)
+        return super().get_command(ctx, cmd_name)
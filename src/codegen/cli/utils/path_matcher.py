@@ -0,0 +1,32 @@
+import glob
+import re
+
+
+def _compile(patterns: list[str]) -> re.Pattern | None:
+    if not patterns:
+        return None
+    return re.compile("|".join(f"(?:{glob.translate(pattern, recursive=True, include_hidden=True)})" for pattern in patterns))
+
+
+class PathMatcher:
+    """Include/exclude globs compiled into a single regex each.
+
+    Paths are posix-style and relative to the repository root, e.g. `vendor/**` or `**/generated/**`.
+    A path matches if it matches any include glob (or there are none) and no exclude glob.
+    """
+
+    def __init__(self, include: list[str] | None = None, exclude: list[str] | None = None):
+        self._include = _compile(include or [])
+        self._exclude = _compile(exclude or [])
+
+    def __bool__(self) -> bool:
+        return self._include is not None or self._exclude is not None
+
+    def matches(self, path: str) -> bool:
+        if self._exclude is not None and self._exclude.match(path):
+            return False
+        return self._include is None or self._include.match(path) is not None
+
+    def excludes_dir(self, path: str) -> bool:
+        """Whether everything under a directory is excluded, so it can be pruned before descending into it."""
+        return self._exclude is not None and self._exclude.match(f"{path}/") is not None
@@ -1,4 +1,5 @@
-from typing import Self
+import json
+from typing import Any, ClassVar, Self
 
 from pydantic import BaseModel
 
@@ -16,6 +17,62 @@ class SafeBaseModel(BaseModel):
         return self.model_dump_json(indent=4)
 
 
+class LazyString:
+    """A JSON string literal left undecoded in the response buffer it was read from."""
+
+    __slots__ = ("raw",)
+
+    def __init__(self, raw: memoryview):
+        self.raw = raw
+
+    def decode(self) -> str:
+        return json.loads(bytes(self.raw))
+
+
+class LazyFieldsModel(SafeBaseModel):
+    """Model whose `lazy_fields` may hold a LazyString, decoded the first time the field is read.
+
+    Responses decoded by `codegen.cli.api.decoding` keep large string fields (diffs, logs) as slices of
+    the response body instead of decoding them up front. Lazy fields must be top-level string fields.
+    """
+
+    lazy_fields: ClassVar[tuple[str, ...]] = ()
+
+    def __getattribute__(self, name: str) -> Any:
+        value = super().__getattribute__(name)
+        if type(value) is LazyString:
+            value = value.decode()
+            # Replacing the LazyString releases its hold on the response buffer
+            self.__dict__[name] = value
+        return value
+
+    def _materialize(self) -> None:
+        for name in self.lazy_fields:
+            getattr(self, name)
+
+    def model_dump(self, **kwargs) -> dict[str, Any]:
+        self._materialize()
+        return super().model_dump(**kwargs)
+
+    def model_dump_json(self, **kwargs) -> str:
+        self._materialize()
+        return super().model_dump_json(**kwargs)
+
+    def __repr_args__(self):
+        self._materialize()
+        return super().__repr_args__()
+
+    def __eq__(self, other: object) -> bool:
+        self._materialize()
+        if isinstance(other, LazyFieldsModel):
+            other._materialize()
+        return super().__eq__(other)
+
+    def __getstate__(self) -> dict[Any, Any]:
+        self._materialize()
+        return super().__getstate__()
+
+
 CODEMOD_CONFIG_PATH = "config.toml"
 
 
@@ -0,0 +1,10 @@
+from pathlib import Path
+
+
+def file_stamp(path: Path) -> tuple[int, int] | None:
+    """The (mtime, size) of a file, or None if it doesn't exist. Used to tell whether a cached copy of it is stale."""
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
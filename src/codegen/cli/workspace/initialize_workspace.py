@@ -46,8 +46,8 @@ def initialize_codegen(action: str = "Initializing") -> tuple[Path, Path, Path]:
         shutil.rmtree(DOCS_FOLDER, ignore_errors=True)
         shutil.rmtree(EXAMPLES_FOLDER, ignore_errors=True)
 
-        session = CodegenSession()
-        response = RestAPI(session.token).get_docs()
+        session = CodegenSession.current()
+        response = RestAPI(session.token, session=session).get_docs()
         populate_api_docs(DOCS_FOLDER, response.docs, status)
         populate_examples(session, EXAMPLES_FOLDER, response.examples, status)
 
@@ -70,3 +70,4 @@ def modify_gitignore(codegen_folder: Path):
     add_to_gitignore_if_not_present(gitignore_path, "prompts")
     add_to_gitignore_if_not_present(gitignore_path, "docs")
     add_to_gitignore_if_not_present(gitignore_path, "examples")
+    add_to_gitignore_if_not_present(gitignore_path, "cache")
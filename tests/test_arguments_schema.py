@@ -0,0 +1,97 @@
+import os
+from pathlib import Path
+from typing import Any, Optional
+
+from pydantic import BaseModel, Field
+
+from codegen.cli.utils import arguments_schema
+from codegen.cli.utils.arguments_schema import get_arguments_type_schema
+from codegen.cli.utils.function_finder import find_codegen_functions
+
+STATIC_MODULE = """import codegen
+import module_that_does_not_exist
+from pydantic import BaseModel, Field
+
+NumberType = int | float
+
+
+class Args(BaseModel):
+    number: NumberType
+    names: list[str] = Field(default_factory=list)
+
+
+@codegen.function("with-arguments")
+def run(codebase, arguments: Args):
+    pass
+"""
+
+IMPORTED_MODULE = """from ipaddress import IPv4Address
+
+from pydantic import BaseModel
+
+
+class Args(BaseModel):
+    address: IPv4Address
+"""
+
+
+def test_arguments_schema_is_built_without_executing_the_module(tmp_path: Path, monkeypatch):
+    module = tmp_path / "codemod.py"
+    module.write_text(STATIC_MODULE)
+    monkeypatch.setattr(arguments_schema, "_run_import_script", None)  # plain models are read from the AST alone
+
+    (function,) = find_codegen_functions(module)
+    assert not hasattr(function, "_arguments_type_schema")  # not computed during discovery
+
+    NumberType = int | float
+
+    class Args(BaseModel):
+        number: NumberType
+        names: list[str] = Field(default_factory=list)
+
+    assert function.arguments_type_schema == Args.model_json_schema()
+
+
+def test_arguments_schema_from_the_ast_matches_pydantic(tmp_path: Path, monkeypatch):
+    module = tmp_path / "codemod.py"
+    module.write_text(
+        "from typing import Any, Optional\n"
+        "from pydantic import BaseModel, Field\n\n\n"
+        "class Args(BaseModel):\n"
+        '    """Arguments of the codemod."""\n\n'
+        "    target_name: str\n"
+        "    limit: Optional[int] = None\n"
+        "    ratio: float = Field(0.5, description='How much to keep')\n"
+        "    options: dict[str, Any] = {}\n"
+        "    dry_run: bool = False\n"
+    )
+    monkeypatch.setattr(arguments_schema, "_run_import_script", None)
+
+    class Args(BaseModel):
+        """Arguments of the codemod."""
+
+        target_name: str
+        limit: Optional[int] = None  # noqa: UP007
+        ratio: float = Field(0.5, description="How much to keep")
+        options: dict[str, Any] = {}
+        dry_run: bool = False
+
+    assert get_arguments_type_schema(module.read_bytes(), module, "Args") == Args.model_json_schema()
+
+
+def test_arguments_schema_falls_back_to_isolated_import(tmp_path: Path):
+    module = tmp_path / "codemod.py"
+    module.write_text(IMPORTED_MODULE)
+
+    schema = get_arguments_type_schema(module.read_bytes(), module, "Args")
+    assert schema["properties"]["address"]["format"] == "ipv4"
+
+
+def test_models_that_run_code_are_built_outside_the_cli_process(tmp_path: Path):
+    marker = tmp_path / "pid"
+    module = tmp_path / "codemod.py"
+    module.write_text(f"from pydantic import BaseModel\n\n\nclass Args(BaseModel):\n    open({str(marker)!r}, 'w').write(str(__import__('os').getpid()))\n    name: str\n")
+
+    schema = get_arguments_type_schema(module.read_bytes(), module, "Args")
+    assert schema["properties"]["name"]["type"] == "string"
+    assert int(marker.read_text()) != os.getpid()
@@ -0,0 +1,82 @@
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from codegen.cli.api import endpoints
+from codegen.cli.api.async_client import AsyncRestAPI
+from codegen.cli.api.schemas import AskExpertResponse
+from codegen.cli.errors import ServerError
+
+
+@pytest.fixture
+def expert_endpoint(monkeypatch):
+    """Local stand-in for the expert endpoint that echoes the query and tracks requests in flight.
+
+    Requests are held until `concurrency` of them are in flight at once, so a client that sends fewer
+    in parallel times out instead of the test depending on how fast the machine is.
+    """
+    stats = {"in_flight": 0, "max_in_flight": 0, "concurrency": 8, "saturated": threading.Event()}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            query = json.loads(self.rfile.read(int(self.headers["Content-Length"])))["input"]["query"]
+            with lock:
+                stats["in_flight"] += 1
+                stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+                if stats["in_flight"] >= stats["concurrency"]:
+                    stats["saturated"].set()
+            stats["saturated"].wait(10)
+            with lock:
+                stats["in_flight"] -= 1
+            status, body = (404, {"detail": "unknown"}) if query == "missing" else (200, {"response": query.upper(), "success": True})
+            content = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    monkeypatch.setattr(endpoints, "EXPERT_ENDPOINT", f"http://127.0.0.1:{httpd.server_address[1]}/")
+    yield stats
+    httpd.shutdown()
+
+
+def test_async_client_runs_requests_concurrently(expert_endpoint):
+    async def main():
+        async with AsyncRestAPI("token", max_concurrency=8) as api:
+            responses = await asyncio.gather(*(api.ask_expert(f"q{i}") for i in range(32)))
+            with pytest.raises(ServerError, match="404"):
+                await api.ask_expert("missing")
+        return responses
+
+    responses = asyncio.run(main())
+    assert all(isinstance(response, AskExpertResponse) for response in responses)
+    assert [response.response for response in responses] == [f"Q{i}" for i in range(32)]
+    assert expert_endpoint["saturated"].is_set()
+    assert expert_endpoint["max_in_flight"] == 8
+
+
+def test_response_cache_work_runs_off_the_event_loop(expert_endpoint, monkeypatch):
+    threads = []
+    for name in ("_cached_response", "_update_cache"):
+        method = getattr(AsyncRestAPI, name)
+        monkeypatch.setattr(AsyncRestAPI, name, lambda self, *args, method=method: threads.append(threading.get_ident()) or method(self, *args))
+
+    async def main():
+        async with AsyncRestAPI("token") as api:
+            response = await api.ask_expert("q")
+        return response, threading.get_ident()
+
+    response, loop_thread = asyncio.run(main())
+    assert response.response == "Q"
+    assert len(threads) == 2 and loop_thread not in threads
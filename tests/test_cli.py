@@ -0,0 +1,29 @@
+import subprocess
+import sys
+
+from click.testing import CliRunner
+
+from codegen.cli.cli import main
+
+
+def test_commands_are_imported_only_when_invoked():
+    script = (
+        "import sys\n"
+        "from codegen.cli.cli import main\n"
+        "try:\n"
+        "    main(['--version'])\n"
+        "except SystemExit:\n"
+        "    pass\n"
+        "print(sorted(name for name in sys.modules if name.startswith('codegen.cli.commands') or name.startswith('codegen.cli.api')))\n"
+    )
+    output = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True).stdout
+    assert output.strip().splitlines()[-1] == "[]"
+
+
+def test_lazy_commands_are_listed_and_run():
+    result = CliRunner().invoke(main, ["--help"])
+    assert result.exit_code == 0
+    assert "docs-search" in result.output and "run-on-pr" in result.output
+
+    result = CliRunner().invoke(main, ["style-debug", "--help"])
+    assert result.exit_code == 0
@@ -0,0 +1,156 @@
+from pathlib import Path
+
+import pygit2
+
+from codegen.cli.codemod import codebase_cache
+from codegen.cli.codemod.codebase_cache import CodebaseCache, disable_codebase_cache, get_codebase_cache, parsed_codebases, reset_codebase_cache_flag
+
+SIGNATURE = pygit2.Signature("test", "test@example.com")
+
+
+def commit_all(repo: pygit2.Repository, message: str) -> None:
+    repo.index.add_all()
+    repo.index.write()
+    parents = [] if repo.head_is_unborn else [repo.head.target]
+    repo.create_commit("HEAD", SIGNATURE, SIGNATURE, message, repo.index.write_tree(), parents)
+
+
+def make_repo(root: Path) -> pygit2.Repository:
+    repo = pygit2.init_repository(root)
+    (root / ".gitignore").write_text(".codegen/cache/\n")
+    (root / "a.py").write_text("a = 1\n")
+    (root / "b.py").write_text("b = 1\n")
+    commit_all(repo, "initial")
+    return repo
+
+
+def test_unchanged_tree_reuses_snapshot(tmp_path: Path):
+    repo = make_repo(tmp_path)
+    cache = CodebaseCache(tmp_path / ".codegen" / "cache" / "codebases")
+
+    entry, changed = cache.checkout(repo)
+    assert changed is None
+    assert (entry.tree / "a.py").read_text() == "a = 1\n"
+    assert not (entry.tree / ".codegen").exists()
+
+    again, changed = cache.checkout(repo)
+    assert changed == set()
+    assert again.base_commit == entry.base_commit
+
+
+def test_only_changed_files_are_updated(tmp_path: Path):
+    repo = make_repo(tmp_path)
+    cache = CodebaseCache(tmp_path / ".codegen" / "cache" / "codebases")
+    cache.checkout(repo)
+
+    (tmp_path / "a.py").write_text("a = 2\n")
+    (tmp_path / "c.py").write_text("c = 1\n")
+    entry, changed = cache.checkout(repo)
+    assert changed == {"a.py", "c.py"}
+    assert (entry.tree / "a.py").read_text() == "a = 2\n"
+    assert (entry.tree / "c.py").read_text() == "c = 1\n"
+
+    # Reverted and deleted files are reported too
+    (tmp_path / "a.py").write_text("a = 1\n")
+    (tmp_path / "c.py").unlink()
+    entry, changed = cache.checkout(repo)
+    assert changed == {"a.py", "c.py"}
+    assert (entry.tree / "a.py").read_text() == "a = 1\n"
+    assert not (entry.tree / "c.py").exists()
+    snapshot = pygit2.Repository(str(entry.tree))
+    assert sorted(item.name for item in snapshot.head.peel().tree) == [".gitignore", "a.py", "b.py"]
+
+
+def test_new_commit_starts_from_last_snapshot(tmp_path: Path):
+    repo = make_repo(tmp_path)
+    cache = CodebaseCache(tmp_path / ".codegen" / "cache" / "codebases")
+    first, _ = cache.checkout(repo)
+
+    (tmp_path / "b.py").write_text("b = 2\n")
+    commit_all(repo, "change b")
+    entry, changed = cache.checkout(repo)
+    assert changed == {"b.py"}
+    assert entry.key != first.key
+    assert (entry.tree / "b.py").read_text() == "b = 2\n"
+    assert (first.tree / "b.py").read_text() == "b = 1\n"
+    assert [e.key for e in cache.entries()] == [entry.key, first.key]
+
+
+def test_least_recently_used_snapshots_are_evicted(tmp_path: Path):
+    repo = make_repo(tmp_path)
+    cache = CodebaseCache(tmp_path / ".codegen" / "cache" / "codebases", max_bytes=1)
+    cache.checkout(repo)
+    (tmp_path / "b.py").write_text("b = 2\n")
+    commit_all(repo, "change b")
+    entry, changed = cache.checkout(repo)
+    assert [e.key for e in cache.entries()] == [entry.key]
+    # No room for a copy: the last snapshot was taken over and updated in place
+    assert changed == {"b.py"}
+
+
+def test_room_is_made_before_copying_a_snapshot(tmp_path: Path, monkeypatch):
+    repo = make_repo(tmp_path)
+    cache = CodebaseCache(tmp_path / ".codegen" / "cache" / "codebases")
+    oldest, _ = cache.checkout(repo)
+    (tmp_path / "b.py").write_text("b = 2\n")
+    commit_all(repo, "change b")
+    newest, _ = cache.checkout(repo)
+    cache.max_bytes = oldest.size + newest.size + newest.size // 2
+
+    sizes = []
+    copytree = codebase_cache.shutil.copytree
+    monkeypatch.setattr(codebase_cache.shutil, "copytree", lambda *args, **kwargs: sizes.append(cache.total_size()) or copytree(*args, **kwargs))
+    (tmp_path / "b.py").write_text("b = 3\n")
+    commit_all(repo, "change b again")
+    entry, _ = cache.checkout(repo)
+    # The oldest snapshot was evicted before the copy, not after it
+    assert sizes[0] == newest.size
+    assert [e.key for e in cache.entries()] == [entry.key, newest.key]
+
+
+def test_removed_snapshots_drop_their_parsed_codebase(tmp_path: Path):
+    repo = make_repo(tmp_path)
+    cache = CodebaseCache(tmp_path / ".codegen" / "cache" / "codebases", max_bytes=1)
+    first, _ = cache.checkout(repo)
+    parsed_codebases[first.tree] = ("PYTHON", first.base_commit, object())
+
+    (tmp_path / "b.py").write_text("b = 2\n")
+    commit_all(repo, "change b")
+    entry, _ = cache.checkout(repo)
+    assert first.tree not in parsed_codebases
+
+    parsed_codebases[entry.tree] = ("PYTHON", entry.base_commit, object())
+    cache.clear()
+    assert entry.tree not in parsed_codebases
+
+
+def test_invalid_size_caps_use_the_default(tmp_path: Path, monkeypatch):
+    repo = make_repo(tmp_path)
+    for setting in ("inf", "0", "-1", "nan"):
+        monkeypatch.setattr(codebase_cache.global_env, "CODEGEN_CODEBASE_CACHE_MAX_MB", setting)
+        assert codebase_cache.open_codebase_cache(repo).max_bytes == codebase_cache.DEFAULT_MAX_BYTES
+    monkeypatch.setattr(codebase_cache.global_env, "CODEGEN_CODEBASE_CACHE_MAX_MB", "10")
+    assert codebase_cache.open_codebase_cache(repo).max_bytes == 10 * 2**20
+
+
+def test_no_cache_flag_disables_snapshots(tmp_path: Path, monkeypatch):
+    repo = make_repo(tmp_path)
+    monkeypatch.setattr(codebase_cache.global_env, "CODEGEN_NO_CACHE", None)
+    monkeypatch.setattr(codebase_cache, "_disabled", False)
+    assert get_codebase_cache(repo) is not None
+    disable_codebase_cache()
+    assert get_codebase_cache(repo) is None
+    reset_codebase_cache_flag()
+    assert get_codebase_cache(repo) is not None
+
+
+def test_discard_changes_restores_base(tmp_path: Path):
+    repo = make_repo(tmp_path)
+    cache = CodebaseCache(tmp_path / ".codegen" / "cache" / "codebases")
+    entry, _ = cache.checkout(repo)
+
+    (entry.tree / "a.py").write_text("edited\n")
+    (entry.tree / "new.py").write_text("new\n")
+    cache.discard_changes(entry)
+    assert (entry.tree / "a.py").read_text() == "a = 1\n"
+    assert not (entry.tree / "new.py").exists()
@@ -0,0 +1,155 @@
+import os
+from pathlib import Path
+
+import pygit2
+
+from codegen.cli.git.files import iter_repo_files
+from codegen.cli.utils.codemod_manager import CodemodManager
+from codegen.cli.utils.discovery_index import DiscoveryIndex
+from codegen.cli.utils.path_matcher import PathMatcher
+
+
+def write_codemods(root: Path, count: int) -> None:
+    for i in range(count):
+        package = root / f"pkg_{i % 3}"
+        package.mkdir(parents=True, exist_ok=True)
+        (package / f"codemod_{i}.py").write_text(f'import codegen\n\n\n@codegen.function("function-{i}")\ndef run(codebase):\n    print({i})\n')
+        (package / f"plain_{i}.py").write_text(f"x = {i}\n")
+
+
+def test_get_decorated_parallel_matches_serial(tmp_path: Path):
+    write_codemods(tmp_path, 12)
+
+    serial = CodemodManager.get_decorated(tmp_path, index=DiscoveryIndex(), jobs=1)
+    parallel = CodemodManager.get_decorated(tmp_path, index=DiscoveryIndex(), jobs=4)
+
+    assert len(serial) == 12
+    assert [(f.name, f.filepath, f.source) for f in parallel] == [(f.name, f.filepath, f.source) for f in serial]
+    assert [f.filepath for f in serial] == sorted(f.filepath for f in serial)
+
+
+def test_get_decorated_skips_git_ignored_files(tmp_path: Path):
+    pygit2.init_repository(tmp_path)
+    write_codemods(tmp_path / "src", 2)
+    write_codemods(tmp_path / "generated", 2)
+    (tmp_path / ".gitignore").write_text("generated/\n")
+
+    functions = CodemodManager.get_decorated(tmp_path, index=DiscoveryIndex(), matcher=PathMatcher())
+    assert {f.filepath.relative_to(tmp_path).parts[0] for f in functions} == {"src"}
+
+
+def test_get_decorated_applies_include_exclude_globs(tmp_path: Path):
+    write_codemods(tmp_path, 6)
+
+    matcher = PathMatcher(include=["pkg_*/**"], exclude=["pkg_1/**"])
+    functions = CodemodManager.get_decorated(tmp_path, index=DiscoveryIndex(), matcher=matcher)
+    assert {f.filepath.parent.name for f in functions} == {"pkg_0", "pkg_2"}
+
+
+def test_iter_decorated_stops_scanning_early(tmp_path: Path):
+    write_codemods(tmp_path, 9)
+    index = DiscoveryIndex()
+    checked = []
+    is_fresh = index.is_fresh
+    index.is_fresh = lambda path, stat: checked.append(path) or is_fresh(path, stat)
+
+    functions = CodemodManager.iter_decorated(tmp_path, index=index, jobs=1)
+    first = next(functions)
+    functions.close()
+
+    assert first.filepath == tmp_path / "pkg_0" / "codemod_0.py"
+    # Only the files up to the first match were checked, parsed and indexed
+    assert checked == [tmp_path / "pkg_0" / "codemod_0.py"]
+    assert set(index.entries) == {str(tmp_path / "pkg_0" / "codemod_0.py")}
+
+    # A parallel scan only checks a few files per worker ahead
+    write_codemods(tmp_path, 300)
+    checked.clear()
+    functions = CodemodManager.iter_decorated(tmp_path, index=index, jobs=2)
+    next(functions)
+    functions.close()
+    assert len(checked) <= 2 * 4 + 1
+
+    assert CodemodManager.get("FUNCTION 4", tmp_path).filepath == tmp_path / "pkg_1" / "codemod_4.py"
+
+
+def test_get_decorated_at_git_ref_reads_blobs(tmp_path: Path):
+    repo = pygit2.init_repository(tmp_path)
+    write_codemods(tmp_path, 3)
+    repo.index.add_all()
+    repo.index.write()
+    signature = pygit2.Signature("test", "test@example.com")
+    repo.create_commit("HEAD", signature, signature, "initial", repo.index.write_tree(), [])
+    repo.references.create("refs/tags/v1", repo.head.target)
+
+    # Working tree changes are not visible at the ref
+    (tmp_path / "pkg_0" / "codemod_0.py").write_text('import codegen\n\n\n@codegen.function("renamed")\ndef run(codebase):\n    pass\n')
+    (tmp_path / "pkg_1").rename(tmp_path / "moved")
+
+    functions = CodemodManager.get_decorated(tmp_path, matcher=PathMatcher(), ref="v1")
+    assert [(f.name, f.source) for f in functions] == [(f"function-{i}", f"print({i})") for i in range(3)]
+    assert [f.name for f in CodemodManager.get_decorated(tmp_path / "pkg_1", matcher=PathMatcher(), ref="v1")] == ["function-1"]
+
+
+def commit_all(repo: pygit2.Repository, message: str, parents: list) -> pygit2.Oid:
+    repo.index.add_all()
+    repo.index.write()
+    signature = pygit2.Signature("test", "test@example.com")
+    return repo.create_commit(None, signature, signature, message, repo.index.write_tree(), parents)
+
+
+def test_repo_files_lists_conflicted_files_once(tmp_path: Path):
+    repo = pygit2.init_repository(tmp_path)
+    (tmp_path / "app.py").write_text("x = 0\n")
+    base = commit_all(repo, "base", [])
+    (tmp_path / "app.py").write_text("x = 1\n")
+    ours = commit_all(repo, "ours", [base])
+    repo.set_head(repo.create_branch("main", repo[ours]).name)
+    repo.checkout_tree(repo[base])
+    (tmp_path / "app.py").write_text("x = 2\n")
+    theirs = commit_all(repo, "theirs", [base])
+    repo.checkout_tree(repo[ours], strategy=pygit2.enums.CheckoutStrategy.FORCE)
+    repo.index.read_tree(repo[ours].tree)
+    repo.merge(theirs)
+    assert repo.index.conflicts is not None
+
+    assert list(iter_repo_files(repo)) == ["app.py"]
+
+
+def test_untracked_files_are_listed_again_only_after_a_change(tmp_path: Path, monkeypatch):
+    repo = pygit2.init_repository(tmp_path)
+    (tmp_path / "pkg").mkdir()
+    (tmp_path / "pkg" / "tracked.py").write_text("x = 1\n")
+    commit_all(repo, "initial", [])
+    (tmp_path / "pkg" / "new.py").write_text("y = 1\n")
+    status_calls = []
+    status = pygit2.Repository.status
+    monkeypatch.setattr(pygit2.Repository, "status", lambda self, *args, **kwargs: status_calls.append(1) or status(self, *args, **kwargs))
+
+    assert list(iter_repo_files(repo)) == ["pkg/tracked.py", "pkg/new.py"]
+    assert list(iter_repo_files(repo)) == ["pkg/tracked.py", "pkg/new.py"]
+    assert len(status_calls) == 1
+
+    (tmp_path / "pkg" / "other.py").write_text("z = 1\n")
+    os.utime(tmp_path / "pkg", ns=(0, 0))
+    assert list(iter_repo_files(repo)) == ["pkg/tracked.py", "pkg/new.py", "pkg/other.py"]
+    (tmp_path / ".gitignore").write_text("pkg/new.py\n")
+    os.utime(tmp_path, ns=(0, 0))
+    assert list(iter_repo_files(repo, suffix=".py")) == ["pkg/tracked.py", "pkg/other.py"]
+    assert len(status_calls) == 3
+
+
+def test_untracked_files_in_directories_without_known_files_are_seen(tmp_path: Path):
+    repo = pygit2.init_repository(tmp_path)
+    (tmp_path / "app.py").write_text("x = 1\n")
+    commit_all(repo, "initial", [])
+    (tmp_path / "empty" / "nested").mkdir(parents=True)
+    assert list(iter_repo_files(repo)) == ["app.py"]
+
+    (tmp_path / "empty" / "nested" / "new.py").write_text("y = 1\n")
+    assert list(iter_repo_files(repo)) == ["app.py", "empty/nested/new.py"]
+
+    # Excluded through .git/info/exclude, which the cache stamps too
+    (Path(repo.path) / "info").mkdir(exist_ok=True)
+    (Path(repo.path) / "info" / "exclude").write_text("empty/\n")
+    assert list(iter_repo_files(repo)) == ["app.py"]
@@ -0,0 +1,98 @@
+import os
+import socket
+import subprocess
+import sys
+import threading
+
+import pytest
+
+from codegen.cli.api.response_cache import disable_response_cache, get_default_response_cache
+from codegen.cli.api.run_cache import disable_run_cache, get_default_run_cache
+from codegen.cli.daemon import client
+from codegen.cli.daemon.protocol import build_id, control, receive, relevant_env, send
+from codegen.cli.daemon.server import DaemonServer
+
+
+@pytest.fixture
+def daemon(tmp_path, monkeypatch):
+    socket_path = tmp_path / "daemon.sock"
+    process = subprocess.Popen([sys.executable, "-m", "codegen.cli.daemon.server", str(socket_path), "60"], stdout=subprocess.PIPE, text=True)
+    # The daemon prints a line once it's listening
+    process.stdout.readline()
+    monkeypatch.setattr(client, "DAEMON_SOCKET", socket_path)
+    yield socket_path
+    control(socket_path, "stop")
+    process.wait(timeout=10)
+
+
+def test_command_runs_in_daemon(daemon, tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    assert client._forward(["--help"]) == 0
+    assert "Usage: codegen" in capsys.readouterr().out
+    assert client._forward(["no-such-command"]) == 2
+    assert "No such command" in capsys.readouterr().out
+    assert control(daemon, "ping")["requests"] == 2
+
+
+def test_falls_back_when_daemon_cannot_serve(daemon, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    assert client._forward(["login"]) is None
+    assert client._forward(["--no-cache", "login"]) is None
+    monkeypatch.setenv("CODEGEN_IDENTITY_TTL", "1")
+    assert client._forward(["--help"]) is None
+    monkeypatch.setenv("CODEGEN_NO_DAEMON", "1")
+    assert client._forward(["--help"]) is None
+
+
+def test_busy_daemon_tells_the_client_to_run_the_command_itself(tmp_path):
+    server = DaemonServer(tmp_path / "daemon.sock", idle_timeout=60)
+    thread = threading.Thread(target=server.serve_until_stopped)
+    thread.start()
+    request = {"argv": ["--help"], "cwd": str(tmp_path), "env": relevant_env(os.environ), "build": build_id(), "isatty": False, "columns": None}
+    try:
+        # Holding the lock stands in for a command that's running
+        with server.command_lock:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.connect(str(server.socket_path))
+                send(sock, request)
+                with sock.makefile("rb") as reader:
+                    assert receive(reader) == {"fallback": "busy"}
+            # Control requests are still answered
+            assert control(server.socket_path, "ping")["requests"] == 0
+    finally:
+        control(server.socket_path, "stop")
+        thread.join(timeout=10)
+
+
+def test_cache_flags_only_apply_to_the_command_they_were_passed_to(tmp_path, monkeypatch):
+    # run_command changes into the client's directory; monkeypatch changes back afterwards
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("CODEGEN_NO_CACHE", raising=False)
+    server = DaemonServer(tmp_path / "daemon.sock", idle_timeout=60)
+    disable_response_cache()
+    disable_run_cache()
+    client_sock, daemon_sock = socket.socketpair()
+    with client_sock, daemon_sock:
+        assert server.run_command(daemon_sock, {"argv": ["--help"], "cwd": str(tmp_path), "isatty": False, "columns": None}) == 0
+    server.server_close()
+    assert get_default_response_cache().enabled and get_default_run_cache().enabled
+
+
+def test_stale_socket_falls_back(tmp_path, monkeypatch):
+    socket_path = tmp_path / "daemon.sock"
+    socket_path.touch()
+    monkeypatch.setattr(client, "DAEMON_SOCKET", socket_path)
+    assert client._forward(["--help"]) is None
+    assert control(socket_path, "ping") is None
+
+
+def test_build_id_follows_reinstalls(tmp_path, monkeypatch):
+    record = tmp_path / "codegen-1.2.3.dist-info" / "RECORD"
+    record.parent.mkdir()
+    record.write_text("")
+    monkeypatch.setattr(sys, "path", [str(tmp_path), *sys.path])
+    before = build_id()
+    assert before.startswith("1.2.3+")
+
+    os.utime(record, ns=(2 * 10**18, 2 * 10**18))
+    assert build_id() != before
@@ -0,0 +1,37 @@
+import json
+
+import pytest
+
+from codegen.cli.api.client import BaseRestAPI
+from codegen.cli.api.decoding import find_string_value, validate_response
+from codegen.cli.api.schemas import DeployResponse, RunCodemodOutput
+from codegen.cli.errors import ServerError
+from codegen.cli.utils.schema import LazyString
+
+
+def test_large_fields_are_decoded_on_first_read():
+    output = {"success": True, "logs": 'ran "codemod"\\n\n', "observation": "diff --git a/x.py b/x.py\n+é\n", "error": "observation"}
+    content = bytearray(json.dumps(output, ensure_ascii=False).encode())
+
+    result = validate_response(RunCodemodOutput, content)
+    assert isinstance(result.__dict__["observation"], LazyString)
+    assert result.success and result.error == "observation"
+
+    assert result.observation == output["observation"]
+    assert result.__dict__["observation"] == output["observation"]
+    assert result.model_dump() == {**output, "web_link": None}
+    assert validate_response(RunCodemodOutput, content) == result
+
+
+def test_find_string_value_skips_non_strings():
+    content = b'{"logs": null, "observation" : "a\\\\", "error": "\\"logs\\": \\"x\\""}'
+    assert find_string_value(content, "logs") is None
+    start, end = find_string_value(content, "observation")
+    assert content[start:end] == b'"a\\\\"'
+
+
+def test_invalid_responses_raise_server_error():
+    api = BaseRestAPI("token")
+    with pytest.raises(ServerError, match="Invalid response format"):
+        api._parse_response(200, b'{"success": true}', DeployResponse)
+    assert api._parse_response(200, b'{"success": true, "observation": "ok"}', RunCodemodOutput).observation == "ok"
@@ -0,0 +1,68 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+import rich_click as click
+
+from codegen.cli.api.client import RestAPI
+from codegen.cli.api.schemas import DeployResponse
+from codegen.cli.commands.deploy.main import deploy_functions
+from codegen.cli.utils.deploy_manifest import DeployManifest
+from codegen.cli.utils.function_finder import DecoratedFunction
+
+
+def test_deploy_functions_runs_concurrently_and_reports_every_result(monkeypatch):
+    in_flight, max_in_flight = 0, 0
+    lock = threading.Lock()
+
+    def deploy(self, codemod_name, **kwargs):
+        nonlocal in_flight, max_in_flight
+        with lock:
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+        time.sleep(0.05)
+        with lock:
+            in_flight -= 1
+        if codemod_name == "broken":
+            raise RuntimeError("boom")
+        return DeployResponse(success=True, new=True, codemod_id=1, version_id=1, url="https://example.com")
+
+    monkeypatch.setattr(RestAPI, "deploy", deploy)
+    functions = [DecoratedFunction(name, lint_mode=False, lint_user_whitelist=[], source="pass", parameters=[]) for name in ["a", "broken", "c", "d"]]
+
+    with pytest.raises(click.ClickException, match="1 of 4 functions failed"):
+        deploy_functions(SimpleNamespace(token="token"), functions, concurrency=2)
+    assert max_in_flight == 2
+
+    results = deploy_functions(SimpleNamespace(token="token"), [f for f in functions if f.name != "broken"], concurrency=4)
+    assert [result.function.name for result in results] == ["a", "c", "d"]
+    assert all(result.success and result.response.success for result in results)
+
+
+def test_deploy_functions_skips_functions_unchanged_since_last_deploy(monkeypatch, tmp_path):
+    deployed = []
+
+    def deploy(self, codemod_name, **kwargs):
+        deployed.append(codemod_name)
+        return DeployResponse(success=True, new=True, codemod_id=1, version_id=len(deployed), url="https://example.com")
+
+    monkeypatch.setattr(RestAPI, "deploy", deploy)
+    manifest = DeployManifest(tmp_path / "manifest.json", scope="test")
+    functions = [DecoratedFunction(name, lint_mode=False, lint_user_whitelist=[], source=f"print({name!r})", parameters=[]) for name in ["a", "b"]]
+
+    deploy_functions(SimpleNamespace(token="token"), functions, manifest=manifest)
+    assert sorted(deployed) == ["a", "b"]
+
+    # Reloaded from disk: nothing changed, so nothing is uploaded
+    manifest = DeployManifest.load(tmp_path / "manifest.json", scope="test")
+    results = deploy_functions(SimpleNamespace(token="token"), functions, manifest=manifest)
+    assert len(deployed) == 2 and all(result.skipped for result in results)
+
+    changed = [DecoratedFunction("a", lint_mode=False, lint_user_whitelist=[], source="print('changed')", parameters=[]), functions[1]]
+    deploy_functions(SimpleNamespace(token="token"), changed, manifest=manifest)
+    assert deployed[2:] == ["a"]
+
+    deploy_functions(SimpleNamespace(token="token"), changed, manifest=manifest, force=True)
+    assert sorted(deployed[3:]) == ["a", "b"]
+    assert DeployManifest.load(tmp_path / "manifest.json", scope="other").get("a") is None
@@ -0,0 +1,73 @@
+import os
+from pathlib import Path
+
+import pygit2
+
+from codegen.cli.auth.constants import CACHE_DIR, INDEX_FILE
+from codegen.cli.utils.codemod_manager import CodemodManager
+from codegen.cli.utils.discovery_index import DiscoveryIndex
+
+CODEMOD_SOURCE = """import codegen
+
+
+@codegen.function("my-function")
+def run(codebase):
+    print("hello")
+"""
+
+
+def test_discovery_index_reuses_unchanged_files(tmp_path: Path):
+    codemod = tmp_path / "codemod.py"
+    codemod.write_text(CODEMOD_SOURCE)
+    (tmp_path / "other.py").write_text("x = 1\n")
+    index_path = tmp_path / "index.json"
+
+    functions = CodemodManager.get_decorated(tmp_path, index=DiscoveryIndex(index_path))
+    assert [f.name for f in functions] == ["my-function"]
+
+    index = DiscoveryIndex.load(index_path)
+    assert index.stats().files == 2
+    assert index.stats().functions == 1
+
+    cached = CodemodManager.get_decorated(tmp_path, index=index)
+    assert [(f.name, f.source, f.filepath) for f in cached] == [(f.name, f.source, f.filepath) for f in functions]
+
+
+def test_discovery_index_content_hash_fallback(tmp_path: Path):
+    codemod = tmp_path / "codemod.py"
+    codemod.write_text(CODEMOD_SOURCE)
+    index = DiscoveryIndex(tmp_path / "index.json")
+    CodemodManager.get_decorated(tmp_path, index=index)
+
+    # Same content with a new mtime is still served from the index
+    stat = codemod.stat()
+    os.utime(codemod, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert index.lookup(codemod, codemod.stat()) is not None
+
+    # Changed content is re-parsed
+    codemod.write_text(CODEMOD_SOURCE.replace("my-function", "renamed"))
+    assert index.lookup(codemod, codemod.stat()) is None
+    assert [f.name for f in CodemodManager.get_decorated(tmp_path, index=index)] == ["renamed"]
+
+
+def test_discovery_index_prunes_deleted_files(tmp_path: Path):
+    codemod = tmp_path / "codemod.py"
+    codemod.write_text(CODEMOD_SOURCE)
+    index = DiscoveryIndex(tmp_path / "index.json")
+    CodemodManager.get_decorated(tmp_path, index=index)
+
+    codemod.unlink()
+    assert CodemodManager.get_decorated(tmp_path, index=index) == []
+    assert index.stats().files == 0
+
+
+def test_cache_directory_ignores_itself(tmp_path: Path):
+    repo = pygit2.init_repository(tmp_path)
+    (tmp_path / "codemod.py").write_text(CODEMOD_SOURCE)
+    # A workspace from before `cache` was listed in .codegen/.gitignore
+    (tmp_path / ".codegen").mkdir()
+    (tmp_path / ".codegen" / ".gitignore").write_text("prompts\ndocs\nexamples\n")
+
+    CodemodManager.get_decorated(tmp_path, index=DiscoveryIndex(tmp_path / INDEX_FILE))
+    assert (tmp_path / CACHE_DIR / ".gitignore").read_text() == "*\n"
+    assert repo.path_is_ignored(INDEX_FILE.as_posix())
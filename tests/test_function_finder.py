@@ -0,0 +1,71 @@
+from pathlib import Path
+
+import pytest
+
+from codegen.cli.errors import StaleSourceError
+from codegen.cli.utils.function_finder import find_codegen_functions
+
+
+def test_find_codegen_functions_slices_bodies_from_raw_bytes(tmp_path: Path):
+    module = tmp_path / "codemod.py"
+    source = """# -*- coding: latin-1 -*-
+import codegen
+
+
+@codegen.function("first")
+def first(codebase):
+    print("caf\xe9")
+
+    return 1
+
+
+class Holder:
+    @codegen.webhook("second", users=["@someone"])
+    def second(self, codebase):
+        if codebase:
+            pass"""
+    module.write_bytes(source.replace("\n", "\r\n").encode("latin-1"))
+
+    first, second = find_codegen_functions(module)
+    assert first.source == 'print("caf\xe9")\n\nreturn 1'
+    assert second.source == "if codebase:\n    pass"
+    assert second.lint_mode and second.lint_user_whitelist == ["someone"]
+    assert not first.shardable and not second.shardable
+
+
+def test_shardable_marker_is_detected(tmp_path: Path):
+    module = tmp_path / "codemod.py"
+    module.write_text('import codegen\n\n\n@codegen.function("sharded", shardable=True)\ndef run(codebase):\n    pass\n')
+
+    (function,) = find_codegen_functions(module)
+    assert function.shardable
+
+
+def test_decorated_functions_are_compact_and_read_lazily(tmp_path: Path):
+    module = tmp_path / "codemod.py"
+    module.write_text('import codegen\n\n\n@codegen.function("lazy")\ndef run(codebase, arguments: int = 1):\n    print("before")\n')
+
+    (function,) = find_codegen_functions(module)
+    assert not hasattr(function, "__dict__")
+    assert module.read_bytes()[function.span.start_byte : function.span.end_byte] == b'    print("before")\n'
+
+    # The body is only read from disk on first access
+    module.write_text(module.read_text().replace("before", "after"))
+    assert function.source == 'print("after")'
+    assert function.parameters == [("codebase", None), ("arguments", "int")]
+
+
+def test_lazy_reads_detect_files_changed_since_discovery(tmp_path: Path):
+    module = tmp_path / "codemod.py"
+    module.write_text('import codegen\n\n\n@codegen.function("lazy")\ndef run(codebase):\n    print("before")\n')
+    (function,) = find_codegen_functions(module)
+
+    # The edit moves the body: the file is scanned again rather than sliced at the old offsets
+    module.write_text('import codegen\n\nVALUE = 1\n\n\n@codegen.function("lazy", shardable=True)\ndef run(codebase):\n    print("after", VALUE)\n')
+    assert function.source == 'print("after", VALUE)'
+    assert function.lineno == 7 and function.shardable
+
+    (other,) = find_codegen_functions(module)
+    module.write_text("import codegen\n")
+    with pytest.raises(StaleSourceError, match="no longer defines the function 'lazy'"):
+        other.source
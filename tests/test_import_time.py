@@ -0,0 +1,118 @@
+"""Import-time budgets for the installed entry point, the CLI it falls back to and each subcommand.
+
+Every command module is imported in a fresh interpreter under `python -X importtime`, with bytecode
+cached as in a real install. A command fails if its imports take longer than its budget, or if it
+imports a heavy package it has no use for. Budgets are scaled by CODEGEN_IMPORT_BUDGET_SCALE for slow
+machines, and setting CODEGEN_IMPORT_TIME_REPORT=<path> writes the measurements as JSON for tracking.
+"""
+
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tomllib
+from collections import defaultdict
+from pathlib import Path
+
+import pytest
+
+from codegen.cli.cli import COMMANDS
+
+# The installed `codegen` script, which forwards to the daemon before importing anything else
+DAEMON_CLIENT = "daemon-client"
+SCRIPT_MODULE = tomllib.loads((Path(__file__).parents[1] / "pyproject.toml").read_text())["project"]["scripts"]["codegen"].split(":")[0]
+ENTRY_POINT = "codegen"
+
+# Cumulative import time allowed per command, in milliseconds. Set to about twice what they took when the
+# suite was added, so a budget failure means a real regression rather than a noisy machine.
+DEFAULT_BUDGET_MS = 1500
+BUDGETS_MS = {
+    DAEMON_CLIENT: 100,
+    ENTRY_POINT: 200,
+    "logout": 300,
+    "style-debug": 400,
+    "list": 1000,
+    "index": 1000,
+    "login": 1000,
+    "docs-search": 2500,
+    "run": 2200,
+}
+
+# Heavy packages no command should import at import time, unless allowed below
+FORBIDDEN = {"algoliasearch", "datamodel_code_generator", "graph_sitter", "httpx"}
+ALLOWED = {
+    "docs-search": {"algoliasearch"},
+    "run": {"datamodel_code_generator"},
+}
+# Further packages that commands not talking to the API (and the bare entry point) must not import
+LOCAL_ONLY_FORBIDDEN = {"requests", "aiohttp"}
+LOCAL_ONLY = {"list", "index", "style-debug", "cache"}
+ENTRY_POINT_FORBIDDEN = {"pydantic", "pygit2", "requests", "rich.traceback", "dotenv", "toml"}
+# The daemon client only needs the standard library until it falls back to running the command itself
+DAEMON_CLIENT_FORBIDDEN = {"click", "rich", "rich_click", "codegen.cli.cli"}
+
+
+def _module(command: str) -> str:
+    if command == DAEMON_CLIENT:
+        return SCRIPT_MODULE
+    return "codegen.cli.cli" if command == ENTRY_POINT else COMMANDS[command].split(":")[0]
+
+
+def _forbidden(command: str) -> set[str]:
+    forbidden = FORBIDDEN - ALLOWED.get(command, set())
+    if command in LOCAL_ONLY or command in (ENTRY_POINT, DAEMON_CLIENT):
+        forbidden |= LOCAL_ONLY_FORBIDDEN
+    if command in (ENTRY_POINT, DAEMON_CLIENT):
+        forbidden |= ENTRY_POINT_FORBIDDEN
+    if command == DAEMON_CLIENT:
+        forbidden |= DAEMON_CLIENT_FORBIDDEN
+    return forbidden
+
+
+def parse_importtime(stderr: str) -> tuple[float, dict[str, float], set[str]]:
+    """Total import time, time per top-level package (both in ms) and every imported module name."""
+    packages: dict[str, float] = defaultdict(float)
+    modules = set()
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line.removeprefix("import time:").split("|")
+        name = name.strip()
+        modules.add(name)
+        packages[name.split(".")[0]] += int(self_us) / 1000
+    return sum(packages.values()), dict(packages), modules
+
+
+@pytest.fixture(scope="session")
+def import_env(tmp_path_factory) -> dict[str, str]:
+    env = {key: value for key, value in os.environ.items() if key != "PYTHONDONTWRITEBYTECODE"}
+    env["PYTHONPYCACHEPREFIX"] = str(tmp_path_factory.mktemp("pycache"))
+    return env
+
+
+@pytest.fixture(scope="session")
+def report():
+    results = {}
+    yield results
+    if path := os.environ.get("CODEGEN_IMPORT_TIME_REPORT"):
+        metadata = {"python": platform.python_version(), "platform": platform.platform(), "created_at": time.time()}
+        Path(path).write_text(json.dumps({"metadata": metadata, "commands": results}, indent=2))
+
+
+@pytest.mark.parametrize("command", [DAEMON_CLIENT, ENTRY_POINT, *COMMANDS])
+def test_import_time_budget(command: str, import_env, report):
+    command_line = [sys.executable, "-X", "importtime", "-c", f"import {_module(command)}"]
+    # The first run compiles bytecode into the cache; the second is the one measured
+    subprocess.run(command_line, env=import_env, capture_output=True, check=True)
+    stderr = subprocess.run(command_line, env=import_env, capture_output=True, text=True, check=True).stderr
+    total_ms, packages, modules = parse_importtime(stderr)
+
+    budget_ms = BUDGETS_MS.get(command, DEFAULT_BUDGET_MS) * float(os.environ.get("CODEGEN_IMPORT_BUDGET_SCALE", 1))
+    top = dict(sorted(packages.items(), key=lambda item: -item[1])[:10])
+    report[command] = {"total_ms": round(total_ms, 1), "budget_ms": budget_ms, "packages": {name: round(ms, 1) for name, ms in top.items()}}
+
+    imported = sorted(name for name in _forbidden(command) if name in modules)
+    assert not imported, f"{command} imports {', '.join(imported)}"
+    assert total_ms <= budget_ms, f"{command} takes {total_ms:.0f} ms to import (budget {budget_ms:.0f} ms). Slowest packages: {top}"
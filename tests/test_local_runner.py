@@ -0,0 +1,241 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pygit2
+import pytest
+from click.testing import CliRunner
+
+from codegen.cli.api import run_cache
+from codegen.cli.api.run_cache import RunCache
+from codegen.cli.api.schemas import RunCodemodOutput
+from codegen.cli.auth.session import CodegenSession
+from codegen.cli.cli import main
+from codegen.cli.codemod import local_runner
+from codegen.cli.utils.codemod_manager import CodemodManager
+from codegen.cli.utils.discovery_index import DiscoveryIndex
+
+
+def write_repo(root: Path) -> pygit2.Repository:
+    repo = pygit2.init_repository(root)
+    (root / ".gitignore").write_text("build/\n")
+    (root / "build").mkdir()
+    (root / "build" / "out.py").write_text("ignored = True\n")
+    (root / "src").mkdir()
+    (root / "src" / "app.py").write_text("x = 1\n")
+    (root / "codemod.py").write_text('import codegen\n\n\n@codegen.function("rename")\ndef run(codebase):\n    print("files:", len(codebase.files))\n    codebase.rename("x", "y")\n')
+    return repo
+
+
+class FakeCodebase:
+    """Stands in for a graph-sitter codebase: edits are made to the snapshot and diffed by hand."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.files = sorted(str(p.relative_to(path)) for p in path.rglob("*") if p.is_file() and ".git" not in p.relative_to(path).parts)
+        self.renamed = None
+
+    def rename(self, old: str, new: str) -> None:
+        if old == "boom":
+            raise ValueError("boom")
+        self.renamed = (old, new)
+
+    def commit(self) -> None:
+        pass
+
+    def reset(self) -> None:
+        self.renamed = None
+
+    def edit_all(self) -> None:
+        self.renamed = "all"
+
+    def get_diff(self) -> str:
+        if self.renamed == "all":
+            return "".join(f"diff --git a/{path} b/{path}\n+edited\n" for path in self.files)
+        return f"diff --git a/src/app.py b/src/app.py\n-{self.renamed[0]} = 1\n+{self.renamed[1]} = 1\n" if self.renamed else ""
+
+
+def test_snapshot_copies_files_git_knows_about(tmp_path: Path):
+    repo = write_repo(tmp_path / "repo")
+    snapshot = tmp_path / "snapshot"
+
+    assert sorted(local_runner.snapshot_working_tree(repo, snapshot)) == [".gitignore", "codemod.py", "src/app.py"]
+    assert sorted(str(p.relative_to(snapshot)) for p in snapshot.rglob("*") if p.is_file()) == [".gitignore", "codemod.py", "src/app.py"]
+
+
+def test_run_locally_returns_run_output(tmp_path: Path, monkeypatch):
+    repo = write_repo(tmp_path)
+    monkeypatch.setattr(local_runner, "build_codebase", lambda path, language: FakeCodebase(path))
+    function = CodemodManager.get_decorated(tmp_path, index=DiscoveryIndex())[0]
+
+    output = local_runner.run_locally(repo, function, "PYTHON")
+    assert output.success and output.error is None
+    assert output.logs == "files: 3\n"
+    assert output.observation.startswith("diff --git a/src/app.py")
+    # The codemod ran against a copy
+    assert (tmp_path / "src" / "app.py").read_text() == "x = 1\n"
+
+
+def test_run_locally_reports_errors_at_source_lines(tmp_path: Path, monkeypatch):
+    repo = write_repo(tmp_path)
+    (tmp_path / "codemod.py").write_text('import codegen\n\n\n@codegen.function("rename")\ndef run(codebase):\n    print("before")\n    codebase.rename("boom", "y")\n')
+    monkeypatch.setattr(local_runner, "build_codebase", lambda path, language: FakeCodebase(path))
+    function = CodemodManager.get_decorated(tmp_path, index=DiscoveryIndex())[0]
+
+    output = local_runner.run_locally(repo, function, "PYTHON")
+    assert not output.success and output.observation is None
+    assert output.logs == "before\n"
+    assert f'File "{tmp_path / "codemod.py"}", line 7' in output.error
+    assert "ValueError: boom" in output.error
+
+
+def test_run_locally_with_graph_sitter(tmp_path: Path):
+    # graph-sitter is a dependency, so `uv sync` installs its runtime in CI, where this must run rather than skip
+    if not os.environ.get("CI"):
+        pytest.importorskip("codegen.git.local_repo_operator", reason="the graph-sitter runtime isn't installed")
+    repo = write_repo(tmp_path)
+    (tmp_path / "codemod.py").write_text(
+        'import codegen\n\n\n@codegen.function("rename")\ndef run(codebase):\n    file = codebase.get_file("src/app.py")\n    file.edit(file.content.replace("x = 1", "y = 1"))\n'
+    )
+    function = CodemodManager.get_decorated(tmp_path, index=DiscoveryIndex())[0]
+
+    output = local_runner.run_locally(repo, function, "PYTHON")
+    assert output.success, output.error
+    assert "diff --git a/src/app.py b/src/app.py" in output.observation
+    assert "-x = 1" in output.observation and "+y = 1" in output.observation
+    assert (tmp_path / "src" / "app.py").read_text() == "x = 1\n"
+
+
+def test_run_local_does_not_authenticate(tmp_path: Path, monkeypatch):
+    write_repo(tmp_path)
+    (tmp_path / ".codegen").mkdir()
+    (tmp_path / ".codegen" / "config.toml").write_text('repo_name = "repo"\norganization_name = "org"\nprogramming_language = "PYTHON"\n')
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(local_runner, "build_codebase", lambda path, language: FakeCodebase(path))
+    monkeypatch.setattr(run_cache, "_default_cache", RunCache(tmp_path / "runs"))
+
+    def is_authenticated(self):
+        raise AssertionError("local runs don't need a login")
+
+    monkeypatch.setattr(CodegenSession, "is_authenticated", is_authenticated)
+    CodegenSession.set_current(None)
+    result = CliRunner().invoke(main, ["run", "rename", "--local"])
+    CodegenSession.set_current(None)
+    assert result.exit_code == 0, result.output
+    assert "Ran rename successfully" in result.output
+
+
+def test_run_reports_functions_sharing_a_label(tmp_path: Path, monkeypatch):
+    write_repo(tmp_path)
+    (tmp_path / ".codegen").mkdir()
+    (tmp_path / ".codegen" / "config.toml").write_text('repo_name = "repo"\norganization_name = "org"\nprogramming_language = "PYTHON"\n')
+    (tmp_path / "src" / "other.py").write_text('import codegen\n\n\n@codegen.function("rename")\ndef run(codebase):\n    pass\n')
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(local_runner, "build_codebase", lambda path, language: pytest.fail("ambiguous labels must not run"))
+
+    CodegenSession.set_current(None)
+    result = CliRunner().invoke(main, ["run", "rename", "--local"])
+    CodegenSession.set_current(None)
+    assert result.exit_code != 0
+    assert "Multiple functions found with label 'rename'" in result.output
+    assert "src/other.py" in result.output
+
+
+def test_parsed_codebase_is_reused_between_runs(tmp_path: Path, monkeypatch):
+    repo = write_repo(tmp_path)
+    built = []
+    monkeypatch.setattr(local_runner, "build_codebase", lambda path, language: built.append(path) or FakeCodebase(path))
+    monkeypatch.setattr(FakeCodebase, "checkout", lambda self, commit: None, raising=False)
+    function = CodemodManager.get_decorated(tmp_path, index=DiscoveryIndex())[0]
+
+    local_runner.run_locally(repo, function, "PYTHON")
+    (tmp_path / "src" / "app.py").write_text("x = 2\n")
+    output = local_runner.run_locally(repo, function, "PYTHON")
+    assert len(built) == 1
+    assert output.success
+
+
+def test_partition_files_balances_sizes_and_shares_project_configuration(tmp_path: Path):
+    paths = ["pyproject.toml", "setup.py", "pkg/big.py", "pkg/a.py", "pkg/b.py", "pkg/c.py"]
+    for path, size in zip(paths, [10, 100, 400, 100, 100, 100]):
+        (tmp_path / path).parent.mkdir(exist_ok=True)
+        (tmp_path / path).write_bytes(b"x" * size)
+
+    shared, partitions = local_runner.partition_files(tmp_path, paths, 2)
+    # Top-level sources are split like any other file
+    assert shared == ["pyproject.toml"]
+    assert sorted(partitions) == [["pkg/a.py", "pkg/b.py", "pkg/c.py", "setup.py"], ["pkg/big.py"]]
+    assert len(local_runner.partition_files(tmp_path, paths, 8)[1]) == 5
+
+
+def test_merge_outputs_orders_and_deduplicates_diffs():
+    outputs = [
+        RunCodemodOutput(success=True, logs="one\n", observation="diff --git a/b.py b/b.py\n+b\ndiff --git a/setup.py b/setup.py\n+s\n"),
+        RunCodemodOutput(success=True, logs="two\n", observation="diff --git a/a.py b/a.py\n+a\ndiff --git a/setup.py b/setup.py\n+s\n"),
+    ]
+    merged = local_runner.merge_outputs(outputs)
+    assert merged.success and merged.logs == "one\ntwo\n"
+    assert merged.observation == "diff --git a/a.py b/a.py\n+a\ndiff --git a/b.py b/b.py\n+b\ndiff --git a/setup.py b/setup.py\n+s\n"
+
+    failed = local_runner.merge_outputs([outputs[0], RunCodemodOutput(success=False, error="Traceback")])
+    assert not failed.success and failed.observation is None
+    assert failed.error == "Shard 2/2:\nTraceback"
+
+
+def test_shardable_function_runs_across_processes(tmp_path: Path, monkeypatch):
+    repo = write_repo(tmp_path)
+    for i in range(8):
+        (tmp_path / "src" / f"module_{i}.py").write_text(f"value = {i}\n")
+    (tmp_path / "codemod.py").write_text('import codegen\n\n\n@codegen.function("edit", shardable=True)\ndef run(codebase):\n    print(len(codebase.files))\n    codebase.edit_all()\n')
+    monkeypatch.setattr(local_runner, "build_codebase", lambda path, language: FakeCodebase(path))
+    monkeypatch.setattr(local_runner, "SHARD_MIN_FILES", 2)
+    # Forked, so the workers inherit the stand-in codebase
+    monkeypatch.setattr(local_runner, "SHARD_START_METHOD", "fork")
+    function = CodemodManager.get_decorated(tmp_path, index=DiscoveryIndex())[0]
+    assert function.shardable
+
+    output = local_runner.run_locally(repo, function, "PYTHON", shards=3)
+    assert output.success
+    # Each of the 3 shards sees its share of the 10 other files plus .gitignore
+    logs = list(map(int, output.logs.split()))
+    assert len(logs) == 3 and sum(logs) == 10 + 3
+    assert output.observation.count("diff --git") == 11
+    assert "diff --git a/src/module_7.py" in output.observation
+
+
+def test_shardable_function_without_files_to_split_runs_in_one_process(tmp_path: Path, monkeypatch):
+    repo = pygit2.init_repository(tmp_path)
+    (tmp_path / "pyproject.toml").write_text("[project]\n")
+    (tmp_path / "tsconfig.json").write_text("{}\n")
+    (tmp_path / "codemod.py").write_text('import codegen\n\n\n@codegen.function("edit", shardable=True)\ndef run(codebase):\n    print(len(codebase.files))\n')
+    monkeypatch.setattr(local_runner, "build_codebase", lambda path, language: FakeCodebase(path))
+    monkeypatch.setattr(local_runner, "SHARD_MIN_FILES", 1)
+    monkeypatch.setattr(local_runner, "ProcessPoolExecutor", None)
+    function = CodemodManager.get_decorated(tmp_path, index=DiscoveryIndex())[0]
+
+    # Only codemod.py would be split; the configuration is shared by every shard
+    output = local_runner.run_locally(repo, function, "PYTHON", shards=4)
+    assert output.success and output.logs == "3\n"
+
+
+def test_shards_are_spawned_not_forked(tmp_path: Path, monkeypatch):
+    repo = write_repo(tmp_path)
+    for i in range(4):
+        (tmp_path / "src" / f"module_{i}.py").write_text(f"value = {i}\n")
+    (tmp_path / "codemod.py").write_text('import codegen\n\n\n@codegen.function("edit", shardable=True)\ndef run(codebase):\n    print(len(codebase.files))\n')
+    monkeypatch.setattr(local_runner, "build_codebase", lambda path, language: FakeCodebase(path))
+    monkeypatch.setattr(local_runner, "SHARD_MIN_FILES", 1)
+    start_methods = []
+
+    class RecordingExecutor(ThreadPoolExecutor):
+        """Runs shards in threads, so they see the stand-in codebase, and records how processes would start."""
+
+        def __init__(self, max_workers, mp_context):
+            start_methods.append(mp_context.get_start_method())
+            super().__init__(max_workers)
+
+    monkeypatch.setattr(local_runner, "ProcessPoolExecutor", RecordingExecutor)
+    function = CodemodManager.get_decorated(tmp_path, index=DiscoveryIndex())[0]
+
+    assert local_runner.run_locally(repo, function, "PYTHON", shards=2).success
+    assert start_methods == ["spawn"]
@@ -0,0 +1,95 @@
+import json
+import subprocess
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from codegen.cli.api.client import APIRequest, RestAPI
+from codegen.cli.api.response_cache import ResponseCache
+from codegen.cli.api.schemas import LookupInput, LookupOutput
+from codegen.cli.api.transport import HTTPTransport
+
+
+@pytest.fixture
+def server():
+    """Lookup endpoint that tags its response with an ETag and answers a matching If-None-Match with a 304."""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            self.server.requests.append(self.headers.get("If-None-Match"))
+            etag = f'"v{self.server.version}"'
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            content = json.dumps({"codemod_id": 1, "version_id": self.server.version}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    httpd.requests, httpd.version = [], 1
+    httpd.url = f"http://127.0.0.1:{httpd.server_address[1]}/"
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield httpd
+    httpd.shutdown()
+
+
+def lookup(api: RestAPI, url: str, name: str = "my-function") -> LookupOutput:
+    input_data = LookupInput(input=LookupInput.BaseLookupInput(codemod_name=name, repo_full_name="org/repo"))
+    return api._send(APIRequest("GET", url, input_data, LookupOutput))
+
+
+def test_fresh_responses_skip_the_network_and_stale_ones_are_revalidated(server, tmp_path):
+    cache = ResponseCache(tmp_path, ttls={server.url: 60})
+    api = RestAPI("token", transport=HTTPTransport(), cache=cache)
+
+    assert [lookup(api, server.url).version_id for _ in range(3)] == [1, 1, 1]
+    assert server.requests == [None]
+
+    # Other arguments and other tokens get their own entries
+    lookup(api, server.url, "other-function")
+    lookup(RestAPI("other-token", transport=HTTPTransport(), cache=cache), server.url)
+    assert server.requests == [None, None, None]
+
+    # Expired: revalidated with the ETag, and the 304 is answered from the cache
+    cache.ttls[server.url] = 0
+    assert lookup(api, server.url).version_id == 1
+    assert server.requests[-1] == '"v1"'
+
+    server.version = 2
+    assert lookup(api, server.url).version_id == 2
+
+    # Disabled: always asks the server, without conditional headers
+    cache.enabled, cache.ttls[server.url] = False, 60
+    assert lookup(api, server.url).version_id == 2
+    assert server.requests[-1] is None
+
+
+def test_invalidate_drops_an_endpoints_entries(server, tmp_path):
+    cache = ResponseCache(tmp_path, ttls={server.url: 60})
+    api = RestAPI("token", transport=HTTPTransport(), cache=cache)
+    lookup(api, server.url)
+    server.version = 2
+    assert lookup(api, server.url).version_id == 1
+
+    cache.invalidate(server.url)
+    assert lookup(api, server.url).version_id == 2
+    assert len(server.requests) == 2
+
+
+def test_importing_the_client_does_not_resolve_endpoint_urls():
+    script = "import codegen.cli.api.client, codegen.cli.api.modal as modal; print('MODAL_PREFIX' in vars(modal))"
+    assert subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True).stdout.strip() == "False"
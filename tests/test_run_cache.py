@@ -0,0 +1,144 @@
+import asyncio
+import os
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+
+import pygit2
+import pytest
+from click.testing import CliRunner
+
+from codegen.cli.api import run_cache
+from codegen.cli.api.client import RestAPI
+from codegen.cli.api.run_cache import RunCache
+from codegen.cli.api.schemas import CodemodRunType, RunCodemodOutput
+from codegen.cli.cli import main
+
+
+def write_repo(root: Path) -> pygit2.Repository:
+    repo = pygit2.init_repository(root)
+    (root / "app.py").write_text("x = 1\n")
+    repo.index.add("app.py")
+    repo.index.write()
+    signature = pygit2.Signature("test", "test@example.com")
+    repo.create_commit("HEAD", signature, signature, "initial", repo.index.write_tree(), [])
+    return repo
+
+
+def test_key_depends_on_source_repo_state_and_context(tmp_path: Path):
+    repo = write_repo(tmp_path / "repo")
+    cache = RunCache(tmp_path / "runs")
+
+    key = cache.key(repo, "codebase.rename('x', 'y')", "org/repo")
+    assert key == cache.key(repo, "codebase.rename('x', 'y')", "org/repo")
+    assert key != cache.key(repo, "codebase.rename('x', 'z')", "org/repo")
+    assert key != cache.key(repo, "codebase.rename('x', 'y')", "org/other")
+    assert key != cache.key(repo, "codebase.rename('x', 'y')", "org/repo", template_context={"name": "y"})
+
+    (tmp_path / "repo" / "app.py").write_text("x = 2\n")
+    assert key != cache.key(repo, "codebase.rename('x', 'y')", "org/repo")
+
+
+def test_pr_runs_and_disabled_cache_have_no_key(tmp_path: Path):
+    repo = write_repo(tmp_path / "repo")
+    assert RunCache(tmp_path / "runs").key(repo, "pass", "org/repo", CodemodRunType.PR) is None
+    assert RunCache(tmp_path / "runs", enabled=False).key(repo, "pass", "org/repo") is None
+
+
+def test_get_or_run_caches_only_successful_runs(tmp_path: Path):
+    cache = RunCache(tmp_path / "runs")
+    calls = []
+
+    def run(success: bool):
+        calls.append(success)
+        return RunCodemodOutput(success=success, observation="diff --git a/app.py b/app.py\n" if success else None, error=None if success else "Traceback")
+
+    assert cache.get_or_run("failed", lambda: run(False)).error == "Traceback"
+    assert cache.get_or_run("failed", lambda: run(False)).error == "Traceback"
+    assert cache.get_or_run("ok", lambda: run(True)).success
+    assert cache.get_or_run("ok", lambda: run(True)).observation == "diff --git a/app.py b/app.py\n"
+    assert calls == [False, False, True]
+    # Runs without a key are never cached
+    cache.get_or_run(None, lambda: run(True))
+    cache.get_or_run(None, lambda: run(True))
+    assert len(calls) == 5
+
+
+def test_get_or_run_async_keeps_disk_work_off_the_event_loop(tmp_path: Path):
+    cache = RunCache(tmp_path / "runs")
+    threads = []
+
+    def key():
+        threads.append(threading.get_ident())
+        return "ok"
+
+    async def run():
+        return RunCodemodOutput(success=True, observation="diff --git a/app.py b/app.py\n")
+
+    async def main():
+        first = await cache.get_or_run_async(key, run)
+        second = await cache.get_or_run_async(key, run)
+        return first, second, threading.get_ident()
+
+    first, second, loop_thread = asyncio.run(main())
+    assert first == second
+    assert len(threads) == 2 and loop_thread not in threads
+    assert cache.get("ok") == first
+
+
+@pytest.mark.parametrize(
+    ("setting", "max_bytes"),
+    [
+        ("1", 2**20),
+        ("0.5", 2**19),
+        ("inf", run_cache.DEFAULT_MAX_BYTES),
+        ("1e308", run_cache.DEFAULT_MAX_BYTES),
+        ("nan", run_cache.DEFAULT_MAX_BYTES),
+        ("0", run_cache.DEFAULT_MAX_BYTES),
+        ("-5", run_cache.DEFAULT_MAX_BYTES),
+        ("lots", run_cache.DEFAULT_MAX_BYTES),
+    ],
+)
+def test_size_cap_must_be_a_finite_positive_number(monkeypatch, setting, max_bytes):
+    monkeypatch.setattr(run_cache.global_env, "CODEGEN_RUN_CACHE_MAX_MB", setting)
+    monkeypatch.setattr(run_cache, "_default_cache", None)
+    assert run_cache.get_default_run_cache().max_bytes == max_bytes
+
+
+def test_runs_outside_a_git_repository_have_no_key(tmp_path: Path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    api = RestAPI("token", run_cache=RunCache(tmp_path / "runs"))
+    assert api._run_cache_key(SimpleNamespace(name="function", source="pass")) is None
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path: Path):
+    output = RunCodemodOutput(success=True, observation="x" * 1000)
+    cache = RunCache(tmp_path / "runs", max_bytes=2500)
+    for i, key in enumerate(["aa1", "bb2"]):
+        cache.store(key, output)
+        os.utime(cache.directory / key[:2] / key, (i, i))
+    # Reading marks "aa1" as used, so "bb2" is the one evicted
+    assert cache.get("aa1") is not None
+    cache.store("cc3", output)
+
+    assert cache.get("bb2") is None
+    assert cache.get("aa1") is not None and cache.get("cc3") is not None
+    assert cache.stats()[0] == 2
+
+
+def test_run_results_are_managed_outside_a_repository_and_with_caching_disabled(tmp_path: Path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(run_cache.global_env, "CODEGEN_NO_CACHE", "1")
+    cache = RunCache(tmp_path / "runs", enabled=False)
+    cache.store("ok", RunCodemodOutput(success=True, observation="diff"))
+    monkeypatch.setattr(run_cache, "_default_cache", cache)
+
+    result = CliRunner().invoke(main, ["cache", "stats"])
+    assert result.exit_code == 0, result.output
+    assert "Run results: 1" in result.output and "Not in a git repository" in result.output
+
+    assert CliRunner().invoke(main, ["cache", "clear"]).exit_code != 0
+    result = CliRunner().invoke(main, ["cache", "clear", "--runs"])
+    assert result.exit_code == 0, result.output
+    assert "Removed 1 cached run result" in result.output
+    assert cache.stats() == (0, 0)
@@ -0,0 +1,150 @@
+import io
+import sys
+import threading
+import time
+import webbrowser
+
+import pytest
+import rich_click as click
+
+from codegen.cli.api.client import RestAPI
+from codegen.cli.api.schemas import IdentifyResponse
+from codegen.cli.auth import session as session_module
+from codegen.cli.auth import token_manager
+from codegen.cli.auth.login import login_routine
+from codegen.cli.auth.session import CodegenSession
+from codegen.cli.auth.token_manager import TokenManager
+from codegen.cli.daemon import protocol
+from codegen.cli.env.global_env import global_env
+from codegen.cli.errors import InvalidTokenError
+
+IDENTITY = {
+    "auth_context": {"token_id": 1, "expires_at": "2999-01-01T00:00:00", "status": "active", "user_id": 1},
+    "user": {
+        "github_user_id": "1",
+        "avatar_url": "",
+        "auth_user_id": "1",
+        "created_at": "",
+        "email": "user@example.com",
+        "is_contractor": None,
+        "github_username": "user",
+        "full_name": "User",
+        "id": 1,
+        "last_updated_at": None,
+    },
+}
+
+
+@pytest.fixture
+def identify_calls(tmp_path, monkeypatch):
+    """Stores the token under tmp_path and counts calls to /identify."""
+    monkeypatch.setattr(token_manager, "CONFIG_DIR", tmp_path)
+    monkeypatch.setattr(token_manager, "AUTH_FILE", tmp_path / "auth.json")
+    TokenManager().save_token("token")
+
+    calls = []
+
+    def identify(self):
+        calls.append(self.auth_token)
+        return IdentifyResponse.model_validate(IDENTITY)
+
+    monkeypatch.setattr(RestAPI, "identify", identify)
+    return calls
+
+
+def test_identity_is_stored_with_the_token_and_reused(identify_calls):
+    assert CodegenSession().is_authenticated()
+    assert CodegenSession().is_authenticated()
+    assert CodegenSession().profile.username == "user"
+    assert identify_calls == ["token"]
+
+    # Logging in with a new token drops the stored identity
+    TokenManager().save_token("new-token")
+    assert CodegenSession().is_authenticated()
+    assert identify_calls == ["token", "new-token"]
+
+
+def test_stored_identity_expires_and_is_cleared_on_401(identify_calls, monkeypatch):
+    CodegenSession().is_authenticated()
+
+    # Expired TTL: fetched again before use
+    identity, _ = TokenManager().get_identity("token")
+    TokenManager()._write({"token": "token", "identity": identity, "identity_fetched_at": time.time() - session_module.DEFAULT_IDENTITY_TTL})
+    CodegenSession().is_authenticated()
+    assert len(identify_calls) == 2
+
+    session = CodegenSession()
+    CodegenSession.set_current(session)
+    assert session.is_authenticated()
+    with pytest.raises(InvalidTokenError):
+        RestAPI("token")._parse_response(401, b"{}", IdentifyResponse)
+    assert TokenManager().get_identity("token") is None
+    assert TokenManager().get_token() == "token"
+    # The shared session doesn't keep trusting the identity it held
+    assert session._identity is None and session._profile is None
+    CodegenSession.set_current(None)
+
+
+def test_background_refresh_is_waited_for_at_exit(identify_calls, monkeypatch):
+    CodegenSession().is_authenticated()
+    identity, _ = TokenManager().get_identity("token")
+    TokenManager()._write({"token": "token", "identity": identity, "identity_fetched_at": time.time() - session_module.DEFAULT_IDENTITY_TTL * 0.75})
+    fetch = session_module._fetch_identity
+    monkeypatch.setattr(session_module, "_fetch_identity", lambda token: time.sleep(0.05) or fetch(token))
+
+    # Past half the TTL: the stored identity is used and refreshed in the background
+    assert CodegenSession().is_authenticated()
+    assert len(identify_calls) == 1
+    session_module._join_refreshes()
+    assert len(identify_calls) == 2
+
+
+def test_exit_does_not_wait_long_for_a_hung_refresh(monkeypatch):
+    release = threading.Event()
+    monkeypatch.setattr(session_module, "_fetch_identity", lambda token: release.wait(10))
+    monkeypatch.setattr(session_module, "_refresh_threads", [])
+    monkeypatch.setattr(session_module.atexit, "register", lambda function: None)
+
+    session_module._start_refresh("token")
+    start = time.monotonic()
+    session_module._join_refreshes()
+    assert time.monotonic() - start < 1
+    release.set()
+
+
+def test_current_session_is_shared_and_reloads_config_on_change(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / ".git").mkdir()
+    CodegenSession.set_current(None)
+
+    session = CodegenSession.current()
+    assert CodegenSession.current() is session
+    session.config.repo_name = "repo"
+    session.write_config()
+    config = session.config
+    assert session.config is config
+
+    assert "discovery" not in (session.codegen_dir / "config.toml").read_text()  # only defaults: no [discovery] table
+
+    (session.codegen_dir / "config.toml").write_text('repo_name = "other-repo"\norganization_name = "org"\n')
+    assert session.repo_name == "org/other-repo"
+
+    # A new working directory gets its own session
+    other = tmp_path / "other"
+    other.mkdir()
+    monkeypatch.chdir(other)
+    assert CodegenSession.current() is not session
+    CodegenSession.set_current(None)
+
+
+def test_login_reads_a_piped_token_except_in_the_daemon(identify_calls, monkeypatch):
+    monkeypatch.setattr(global_env, "CODEGEN_USER_ACCESS_TOKEN", None)
+    monkeypatch.setattr(webbrowser, "open_new", lambda url: None)
+    monkeypatch.setattr(sys, "stdin", io.StringIO("piped-token\n"))
+    assert login_routine().token == "piped-token"
+    assert TokenManager().get_token() == "piped-token"
+    CodegenSession.set_current(None)
+
+    monkeypatch.setattr(protocol, "IN_DAEMON", True)
+    with pytest.raises(click.ClickException, match="Not authenticated"):
+        login_routine()
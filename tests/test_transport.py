@@ -0,0 +1,79 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from codegen.cli.api.transport import HTTPTransport, TokenBucket, TransportConfig, parse_retry_after
+
+
+@pytest.fixture
+def server():
+    """Local server answering each request with the next (status, headers) in `server.responses`."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def _respond(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            status, headers = self.server.responses.pop(0) if self.server.responses else (200, {})
+            self.server.requests += 1
+            self.send_response(status)
+            for key, value in headers.items():
+                self.send_header(key, value)
+            self.send_header("Content-Length", "2")
+            self.end_headers()
+            self.wfile.write(b"{}")
+
+        do_GET = do_POST = _respond
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    httpd.responses, httpd.requests = [], 0
+    httpd.url = f"http://127.0.0.1:{httpd.server_address[1]}/"
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+
+
+def test_transport_retries_idempotent_requests_and_honors_retry_after(server):
+    transport = HTTPTransport(TransportConfig(backoff_base=0.01))
+    server.responses = [(502, {}), (503, {"Retry-After": "0"})]
+    assert transport.request("GET", server.url).status_code == 200
+    assert server.requests == 3
+
+    # A failed POST may have been processed, so only 429s are retried
+    server.responses = [(502, {})]
+    assert transport.request("POST", server.url, json={}).status_code == 502
+    server.responses = [(429, {"Retry-After": "0"})]
+    assert transport.request("POST", server.url, json={}).status_code == 200
+
+    # Retry-After beyond the configured maximum fails fast
+    server.responses = [(429, {"Retry-After": "3600"})]
+    assert transport.request("GET", server.url).status_code == 429
+
+
+def test_transport_does_not_retry_forever(server):
+    transport = HTTPTransport(TransportConfig(max_retries=2, backoff_base=0.01))
+    server.responses = [(503, {})] * 5
+    assert transport.request("GET", server.url).status_code == 503
+    assert server.requests == 3
+
+
+def test_token_bucket_limits_rate_across_threads():
+    bucket = TokenBucket(rate=100, capacity=5)
+    start = time.monotonic()
+    threads = [threading.Thread(target=lambda: [bucket.acquire() for _ in range(5)]) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # 20 tokens with a burst of 5 need at least 15 refills at 100/s
+    assert time.monotonic() - start >= 0.14
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("5") == 5
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0
+    assert parse_retry_after("soon") is None
@@ -0,0 +1,140 @@
+import gzip
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from codegen.cli.api import wire
+from codegen.cli.api.client import APIRequest, RestAPI
+from codegen.cli.api.schemas import RunCodemodInput, RunCodemodOutput
+from codegen.cli.api.transport import HTTPTransport
+from codegen.cli.api.wire import WireNegotiator, decode
+from codegen.cli.errors import ServerError
+
+
+@pytest.fixture
+def server(monkeypatch):
+    """Stand-in endpoint that gzips its responses and, unless `accepts_gzip` is set, rejects gzipped request bodies with `reject_status`.
+
+    Its responses advertise gzip request bodies when `advertises_gzip` is set.
+    """
+    # It only reads gzip, so clients must not pick zstd even where it is installed
+    monkeypatch.setattr(wire, "zstandard", None)
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers["Content-Length"]))
+            encoding = self.headers.get("Content-Encoding")
+            self.server.request_encodings.append(encoding)
+            if encoding == "gzip" and not self.server.accepts_gzip:
+                # Only a 415 is about the encoding; other rejections are about the content
+                self._send(self.server.reject_status, b"{}", {"Accept-Encoding": "identity"} if self.server.reject_status == 415 else {})
+                return
+            payload = json.loads(gzip.decompress(body) if encoding == "gzip" else body)
+            output = {"success": True, "observation": payload["input"]["codemod_source"] * 2}
+            headers = {"Content-Encoding": "gzip", "Content-Type": "application/json"}
+            if self.server.advertises_gzip:
+                headers["Accept-Encoding"] = "gzip"
+            self._send(200, gzip.compress(json.dumps(output).encode()), headers)
+
+        def _send(self, status, content, headers):
+            self.send_response(status)
+            for key, value in headers.items():
+                self.send_header(key, value)
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    httpd.request_encodings, httpd.accepts_gzip, httpd.advertises_gzip, httpd.reject_status = [], False, False, 415
+    httpd.url = f"http://127.0.0.1:{httpd.server_address[1]}/"
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield httpd
+    httpd.shutdown()
+
+
+def run_request(url: str, source: str) -> APIRequest:
+    input_data = RunCodemodInput(input=RunCodemodInput.BaseRunCodemodInput(repo_full_name="org/repo", codemod_source=source))
+    return APIRequest("POST", url, input_data, RunCodemodOutput)
+
+
+def test_large_bodies_are_only_compressed_for_servers_that_advertise_it(server):
+    api = RestAPI("token", transport=HTTPTransport(), wire=WireNegotiator())
+    source = "print('hello')\n" * 1000
+
+    assert api._send(run_request(server.url, source)).observation == source * 2
+    assert api._send(run_request(server.url, source)).observation == source * 2
+    assert server.request_encodings == [None, None]
+
+    server.request_encodings = []
+    server.accepts_gzip = server.advertises_gzip = True
+    api = RestAPI("token", transport=HTTPTransport(), wire=WireNegotiator())
+    # Nothing is known about the server until its first response
+    assert api._send(run_request(server.url, source)).observation == source * 2
+    assert api._send(run_request(server.url, source)).observation == source * 2
+    assert api._send(run_request(server.url, "small")).observation == "smallsmall"
+    assert server.request_encodings == [None, "gzip", None]
+
+
+def test_rejected_compressed_bodies_fall_back_to_plain_json(server):
+    server.advertises_gzip = True
+    api = RestAPI("token", transport=HTTPTransport(), wire=WireNegotiator())
+    source = "print('hello')\n" * 1000
+    api._send(run_request(server.url, "small"))
+
+    # Rejected gzip body: resent as plain JSON, and plain JSON is used from then on
+    assert api._send(run_request(server.url, source)).observation == source * 2
+    assert api._send(run_request(server.url, source)).observation == source * 2
+    assert server.request_encodings == [None, "gzip", None, None]
+
+
+@pytest.mark.parametrize("status", [400, 422])
+def test_validation_errors_are_not_resent(server, status):
+    server.reject_status, server.advertises_gzip = status, True
+    api = RestAPI("token", transport=HTTPTransport(), wire=WireNegotiator())
+    source = "print('hello')\n" * 1000
+    api._send(run_request(server.url, "small"))
+
+    for _ in range(2):
+        with pytest.raises(ServerError):
+            api._send(run_request(server.url, source))
+    # Sent once each, and still compressed: the endpoint wasn't marked as plain-JSON only
+    assert server.request_encodings == [None, "gzip", "gzip"]
+
+
+def test_zstd_request_bodies():
+    zstandard = pytest.importorskip("zstandard")
+    negotiator = WireNegotiator()
+    payload = {"input": {"codemod_source": "print('hello')\n" * 1000}}
+
+    assert not negotiator.encode("https://example.com/run", payload).negotiated
+    negotiator.record_response("https://example.com/run", {"Accept-Encoding": "gzip, zstd"})
+    body = negotiator.encode("https://example.com/run", payload)
+    assert body.negotiated and body.headers["Content-Encoding"] == "zstd"
+    assert "zstd" in body.headers["Accept-Encoding"]
+    assert json.loads(zstandard.ZstdDecompressor().decompress(body.content)) == payload
+
+
+def test_msgpack_is_used_once_the_server_answers_in_it():
+    msgpack = pytest.importorskip("msgpack")
+    negotiator = WireNegotiator(compress_min_size=2**20)
+    endpoint = "https://example.com/run"
+    payload = {"input": {"codemod_source": "print('hello')"}}
+
+    assert negotiator.encode(endpoint, payload).headers["Content-Type"] == "application/json"
+    assert negotiator.encode(endpoint, payload).headers["Accept"].startswith("application/msgpack")
+    negotiator.record_response(endpoint, {"Content-Type": "application/msgpack; charset=binary"})
+    body = negotiator.encode(endpoint, payload)
+    assert body.negotiated and body.headers["Content-Type"] == "application/msgpack"
+    assert msgpack.unpackb(body.content) == payload
+    assert decode(msgpack.packb({"success": True}), "application/msgpack") == {"success": True}
+
+    # A 415 sends plain JSON from then on
+    assert negotiator.should_fall_back(endpoint, body, 415)
+    assert negotiator.encode(endpoint, payload).headers["Content-Type"] == "application/json"